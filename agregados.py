@@ -0,0 +1,145 @@
+# agregados.py
+from dinero import a_centavos, a_pesos
+
+
+class AgregadosVentas:
+    """Totales de ventas precalculados por día, mes, producto y cliente.
+
+    Se actualizan pedido a pedido con ``agregar`` (O(items del pedido)) y los reportes leen
+    directamente los acumulados en O(cantidad de grupos). ``hasta_id_pedido`` indica el último
+    pedido incluido, para completar con los pedidos posteriores al recargar.
+    Los montos se acumulan en centavos enteros; las consultas los devuelven en pesos.
+    """
+
+    # Cambia si cambia el contenido de to_dict(); los acumulados de otro formato se recalculan
+    FORMATO = 3
+
+    def __init__(self):
+        self.pedidos = 0
+        self.total_centavos = 0
+        self.hasta_id_pedido = 0
+        self.por_dia = {}        # 'YYYY-MM-DD' -> [pedidos, centavos]
+        self.por_mes = {}        # 'YYYY-MM' -> [pedidos, centavos]
+        self.por_producto = {}   # id_producto -> [nombre, unidades, centavos]
+        self.por_cliente = {}    # id_cliente -> [nombre, pedidos, centavos]
+        self.por_items = {}      # items (líneas) del pedido -> pedidos, para el tamaño de canasta
+        self.items = 0
+        self.unidades = 0
+
+    @staticmethod
+    def desde_pedidos(pedidos):
+        agregados = AgregadosVentas()
+        for pedido in pedidos:
+            agregados.agregar(pedido)
+        return agregados
+
+    def agregar(self, pedido):
+        monto = a_centavos(pedido.get('total_pedido', 0))
+        self.pedidos += 1
+        self.total_centavos += monto
+        self.hasta_id_pedido = max(self.hasta_id_pedido, pedido.get('id_pedido', 0))
+
+        fecha = pedido.get('fecha_pedido') or ''
+        if len(fecha) >= 10:
+            for grupos, clave in ((self.por_dia, fecha[:10]), (self.por_mes, fecha[:7])):
+                acumulado = grupos.setdefault(clave, [0, 0])
+                acumulado[0] += 1
+                acumulado[1] += monto
+
+        cliente = self.por_cliente.setdefault(pedido.get('id_cliente'), [None, 0, 0])
+        cliente[0] = pedido.get('nombre_cliente') or cliente[0] or 'Desconocido'
+        cliente[1] += 1
+        cliente[2] += monto
+
+        items = pedido.get('items', [])
+        self.por_items[len(items)] = self.por_items.get(len(items), 0) + 1
+        self.items += len(items)
+        for it in items:
+            self.unidades += int(it.get('cantidad', 0))
+            producto = self.por_producto.setdefault(it.get('id_producto'), [None, 0, 0])
+            producto[0] = it.get('nombre') or producto[0] or 'SinNombre'
+            producto[1] += int(it.get('cantidad', 0))
+            producto[2] += a_centavos(it.get('subtotal', 0))
+
+    # --------------------------
+    # Consultas para reportes
+    # --------------------------
+
+    @property
+    def total(self):
+        return a_pesos(self.total_centavos)
+
+    @property
+    def clientes_distintos(self):
+        return len(self.por_cliente)
+
+    def ventas_por_mes(self):
+        """[(mes, pedidos, total)] ordenado por mes."""
+        return [(mes, n, a_pesos(monto)) for mes, (n, monto) in sorted(self.por_mes.items())]
+
+    def top_productos(self, limite=10):
+        """[(nombre, unidades, total)] de los productos con más unidades vendidas."""
+        mejores = sorted(self.por_producto.values(), key=lambda x: x[1], reverse=True)[:limite]
+        return [(nombre, unidades, a_pesos(monto)) for nombre, unidades, monto in mejores]
+
+    def top_clientes(self, limite=10):
+        """[(nombre, pedidos, total)] de los clientes con mayor monto comprado."""
+        mejores = sorted(self.por_cliente.values(), key=lambda x: x[2], reverse=True)[:limite]
+        return [(nombre, n, a_pesos(monto)) for nombre, n, monto in mejores]
+
+    def tamano_canasta(self):
+        """Items y unidades por pedido: promedios y cantidad de pedidos por número de items."""
+        n = self.pedidos
+        return {'pedidos': n, 'items_promedio': self.items / n if n else 0.0,
+                'unidades_promedio': self.unidades / n if n else 0.0,
+                'pedidos_por_items': dict(sorted(self.por_items.items()))}
+
+    def resumen(self, limite=10):
+        """Totales, ventas por mes y los ``limite`` mejores productos y clientes, listo para JSON."""
+        return {
+            'pedidos': self.pedidos,
+            'total': self.total,
+            'clientes_distintos': self.clientes_distintos,
+            'ventas_por_mes': [{'mes': mes, 'pedidos': n, 'total': total}
+                               for mes, n, total in self.ventas_por_mes()],
+            'top_productos': [{'nombre': nombre, 'unidades': unidades, 'total': total}
+                              for nombre, unidades, total in self.top_productos(limite)],
+            'top_clientes': [{'nombre': nombre, 'pedidos': n, 'total': total}
+                             for nombre, n, total in self.top_clientes(limite)],
+        }
+
+    # --------------------------
+    # Serialización (JSON: las claves numéricas se guardan como texto)
+    # --------------------------
+
+    def to_dict(self):
+        return {
+            'formato': self.FORMATO,
+            'pedidos': self.pedidos,
+            'total_centavos': self.total_centavos,
+            'hasta_id_pedido': self.hasta_id_pedido,
+            'por_dia': self.por_dia,
+            'por_mes': self.por_mes,
+            'por_producto': {str(k): v for k, v in self.por_producto.items()},
+            'por_cliente': {str(k): v for k, v in self.por_cliente.items()},
+            'por_items': {str(k): v for k, v in self.por_items.items()},
+            'items': self.items,
+            'unidades': self.unidades,
+        }
+
+    @staticmethod
+    def from_dict(datos):
+        agregados = AgregadosVentas()
+        agregados.pedidos = datos['pedidos']
+        agregados.total_centavos = datos['total_centavos']
+        agregados.hasta_id_pedido = datos['hasta_id_pedido']
+        agregados.por_dia = datos['por_dia']
+        agregados.por_mes = datos['por_mes']
+        agregados.por_producto = {int(k) if k.lstrip('-').isdigit() else None: v
+                                  for k, v in datos['por_producto'].items()}
+        agregados.por_cliente = {int(k) if k.lstrip('-').isdigit() else None: v
+                                 for k, v in datos['por_cliente'].items()}
+        agregados.por_items = {int(k): v for k, v in datos['por_items'].items()}
+        agregados.items = datos['items']
+        agregados.unidades = datos['unidades']
+        return agregados
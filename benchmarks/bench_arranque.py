@@ -0,0 +1,99 @@
+# bench_arranque.py
+"""Mide el arranque en frío del menú con un historial de pedidos grande.
+
+Genera un directorio de datos sintético y, en un proceso nuevo por medición, toma:
+- importar ``persistencia`` (sin openpyxl/reportlab),
+- importar ``main`` y dibujar el menú principal,
+- el primer acceso a ``tienda_app.pedidos`` (carga diferida del historial).
+
+Con ``--formato binario`` el historial se convierte a pedidos.bin (abierto con mmap).
+
+Uso: python benchmarks/bench_arranque.py [--pedidos 100000] [--repeticiones 3] [--formato json|binario]
+                                         [--salida arranque.json]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from persistencia import PersistenciaArchivos, PersistenciaJSON  # noqa: E402
+
+MEDICION = r"""
+import io, json, sys, time
+t0 = time.perf_counter()
+import persistencia
+t_persistencia = time.perf_counter() - t0
+pesados = sorted(m for m in ('openpyxl', 'reportlab') if m in sys.modules)
+import main
+from rich.console import Console
+main.console = Console(file=io.StringIO(), force_terminal=True, width=100)
+main.mostrar_menu()
+t_menu = time.perf_counter() - t0
+t1 = time.perf_counter()
+n = len(main.tienda_app.pedidos)
+t_pedidos = time.perf_counter() - t1
+print(json.dumps({'importar_persistencia': t_persistencia, 'menu_visible': t_menu,
+                  'primer_acceso_pedidos': t_pedidos, 'pedidos': n, 'modulos_pesados_al_importar': pesados}))
+"""
+
+
+def generar_datos(directorio, cantidad_pedidos):
+    rng = random.Random(42)
+    with open(os.path.join(directorio, 'productos.csv'), 'w', encoding='utf-8') as f:
+        f.write('id_producto,nombre,precio,stock\n')
+        for i in range(1, 201):
+            f.write(f'{i},Producto {i},{rng.randint(5, 500) * 100}.0,1000\n')
+    with open(os.path.join(directorio, 'clientes.csv'), 'w', encoding='utf-8') as f:
+        f.write('id_cliente,nombre,email\n')
+        for i in range(1, 101):
+            f.write(f'{i},Cliente {i},cliente{i}@correo.com\n')
+    pedidos = ({'id_pedido': i, 'id_cliente': rng.randint(1, 100), 'nombre_cliente': 'Cliente',
+                'fecha_pedido': f'2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 10:00:00',
+                'items': [{'id_producto': 1, 'nombre': 'Producto 1', 'cantidad': 1, 'precio_unitario': 100.0,
+                           'subtotal': 100.0}] * 3,
+                'total_pedido': 300.0} for i in range(1, cantidad_pedidos + 1))
+    PersistenciaJSON.escribir_pedidos(os.path.join(directorio, 'pedidos.json'), pedidos)
+
+
+def medir(directorio):
+    entorno = dict(os.environ, PYTHONPATH=RAIZ, TIENDA_ALMACEN='archivos')
+    salida = subprocess.run([sys.executable, '-c', MEDICION], cwd=directorio, env=entorno,
+                            capture_output=True, text=True, check=True)
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pedidos', type=int, default=100000)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--formato', choices=['json', 'binario'], default='json', help='Formato del snapshot de pedidos')
+    parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directorio:
+        generar_datos(directorio, args.pedidos)
+        if args.formato == 'binario':
+            PersistenciaArchivos(directorio).convertir_pedidos('binario')
+        mediciones = [medir(directorio) for _ in range(args.repeticiones)]
+
+    resultado = {'pedidos': args.pedidos, 'repeticiones': args.repeticiones, 'formato': args.formato,
+                 'modulos_pesados_al_importar': mediciones[0]['modulos_pesados_al_importar']}
+    for clave in ('importar_persistencia', 'menu_visible', 'primer_acceso_pedidos'):
+        resultado[clave + '_s'] = statistics.median(m[clave] for m in mediciones)
+    texto = json.dumps(resultado, indent=2)
+    print(texto)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            f.write(texto + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,100 @@
+# bench_memoria.py
+"""Compara la memoria de los pedidos como lista de dicts y como ``ListaPedidos`` (columnas).
+
+Los pedidos sintéticos se decodifican desde JSON, igual que al leer pedidos.json, y se mide
+con tracemalloc la memoria retenida por cada representación. También compara ``Producto``
+(con ``__slots__``) contra una clase equivalente con ``__dict__``.
+
+Uso: python benchmarks/bench_memoria.py [--pedidos 100000] [--items 3] [--salida memoria.json]
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from gestion import Producto  # noqa: E402
+from lista_pedidos import ListaPedidos  # noqa: E402
+
+
+class ProductoConDict:
+    def __init__(self, id_producto, nombre, precio, stock):
+        self.id_producto = int(id_producto)
+        self.nombre = nombre
+        self.precio = float(precio)
+        self.stock = int(stock)
+
+
+def generar_lineas(cantidad_pedidos, items_por_pedido):
+    rng = random.Random(42)
+    for i in range(1, cantidad_pedidos + 1):
+        items = []
+        for _ in range(items_por_pedido):
+            id_producto = rng.randint(1, 200)
+            cantidad = rng.randint(1, 5)
+            precio = rng.randint(5, 500) * 100.0
+            items.append({'id_producto': id_producto, 'nombre': f'Producto {id_producto}', 'cantidad': cantidad,
+                          'precio_unitario': precio, 'subtotal': precio * cantidad})
+        id_cliente = rng.randint(1, 100)
+        yield json.dumps({'id_pedido': i, 'id_cliente': id_cliente, 'nombre_cliente': f'Cliente {id_cliente}',
+                          'fecha_pedido': f'2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 10:00:00',
+                          'items': items, 'total_pedido': sum(it['subtotal'] for it in items)})
+
+
+def medir(construir):
+    """Bytes retenidos por el resultado de ``construir()`` y segundos que tardó."""
+    gc.collect()
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = construir()
+    segundos = time.perf_counter() - inicio
+    gc.collect()
+    retenidos, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del resultado
+    return retenidos, segundos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pedidos', type=int, default=100000)
+    parser.add_argument('--items', type=int, default=3, help='Items por pedido')
+    parser.add_argument('--productos', type=int, default=100000)
+    parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados')
+    args = parser.parse_args(argv)
+
+    lineas = list(generar_lineas(args.pedidos, args.items))
+    bytes_dicts, s_dicts = medir(lambda: [json.loads(linea) for linea in lineas])
+    bytes_columnas, s_columnas = medir(lambda: ListaPedidos(json.loads(linea) for linea in lineas))
+    bytes_prod_dict, _ = medir(lambda: [ProductoConDict(i, f'Producto {i}', 100.0, 5) for i in range(args.productos)])
+    bytes_prod_slots, _ = medir(lambda: [Producto(i, f'Producto {i}', 100.0, 5) for i in range(args.productos)])
+
+    resultado = {
+        'pedidos': args.pedidos,
+        'items_por_pedido': args.items,
+        'lista_dicts_bytes': bytes_dicts,
+        'lista_pedidos_bytes': bytes_columnas,
+        'bytes_por_pedido': {'dicts': bytes_dicts / args.pedidos, 'columnas': bytes_columnas / args.pedidos},
+        'ahorro_pedidos': 1 - bytes_columnas / bytes_dicts,
+        'carga_s': {'dicts': s_dicts, 'columnas': s_columnas},
+        'productos': args.productos,
+        'producto_dict_bytes': bytes_prod_dict,
+        'producto_slots_bytes': bytes_prod_slots,
+        'ahorro_productos': 1 - bytes_prod_slots / bytes_prod_dict,
+    }
+    texto = json.dumps(resultado, indent=2)
+    print(texto)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            f.write(texto + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+# bench_servicio.py
+"""Generador de carga local para servicio.py: latencia (p50/p95/p99) y solicitudes por segundo.
+
+Levanta el servicio en un proceso aparte sobre datos sintéticos y abre ``--conexiones``
+conexiones HTTP/1.1 persistentes que mezclan lecturas (producto por ID, historial de un
+cliente, reporte de ventas) con altas de pedidos según ``--escrituras`` (fracción de POST).
+
+Uso: python benchmarks/bench_servicio.py [--conexiones 32] [--solicitudes 200] [--escrituras 0.1]
+                                         [--salida servicio.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PRODUCTOS, CLIENTES = 500, 200
+
+
+def generar_datos(directorio):
+    rng = random.Random(42)
+    with open(os.path.join(directorio, 'productos.csv'), 'w', encoding='utf-8') as f:
+        f.write('id_producto,nombre,precio,stock,version\n')
+        for i in range(1, PRODUCTOS + 1):
+            f.write(f'{i},Producto {i},{rng.randint(5, 500) * 100}.0,1000000,0\n')
+    with open(os.path.join(directorio, 'clientes.csv'), 'w', encoding='utf-8') as f:
+        f.write('id_cliente,nombre,email\n')
+        for i in range(1, CLIENTES + 1):
+            f.write(f'{i},Cliente {i},cliente{i}@correo.com\n')
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+async def esperar_servicio(puerto, limite=30):
+    fin = time.monotonic() + limite
+    while True:
+        try:
+            _, escritor = await asyncio.open_connection('127.0.0.1', puerto)
+            escritor.close()
+            return
+        except OSError:
+            if time.monotonic() > fin:
+                raise
+            await asyncio.sleep(0.05)
+
+
+async def solicitar(lector, escritor, metodo, ruta, datos=None):
+    cuerpo = json.dumps(datos).encode() if datos is not None else b''
+    escritor.write(f"{metodo} {ruta} HTTP/1.1\r\nHost: bench\r\nContent-Length: {len(cuerpo)}\r\n\r\n".encode() + cuerpo)
+    await escritor.drain()
+    estado = int((await lector.readline()).split()[1])
+    largo = 0
+    while (linea := await lector.readline()) not in (b'\r\n', b''):
+        nombre, _, valor = linea.decode('latin-1').partition(':')
+        if nombre.lower() == 'content-length':
+            largo = int(valor)
+    await lector.readexactly(largo)
+    return estado
+
+
+async def conexion(puerto, solicitudes, escrituras, semilla, latencias):
+    rng = random.Random(semilla)
+    lector, escritor = await asyncio.open_connection('127.0.0.1', puerto)
+    for _ in range(solicitudes):
+        sorteo = rng.random()
+        if sorteo < escrituras:
+            tipo, metodo, ruta = 'crear_pedido', 'POST', '/pedidos'
+            datos = {'id_cliente': rng.randint(1, CLIENTES),
+                     'items': {str(rng.randint(1, PRODUCTOS)): rng.randint(1, 3) for _ in range(3)}}
+        elif sorteo < escrituras + (1 - escrituras) * 0.8:
+            tipo, metodo, ruta, datos = 'ver_producto', 'GET', f'/productos/{rng.randint(1, PRODUCTOS)}', None
+        elif sorteo < escrituras + (1 - escrituras) * 0.95:
+            tipo, metodo, ruta, datos = 'historial', 'GET', f'/clientes/{rng.randint(1, CLIENTES)}/pedidos', None
+        else:
+            tipo, metodo, ruta, datos = 'reporte', 'GET', '/reportes/ventas', None
+        inicio = time.perf_counter()
+        estado = await solicitar(lector, escritor, metodo, ruta, datos)
+        latencias.setdefault(tipo, []).append(time.perf_counter() - inicio)
+        if estado >= 500:
+            raise RuntimeError(f"{metodo} {ruta} respondió {estado}")
+    escritor.close()
+
+
+def resumen(valores):
+    ordenados = sorted(valores)
+    percentil = lambda p: ordenados[min(len(ordenados) - 1, int(p * len(ordenados)))] * 1000  # noqa: E731
+    return {'solicitudes': len(valores), 'p50_ms': percentil(0.50), 'p95_ms': percentil(0.95),
+            'p99_ms': percentil(0.99), 'media_ms': statistics.fmean(valores) * 1000}
+
+
+async def cargar(puerto, conexiones, solicitudes, escrituras):
+    await esperar_servicio(puerto)
+    latencias = {}
+    inicio = time.perf_counter()
+    await asyncio.gather(*(conexion(puerto, solicitudes, escrituras, i, latencias) for i in range(conexiones)))
+    return time.perf_counter() - inicio, latencias
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--conexiones', type=int, default=32)
+    parser.add_argument('--solicitudes', type=int, default=200, help='Solicitudes por conexión')
+    parser.add_argument('--escrituras', type=float, default=0.1, help='Fracción de altas de pedidos')
+    parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directorio:
+        generar_datos(directorio)
+        puerto = puerto_libre()
+        entorno = dict(os.environ, PYTHONPATH=RAIZ, TIENDA_ALMACEN='archivos')
+        servicio = subprocess.Popen([sys.executable, os.path.join(RAIZ, 'servicio.py'), '--puerto', str(puerto)],
+                                    cwd=directorio, env=entorno, stdout=subprocess.DEVNULL)
+        try:
+            duracion, latencias = asyncio.run(cargar(puerto, args.conexiones, args.solicitudes, args.escrituras))
+        finally:
+            servicio.terminate()
+            servicio.wait()
+
+    total = sum(len(v) for v in latencias.values())
+    resultado = {'conexiones': args.conexiones, 'solicitudes': total, 'segundos': duracion,
+                 'solicitudes_por_segundo': total / duracion,
+                 'todas': resumen([x for v in latencias.values() for x in v]),
+                 'por_tipo': {tipo: resumen(v) for tipo, v in sorted(latencias.items())}}
+    texto = json.dumps(resultado, indent=2)
+    print(texto)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            f.write(texto + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,211 @@
+# bench_suite.py
+"""Suite de rendimiento de las operaciones principales de la tienda, a varias escalas.
+
+Para cada escala genera datos sintéticos (ver datos_sinteticos.py) y mide:
+- carga del historial (``PersistenciaJSON.leer_pedidos`` y primer acceso a ``Tienda.pedidos``),
+- escritura completa con ``_guardar_productos``, ``_guardar_clientes`` y ``_guardar_pedidos``,
+- latencia de ``crear_pedido`` (p50/p95),
+- búsqueda por nombre, lectura de código de barras, historial de un cliente y filtro por fechas
+  (con y sin índices armados),
+- reporte: acumulados recalculados desde todos los pedidos y leídos ya armados,
+- exportación a Excel y PDF de los primeros ``--exportar`` pedidos.
+
+Los resultados se guardan en JSON. Con ``--comparar anterior.json`` se informan las mediciones
+que empeoraron más que ``--tolerancia`` y el código de salida es 1 si hay alguna.
+
+Uso: python benchmarks/bench_suite.py [--escalas 1000 10000 100000] [--almacen archivos|sqlite]
+                                      [--productos N] [--clientes N] [--items 3] [--muestras 50]
+                                      [--exportar 2000] [--salida suite.json]
+                                      [--comparar anterior.json] [--tolerancia 0.25]
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from itertools import islice
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from rich.console import Console  # noqa: E402
+
+import gestion  # noqa: E402
+from agregados import AgregadosVentas  # noqa: E402
+from datos_sinteticos import codigo_sintetico, generar  # noqa: E402
+from gestion import Tienda  # noqa: E402
+from persistencia import PersistenciaJSON, crear_almacen  # noqa: E402
+
+# Diferencias menores a esto se consideran ruido al comparar con una corrida anterior
+RUIDO_MS = 1.0
+
+
+def medir(funcion, repeticiones=5):
+    """Mediana y mínimo en milisegundos de ``repeticiones`` llamadas a ``funcion``."""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return {'mediana_ms': statistics.median(tiempos), 'min_ms': min(tiempos)}
+
+
+def latencias(valores):
+    ordenados = sorted(valores)
+    percentil = lambda p: ordenados[min(len(ordenados) - 1, int(p * len(ordenados)))]  # noqa: E731
+    return {'muestras': len(valores), 'p50_ms': percentil(0.50), 'p95_ms': percentil(0.95),
+            'media_ms': statistics.fmean(valores)}
+
+
+def medir_escala(directorio, args, pedidos, productos, clientes):
+    ruta = os.path.join(directorio, 'tienda.db') if args.almacen == 'sqlite' else directorio
+    generar(directorio, productos, clientes, pedidos, args.items, sqlite=ruta if args.almacen == 'sqlite' else None)
+    abrir = lambda: Tienda(crear_almacen(args.almacen, ruta))  # noqa: E731
+    rng = random.Random(7)
+    resultado = {'pedidos': pedidos, 'productos': productos, 'clientes': clientes, 'items_por_pedido': args.items}
+
+    # --- carga ---
+    resultado['leer_pedidos'] = medir(lambda: PersistenciaJSON.leer_pedidos(os.path.join(directorio, 'pedidos.json')), 3)
+    resultado['primer_acceso_pedidos'] = medir(lambda: abrir().pedidos, 3)
+
+    tienda = abrir()
+    tienda.precargar().join()
+
+    # --- escritura completa de cada colección ---
+    resultado['guardar_productos'] = medir(tienda._guardar_productos, 3)
+    resultado['guardar_clientes'] = medir(tienda._guardar_clientes, 3)
+    resultado['guardar_pedidos'] = medir(tienda._guardar_pedidos, 1)
+
+    # --- índices (primer uso) y consultas ---
+    resultado['primera_busqueda'] = medir(lambda: abrir().buscar_productos_por_nombre('arroz'), 1)
+    tienda.buscar_productos_por_nombre('arroz')
+    resultado['buscar_productos'] = medir(lambda: tienda.buscar_productos_por_nombre('caf'), 20)
+    resultado['sugerir_productos'] = medir(lambda: tienda.sugerir_productos('aroz'), 20)
+    # Escáner en la caja: la mitad de las lecturas repite un artículo reciente
+    lecturas = [codigo_sintetico(rng.randint(1, productos)) for _ in range(500)]
+    lecturas = [lecturas[rng.randrange(i)] if i and rng.random() < 0.5 else lecturas[i] for i in range(500)]
+    tiempos = []
+    for lectura in lecturas:
+        inicio = time.perf_counter()
+        tienda.buscar_por_codigo(lectura)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    resultado['escanear_codigo'] = latencias(tiempos)
+
+    inicio = time.perf_counter()
+    tienda.historial_pedidos_cliente(1)
+    resultado['indices_pedidos'] = {'mediana_ms': (time.perf_counter() - inicio) * 1000}
+    resultado['historial_cliente'] = medir(lambda: tienda.historial_pedidos_cliente(rng.randint(1, clientes)), 20)
+    resultado['filtrar_por_fecha'] = medir(lambda: tienda.filtrar_pedidos_por_fecha('2024-06-01', '2024-06-30'), 20)
+
+    # --- reportes ---
+    resultado['agregados_desde_pedidos'] = medir(lambda: AgregadosVentas.desde_pedidos(tienda.pedidos), 3)
+    tienda.generar_reporte_ventas()  # el primero arma los acumulados
+    resultado['reporte_ventas'] = medir(tienda.generar_reporte_ventas, 20)
+
+    # --- alta de pedidos (con stock y diario en disco, como en el menú) ---
+    tiempos = []
+    for _ in range(args.muestras):
+        elegidos = rng.sample(range(1, productos + 1), min(args.items, productos))
+        inicio = time.perf_counter()
+        tienda.crear_pedido(rng.randint(1, clientes), {i: 1 for i in elegidos})
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    resultado['crear_pedido'] = latencias(tiempos)
+
+    # --- exportación ---
+    if args.exportar:
+        cantidad = min(args.exportar, pedidos)
+        xlsx, pdf = os.path.join(directorio, 'reporte.xlsx'), os.path.join(directorio, 'reporte.pdf')
+        resultado['exportar_excel'] = dict(medir(lambda: PersistenciaJSON.exportar_pedidos_excel(
+            xlsx, islice(tienda.iterar_pedidos(), cantidad)), 1), pedidos=cantidad)
+        resultado['exportar_pdf'] = dict(medir(lambda: PersistenciaJSON.exportar_pedidos_pdf(
+            pdf, islice(tienda.iterar_pedidos(), cantidad)), 1), pedidos=cantidad)
+
+    tienda.cerrar()
+    cerrar = getattr(tienda.almacen, 'cerrar', None)
+    if cerrar:
+        cerrar()
+    return resultado
+
+
+def comparar(actual, anterior, tolerancia):
+    """[(escala, medición, antes_ms, ahora_ms)] de lo que empeoró más que la tolerancia."""
+    regresiones = []
+    for escala, mediciones in actual['escalas'].items():
+        previas = anterior.get('escalas', {}).get(escala, {})
+        for nombre, valor in mediciones.items():
+            previo = previas.get(nombre)
+            if not isinstance(valor, dict) or not isinstance(previo, dict):
+                continue
+            clave = 'p50_ms' if 'p50_ms' in valor else 'mediana_ms'
+            antes, ahora = previo.get(clave), valor.get(clave)
+            if antes is not None and ahora is not None and ahora > antes * (1 + tolerancia) and ahora - antes > RUIDO_MS:
+                regresiones.append((escala, nombre, antes, ahora))
+    return regresiones
+
+
+def version_git():
+    try:
+        salida = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True, text=True)
+    except OSError:
+        return None
+    return salida.stdout.strip() or None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--escalas', type=int, nargs='+', default=[1000, 10000, 100000], help='Cantidades de pedidos')
+    parser.add_argument('--almacen', choices=['archivos', 'sqlite'], default='archivos')
+    parser.add_argument('--productos', type=int, help='Productos por escala (por defecto pedidos / 10, al menos 100)')
+    parser.add_argument('--clientes', type=int, help='Clientes por escala (por defecto pedidos / 20, al menos 50)')
+    parser.add_argument('--items', type=int, default=3, help='Items por pedido')
+    parser.add_argument('--muestras', type=int, default=50, help='Pedidos creados para medir crear_pedido')
+    parser.add_argument('--exportar', type=int, default=2000, help='Pedidos a exportar a Excel y PDF (0 = no exportar)')
+    parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados')
+    parser.add_argument('--comparar', help='Resultados anteriores (JSON) contra los que buscar regresiones')
+    parser.add_argument('--tolerancia', type=float, default=0.25, help='Empeoramiento relativo aceptado')
+    args = parser.parse_args(argv)
+
+    # Los mensajes de la tienda (✅ Pedido creado...) no se muestran
+    gestion.console = Console(file=io.StringIO())
+    if args.exportar:
+        # Importar openpyxl y reportlab antes: si no, la primera escala paga la importación
+        import openpyxl  # noqa: F401
+        import reportlab.platypus  # noqa: F401
+    resultado = {'meta': {'fecha': datetime.now().isoformat(timespec='seconds'), 'commit': version_git(),
+                          'python': platform.python_version(), 'plataforma': platform.platform(),
+                          'almacen': args.almacen},
+                 'escalas': {}}
+    for pedidos in args.escalas:
+        productos = args.productos or max(100, pedidos // 10)
+        clientes = args.clientes or max(50, pedidos // 20)
+        with tempfile.TemporaryDirectory() as directorio:
+            resultado['escalas'][str(pedidos)] = medir_escala(directorio, args, pedidos, productos, clientes)
+        print(f"escala {pedidos}: listo", file=sys.stderr)
+
+    texto = json.dumps(resultado, indent=2)
+    print(texto)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            f.write(texto + '\n')
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as f:
+            anterior = json.load(f)
+        if anterior.get('meta', {}).get('almacen') != args.almacen:
+            print("Aviso: la corrida anterior usó otro almacenamiento", file=sys.stderr)
+        regresiones = comparar(resultado, anterior, args.tolerancia)
+        for escala, nombre, antes, ahora in regresiones:
+            print(f"REGRESIÓN escala {escala} {nombre}: {antes:.2f} ms -> {ahora:.2f} ms", file=sys.stderr)
+        return 1 if regresiones else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
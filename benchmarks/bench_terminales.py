@@ -0,0 +1,98 @@
+# bench_terminales.py
+"""Mide pedidos por segundo con varias terminales (procesos) vendiendo sobre los mismos datos.
+
+Cada terminal abre su propia ``Tienda`` en modo multiterminal (TIENDA_MULTITERMINAL=1) y crea
+pedidos de 3 productos elegidos al azar entre ``--productos``; con pocos productos hay más
+conflictos de versión y reintentos. Al final verifica que el stock descontado coincida con
+los pedidos confirmados.
+
+Uso: python benchmarks/bench_terminales.py [--almacen archivos|sqlite] [--terminales 1 2 4 8]
+                                           [--pedidos 200] [--productos 200] [--salida terminales.json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from gestion import Cliente, Producto, Tienda  # noqa: E402
+from persistencia import crear_almacen  # noqa: E402
+
+TERMINAL = r"""
+import io, json, random, sys, time
+import gestion
+from rich.console import Console
+from gestion import Tienda
+from persistencia import crear_almacen
+gestion.console = Console(file=io.StringIO())
+tipo, ruta, pedidos, productos, semilla = sys.argv[1], sys.argv[2], int(sys.argv[3]), int(sys.argv[4]), int(sys.argv[5])
+rng = random.Random(semilla)
+tienda = Tienda(crear_almacen(tipo, ruta))
+tienda._asegurar_cargado('productos')
+print('listo', flush=True)
+sys.stdin.readline()  # todas las terminales arrancan juntas
+unidades = 0
+for _ in range(pedidos):
+    pedido = tienda.crear_pedido(1, {rng.randint(1, productos): 1 for _ in range(3)})
+    if pedido:
+        unidades += sum(it['cantidad'] for it in pedido['items'])
+tienda.cerrar()
+print(json.dumps({'unidades': unidades}))
+"""
+
+
+def preparar(tipo, ruta, productos):
+    almacen = crear_almacen(tipo, ruta)
+    almacen.guardar_productos({i: Producto(i, f"Producto {i}", 1000, 10 ** 6) for i in range(1, productos + 1)})
+    almacen.guardar_clientes({1: Cliente(1, "Cliente", "cliente@correo.com")})
+
+
+def medir(tipo, terminales, pedidos, productos):
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, 'tienda.db') if tipo == 'sqlite' else directorio
+        preparar(tipo, ruta, productos)
+        entorno = dict(os.environ, PYTHONPATH=RAIZ, TIENDA_MULTITERMINAL='1')
+        procesos = [subprocess.Popen([sys.executable, '-c', TERMINAL, tipo, ruta, str(pedidos), str(productos), str(i)],
+                                     cwd=directorio, env=entorno, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                     text=True) for i in range(terminales)]
+        for proceso in procesos:
+            proceso.stdout.readline()
+        inicio = time.perf_counter()
+        for proceso in procesos:
+            proceso.stdin.write('\n')
+            proceso.stdin.flush()
+        unidades = sum(json.loads(proceso.communicate()[0].strip().splitlines()[-1])['unidades'] for proceso in procesos)
+        duracion = time.perf_counter() - inicio
+        tienda = Tienda(crear_almacen(tipo, ruta))
+        descontadas = sum(10 ** 6 - p.stock for p in tienda.productos.values())
+        confirmados = len(tienda.pedidos)
+    return {'terminales': terminales, 'pedidos': confirmados, 'segundos': duracion,
+            'pedidos_por_segundo': confirmados / duracion, 'stock_consistente': descontadas == unidades}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--almacen', choices=['archivos', 'sqlite'], default='archivos')
+    parser.add_argument('--terminales', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--pedidos', type=int, default=200, help='Pedidos por terminal')
+    parser.add_argument('--productos', type=int, default=200)
+    parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados')
+    args = parser.parse_args(argv)
+
+    resultado = {'almacen': args.almacen, 'productos': args.productos,
+                 'mediciones': [medir(args.almacen, n, args.pedidos, args.productos) for n in args.terminales]}
+    texto = json.dumps(resultado, indent=2)
+    print(texto)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            f.write(texto + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
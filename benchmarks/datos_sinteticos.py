@@ -0,0 +1,97 @@
+# datos_sinteticos.py
+"""Genera un directorio de datos de tienda sintético y reproducible para los benchmarks.
+
+Escribe productos.csv, clientes.csv y pedidos.json (o una base SQLite con lo mismo) con la
+cantidad pedida de productos, clientes, pedidos e items por pedido. Los pedidos se escriben
+como flujo: generar millones no necesita tenerlos en memoria.
+
+Uso: python benchmarks/datos_sinteticos.py DIRECTORIO [--productos 1000] [--clientes 500]
+                                           [--pedidos 10000] [--items 3] [--sqlite tienda.db]
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from dinero import a_pesos  # noqa: E402
+from persistencia import CAMPOS_CLIENTE, CAMPOS_PRODUCTO, PersistenciaArchivos, PersistenciaCSV, PersistenciaJSON  # noqa: E402
+
+NOMBRES = ('Arroz', 'Pan', 'Leche', 'Café', 'Azúcar', 'Aceite', 'Harina', 'Queso', 'Yogur', 'Fideos',
+           'Galletas', 'Jabón', 'Manteca', 'Sal', 'Té', 'Atún', 'Lentejas', 'Tomate', 'Huevos', 'Agua')
+INICIO = datetime(2024, 1, 1)
+
+
+def productos_sinteticos(cantidad, rng):
+    return [{'id_producto': i, 'nombre': f"{rng.choice(NOMBRES)} {i}", 'precio': rng.randint(5, 5000) * 10,
+             'stock': 10 ** 9, 'version': 0, 'codigo': codigo_sintetico(i)} for i in range(1, cantidad + 1)]
+
+
+def codigo_sintetico(id_producto):
+    # Con forma de EAN-13 (sin dígito verificador real)
+    return f"770{id_producto:010d}"
+
+
+def clientes_sinteticos(cantidad):
+    return [{'id_cliente': i, 'nombre': f"Cliente {i}", 'email': f"cliente{i}@correo.com"}
+            for i in range(1, cantidad + 1)]
+
+
+def pedidos_sinteticos(cantidad, items_por_pedido, productos, clientes, rng):
+    """Generador de pedidos en orden de ID y de fecha, repartidos en dos años."""
+    paso = timedelta(days=730) / max(cantidad, 1)
+    for i in range(1, cantidad + 1):
+        cliente = clientes[rng.randrange(len(clientes))]
+        items = []
+        total = 0
+        for producto in rng.sample(productos, min(items_por_pedido, len(productos))):
+            cantidad_item = rng.randint(1, 5)
+            subtotal = producto['precio'] * 100 * cantidad_item
+            total += subtotal
+            items.append({'id_producto': producto['id_producto'], 'nombre': producto['nombre'],
+                          'cantidad': cantidad_item, 'precio_unitario': float(producto['precio']),
+                          'subtotal': a_pesos(subtotal)})
+        yield {'id_pedido': i, 'id_cliente': cliente['id_cliente'], 'nombre_cliente': cliente['nombre'],
+               'fecha_pedido': (INICIO + paso * i).strftime("%Y-%m-%d %H:%M:%S"), 'items': items,
+               'total_pedido': a_pesos(total)}
+
+
+def generar(directorio, productos=1000, clientes=500, pedidos=10000, items=3, semilla=42, sqlite=None):
+    """Escribe los datos en ``directorio`` (y, con ``sqlite``, los importa a esa base). Devuelve las cantidades."""
+    rng = random.Random(semilla)
+    filas_productos = productos_sinteticos(productos, rng)
+    filas_clientes = clientes_sinteticos(clientes)
+    PersistenciaCSV.escribir_datos(os.path.join(directorio, 'productos.csv'), filas_productos, CAMPOS_PRODUCTO)
+    PersistenciaCSV.escribir_datos(os.path.join(directorio, 'clientes.csv'), filas_clientes, CAMPOS_CLIENTE)
+    PersistenciaJSON.escribir_pedidos(os.path.join(directorio, 'pedidos.json'),
+                                      pedidos_sinteticos(pedidos, items, filas_productos, filas_clientes, rng))
+    if sqlite:
+        from persistencia_sqlite import PersistenciaSQLite
+        destino = PersistenciaSQLite(sqlite)
+        try:
+            destino.importar(PersistenciaArchivos(directorio))
+        finally:
+            destino.cerrar()
+    return {'productos': productos, 'clientes': clientes, 'pedidos': pedidos, 'items_por_pedido': items}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('directorio')
+    parser.add_argument('--productos', type=int, default=1000)
+    parser.add_argument('--clientes', type=int, default=500)
+    parser.add_argument('--pedidos', type=int, default=10000)
+    parser.add_argument('--items', type=int, default=3, help='Items por pedido')
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--sqlite', help='Además, importar los datos a esta base SQLite')
+    args = parser.parse_args(argv)
+    os.makedirs(args.directorio, exist_ok=True)
+    print(generar(args.directorio, args.productos, args.clientes, args.pedidos, args.items, args.semilla, args.sqlite))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
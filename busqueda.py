@@ -0,0 +1,165 @@
+# busqueda.py
+import threading
+import unicodedata
+from collections import OrderedDict
+from heapq import nlargest
+
+# Lecturas recientes del escáner que se recuerdan ya resueltas
+ESCANEOS_RECIENTES = 256
+
+
+def normalizar(texto):
+    """Minúsculas y sin acentos: 'Azúcar Morena' -> 'azucar morena'."""
+    descompuesto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).casefold()
+
+
+def normalizar_codigo(codigo):
+    """Código de barras o SKU comparable: sin los espacios de los extremos.
+
+    Un SKU se compara tal cual ('AB-12', 'AB12' y 'ab12' son códigos distintos). Solo los códigos
+    numéricos (EAN-8/13, UPC-A) se completan con ceros a 14 dígitos (GTIN-14):
+    '036000291452' y '0036000291452' son el mismo producto.
+    """
+    codigo = str(codigo).strip()
+    if codigo.isascii() and codigo.isdigit() and len(codigo) <= 14:
+        return codigo.zfill(14)
+    return codigo
+
+
+def trigramas(texto):
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class IndiceBusqueda:
+    """Índice invertido de trigramas sobre los nombres de productos.
+
+    Se actualiza incrementalmente (``agregar``/``quitar``) y permite buscar por subcadena sin
+    recorrer todo el catálogo, ignorando mayúsculas y acentos, y sugerir nombres parecidos.
+    """
+
+    def __init__(self, productos=None):
+        self._nombres = {}      # id -> nombre normalizado
+        self._tamanos = {}      # id -> cantidad de trigramas distintos del nombre
+        self._postings = {}     # trigrama -> set de ids
+        for producto in (productos or {}).values():
+            self.agregar(producto.id_producto, producto.nombre)
+
+    def __len__(self):
+        return len(self._nombres)
+
+    def agregar(self, id_producto, nombre):
+        if id_producto in self._nombres:
+            self.quitar(id_producto)
+        normalizado = normalizar(nombre)
+        self._nombres[id_producto] = normalizado
+        tris = trigramas(normalizado)
+        self._tamanos[id_producto] = len(tris)
+        for tri in tris:
+            self._postings.setdefault(tri, set()).add(id_producto)
+
+    def quitar(self, id_producto):
+        normalizado = self._nombres.pop(id_producto, None)
+        if normalizado is None:
+            return
+        del self._tamanos[id_producto]
+        for tri in trigramas(normalizado):
+            ids = self._postings.get(tri)
+            if ids is not None:
+                ids.discard(id_producto)
+                if not ids:
+                    del self._postings[tri]
+
+    def buscar(self, termino):
+        """IDs (ordenados) cuyo nombre contiene ``termino``."""
+        termino = normalizar(termino)
+        if not termino:
+            return sorted(self._nombres)
+        if len(termino) >= 3:
+            listas = sorted((self._postings.get(tri, set()) for tri in trigramas(termino)), key=len)
+            candidatos = set(listas[0]).intersection(*listas[1:])
+        else:
+            # Términos de 1-2 letras: unir los trigramas que los contienen (hay muchos menos trigramas que productos)
+            candidatos = set()
+            for tri, ids in self._postings.items():
+                if termino in tri:
+                    candidatos |= ids
+            candidatos.update(i for i, n in self._nombres.items() if len(n) < 3 and termino in n)
+        # Los trigramas pueden coincidir fuera de orden: confirmar la subcadena
+        return sorted(i for i in candidatos if termino in self._nombres[i])
+
+    def sugerir(self, termino, limite=10, similitud_minima=0.2):
+        """IDs de los nombres más parecidos a ``termino`` (similitud de trigramas), de mayor a menor."""
+        tris = trigramas(normalizar(termino))
+        if not tris:
+            return []
+        coincidencias = {}
+        for tri in tris:
+            for id_producto in self._postings.get(tri, ()):
+                coincidencias[id_producto] = coincidencias.get(id_producto, 0) + 1
+
+        # Índice de Jaccard entre los trigramas del término y los del nombre
+        puntajes = {id_producto: comunes / (len(tris) + self._tamanos[id_producto] - comunes)
+                    for id_producto, comunes in coincidencias.items()}
+        mejores = nlargest(limite, puntajes.items(), key=lambda item: (item[1], -item[0]))
+        return [id_producto for id_producto, puntaje in mejores if puntaje >= similitud_minima]
+
+
+class IndiceCodigos:
+    """Código de barras/SKU -> ID de producto (clave alternativa, única por producto).
+
+    Se actualiza con ``agregar``/``quitar`` como ``IndiceBusqueda``. Además recuerda las últimas
+    ``ESCANEOS_RECIENTES`` lecturas tal como llegan del escáner (LRU), así un artículo que se pasa
+    varias veces no se vuelve a normalizar; cualquier cambio en el índice vacía ese recuerdo.
+    """
+
+    def __init__(self, productos=None, recientes=ESCANEOS_RECIENTES):
+        self._ids = {}          # código normalizado -> id
+        self._codigos = {}      # id -> código normalizado
+        self._recientes = OrderedDict()  # lectura del escáner -> id
+        self._capacidad = recientes
+        self._cerrojo = threading.Lock()  # las consultas del servicio llegan desde varios hilos
+        self._generacion = 0  # avanza con cada cambio: una búsqueda en curso no guarda un resultado viejo
+        for producto in (productos or {}).values():
+            self.agregar(producto.id_producto, producto.codigo)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def agregar(self, id_producto, codigo):
+        """Asigna ``codigo`` al producto (reemplaza el anterior; vacío o None lo quita)."""
+        self.quitar(id_producto)
+        codigo = normalizar_codigo(codigo) if codigo else ''
+        if codigo:
+            self._ids[codigo] = id_producto
+            self._codigos[id_producto] = codigo
+
+    def quitar(self, id_producto):
+        codigo = self._codigos.pop(id_producto, None)
+        if codigo is not None and self._ids.get(codigo) == id_producto:
+            del self._ids[codigo]
+        with self._cerrojo:
+            self._recientes.clear()
+            self._generacion += 1
+
+    def dueno(self, codigo):
+        """ID del producto que tiene ``codigo`` o None (para validar que no se repita)."""
+        return self._ids.get(normalizar_codigo(codigo)) if codigo else None
+
+    def buscar(self, lectura):
+        """ID del producto escaneado o None."""
+        with self._cerrojo:
+            id_producto = self._recientes.get(lectura)
+            if id_producto is not None:
+                self._recientes.move_to_end(lectura)
+                return id_producto
+            generacion = self._generacion
+        id_producto = self.dueno(lectura)
+        if id_producto is not None:
+            with self._cerrojo:
+                if generacion != self._generacion:
+                    return id_producto
+                self._recientes[lectura] = id_producto
+                if len(self._recientes) > self._capacidad:
+                    self._recientes.popitem(last=False)
+        return id_producto
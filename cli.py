@@ -0,0 +1,337 @@
+# cli.py
+"""Comandos de administración de la tienda (sin menú interactivo).
+
+Uso: python cli.py <comando> [opciones]
+
+Pensados para scripts y tareas programadas: sin pausas ni preguntas; con ``--json`` la salida es
+JSON en stdout. Código de salida: 0 si todo salió bien, 1 si la operación se rechazó (producto o
+cliente inexistente, stock insuficiente, pedidos rechazados) y 2 si la entrada es inválida.
+"""
+import argparse
+import csv
+import json
+import sys
+from datetime import datetime
+
+from rich.console import Console
+
+from dinero import formatear
+from persistencia import PersistenciaArchivos, PersistenciaJSON, crear_almacen
+
+console = Console()
+
+EXITO, RECHAZADO, ENTRADA_INVALIDA = 0, 1, 2
+
+
+def _tienda(args):
+    from gestion import Tienda
+    return Tienda(crear_almacen(args.almacen, args.ruta))
+
+
+def _imprimir_json(datos):
+    # print y no console.print: sin colores ni cortes de línea, para que otro programa lo lea
+    print(json.dumps(datos, ensure_ascii=False, indent=2))
+
+
+def _leer_json(ruta):
+    """Contenido JSON de ``ruta`` ('-' = entrada estándar)."""
+    if ruta == '-':
+        return json.load(sys.stdin)
+    with open(ruta, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def _error(args, mensaje, codigo):
+    if getattr(args, 'json', False):
+        _imprimir_json({'error': mensaje})
+    else:
+        console.print(f"[bold red]✗ Error:[/bold red] {mensaje}", style="red")
+    return codigo
+
+
+def _error_fechas(args):
+    """Mensaje de error si --desde/--hasta no son fechas YYYY-MM-DD; None si están bien."""
+    for opcion in ('desde', 'hasta'):
+        valor = getattr(args, opcion)
+        if valor is None:
+            continue
+        try:
+            datetime.strptime(valor, '%Y-%m-%d')
+        except ValueError:
+            return f"--{opcion} debe ser una fecha YYYY-MM-DD (se recibió {valor!r})"
+    return None
+
+
+def comando_migrar_sqlite(args):
+    from persistencia_sqlite import PersistenciaSQLite
+    destino = PersistenciaSQLite(args.destino)
+    try:
+        totales = destino.importar(PersistenciaArchivos(args.origen))
+    except ValueError as error:
+        return _error(args, str(error), ENTRADA_INVALIDA)
+    finally:
+        destino.cerrar()
+    console.print(f"[bold green]✔ Migración completa a {args.destino}:[/bold green] "
+                  f"{totales['productos']} productos, {totales['clientes']} clientes, {totales['pedidos']} pedidos.")
+    return 0
+
+
+def comando_reconstruir_agregados(args):
+    agregados = _tienda(args).reconstruir_agregados()
+    if args.json:
+        _imprimir_json({'pedidos': agregados.pedidos, 'meses': len(agregados.por_mes), 'total': agregados.total})
+        return EXITO
+    console.print(f"[bold green]✔ Acumulados reconstruidos:[/bold green] {agregados.pedidos} pedidos, "
+                  f"{len(agregados.por_mes)} meses, total vendido $ {agregados.total:.2f}.")
+    return 0
+
+
+def comando_convertir_pedidos(args):
+    cantidad = PersistenciaArchivos(args.directorio).convertir_pedidos(args.formato)
+    destino = 'pedidos.bin' if args.formato == 'binario' else 'pedidos.json'
+    console.print(f"[bold green]✔ {cantidad} pedidos guardados en {destino}[/bold green] (el snapshot anterior queda como .bak).")
+    return 0
+
+
+def _leer_solicitudes(ruta):
+    # Lista JSON o JSON Lines (un pedido por línea), según el contenido
+    with open(ruta, 'r', encoding='utf-8') as file:
+        texto = file.read()
+    if texto.lstrip().startswith('['):
+        return json.loads(texto)
+    return [json.loads(linea) for linea in texto.splitlines() if linea.strip()]
+
+
+def comando_importar_pedidos(args):
+    try:
+        solicitudes = _leer_solicitudes(args.archivo)
+    except (OSError, json.JSONDecodeError) as error:
+        return _error(args, f"No se pudo leer {args.archivo}: {error}", ENTRADA_INVALIDA)
+    tienda = _tienda(args)
+    try:
+        resultado = tienda.crear_pedidos_bulk(solicitudes, atomico=args.atomico)
+    finally:
+        tienda.cerrar()
+
+    if args.rechazos and resultado.rechazados:
+        with open(args.rechazos, 'w', encoding='utf-8') as file:
+            json.dump(resultado.rechazados, file, ensure_ascii=False, indent=2)
+    if args.json:
+        _imprimir_json(resultado.to_dict())
+    else:
+        console.print(f"[bold green]✔ {len(resultado.creados)} pedidos creados[/bold green] de {len(solicitudes)} "
+                      f"en {resultado.segundos:.2f} s ({resultado.pedidos_por_segundo:.0f} pedidos/s).")
+        if resultado.rechazados:
+            console.print(f"[bold yellow]⚠ {len(resultado.rechazados)} pedidos rechazados.[/bold yellow]")
+            for rechazo in resultado.rechazados[:args.mostrar]:
+                console.print(f"  #{rechazo['posicion']} (cliente {rechazo['id_cliente']}): {rechazo['motivo']}")
+            if args.rechazos:
+                console.print(f"Detalle de los rechazos en {args.rechazos}")
+    return RECHAZADO if resultado.rechazados else EXITO
+
+
+def comando_productos(args):
+    tienda = _tienda(args)
+    if args.codigo:
+        producto = tienda.buscar_por_codigo(args.codigo)
+        productos = [producto] if producto else []
+    else:
+        productos = (tienda.buscar_productos_por_nombre(args.buscar) if args.buscar
+                     else list(tienda.productos.values()))
+    if args.json:
+        _imprimir_json([p.to_dict() for p in productos])
+        return EXITO
+    from rich.table import Table
+    tabla = Table(show_header=True, header_style="bold green")
+    tabla.add_column("ID", justify="right")
+    tabla.add_column("Nombre")
+    tabla.add_column("Precio", justify="right")
+    tabla.add_column("Stock", justify="right")
+    tabla.add_column("Código")
+    for p in productos:
+        tabla.add_row(str(p.id_producto), p.nombre, f"$ {formatear(p.precio_centavos)}", str(p.stock), p.codigo or "")
+    console.print(tabla)
+    return EXITO
+
+
+def comando_crear_pedido(args):
+    from gestion import capturar_mensaje, leer_cantidades
+    try:
+        datos = _leer_json(args.archivo)
+        id_cliente, productos = int(datos['id_cliente']), dict(datos['productos'])
+    except (OSError, json.JSONDecodeError) as error:
+        return _error(args, f"No se pudo leer {args.archivo}: {error}", ENTRADA_INVALIDA)
+    except (KeyError, TypeError, ValueError):
+        return _error(args, "Se espera {\"id_cliente\": N, \"productos\": {\"id_producto\": cantidad}}",
+                      ENTRADA_INVALIDA)
+    try:
+        leer_cantidades(productos)  # cantidades enteras y positivas
+    except ValueError as error:
+        return _error(args, str(error), ENTRADA_INVALIDA)
+    tienda = _tienda(args)
+    try:
+        pedido, mensaje = capturar_mensaje(tienda.crear_pedido, id_cliente, productos)
+    finally:
+        tienda.cerrar()
+    if pedido is None:
+        return _error(args, mensaje or "No se pudo crear el pedido.", RECHAZADO)
+    if args.json:
+        _imprimir_json(pedido)
+    else:
+        console.print(f"[bold green]✔ Pedido {pedido['id_pedido']} creado.[/bold green] "
+                      f"Total: $ {pedido['total_pedido']:.2f}")
+    return EXITO
+
+
+def comando_reporte(args):
+    if mensaje := _error_fechas(args):
+        return _error(args, mensaje, ENTRADA_INVALIDA)
+    tienda = _tienda(args)
+    if args.desde or args.hasta:
+        from agregados import AgregadosVentas
+        agregados = AgregadosVentas.desde_pedidos(tienda.iterar_pedidos(args.desde, args.hasta))
+    else:
+        agregados = tienda.agregados  # acumulados: no recorre los pedidos
+    resumen = agregados.resumen(args.limite)
+    if args.json:
+        _imprimir_json(resumen)
+        return EXITO
+    console.print(f"[bold]Pedidos:[/bold] {resumen['pedidos']}   [bold]Clientes distintos:[/bold] "
+                  f"{resumen['clientes_distintos']}   [bold]Total vendido:[/bold] $ {resumen['total']:.2f}")
+    for mes in resumen['ventas_por_mes']:
+        console.print(f"  {mes['mes']}: {mes['pedidos']} pedidos, $ {mes['total']:.2f}")
+    return EXITO
+
+
+def comando_exportar(args):
+    if mensaje := _error_fechas(args):
+        return _error(args, mensaje, ENTRADA_INVALIDA)
+    tienda = _tienda(args)
+    pedidos = tienda.iterar_pedidos(args.desde, args.hasta, args.cliente)
+    try:
+        # En primer plano: el comando termina cuando el archivo está completo
+        if args.formato == 'xlsx':
+            cantidad = PersistenciaJSON.exportar_pedidos_excel(args.archivo, pedidos)
+        else:
+            cantidad = PersistenciaJSON.exportar_pedidos_pdf(args.archivo, pedidos, solo_resumen=args.solo_resumen)
+    except OSError as error:
+        return _error(args, f"No se pudo escribir {args.archivo}: {error}", ENTRADA_INVALIDA)
+    if args.json:
+        _imprimir_json({'archivo': args.archivo, 'pedidos': cantidad})
+    else:
+        console.print(f"[bold green]✔ {cantidad} pedidos exportados a {args.archivo}[/bold green]")
+    return EXITO
+
+
+def comando_importar_productos(args):
+    from gestion import capturar_mensaje
+    try:
+        with open(args.archivo, 'r', newline='', encoding='utf-8') as file:
+            filas = list(csv.DictReader(file))
+        cambios = [(int(f['id_producto']) if f.get('id_producto') else None, f.get('nombre') or None,
+                    float(f['precio']) if f.get('precio') else None, int(f['stock']) if f.get('stock') else None,
+                    f.get('codigo') or None)
+                   for f in filas]
+    except OSError as error:
+        return _error(args, f"No se pudo leer {args.archivo}: {error}", ENTRADA_INVALIDA)
+    except ValueError as error:
+        return _error(args, f"Fila inválida en {args.archivo}: {error}", ENTRADA_INVALIDA)
+
+    tienda = _tienda(args)
+    actualizados = creados = 0
+    # Un solo guardado al salir del bloque, aunque el archivo tenga miles de filas
+    with tienda.batch():
+        for id_producto, nombre, precio, stock, codigo in cambios:
+            if id_producto in tienda.productos:
+                actualizado, _ = capturar_mensaje(tienda.actualizar_producto, id_producto, nombre, precio, stock, codigo)
+                actualizados += bool(actualizado)
+            elif id_producto is None and nombre and precio is not None:
+                producto, _ = capturar_mensaje(tienda.crear_producto, nombre, precio, stock or 0, codigo)
+                creados += producto is not None
+    tienda.cerrar()
+
+    resultado = {'actualizados': actualizados, 'creados': creados, 'omitidos': len(cambios) - actualizados - creados}
+    if args.json:
+        _imprimir_json(resultado)
+    else:
+        console.print(f"[bold green]✔ {actualizados} productos actualizados y {creados} creados[/bold green] "
+                      f"({resultado['omitidos']} filas omitidas).")
+    return EXITO
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Administración de Gestión de Tienda")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    # Opciones comunes de los comandos que abren la tienda
+    almacen = argparse.ArgumentParser(add_help=False)
+    almacen.add_argument("--almacen", choices=["archivos", "sqlite"], default=None,
+                         help="Tipo de almacenamiento (por defecto TIENDA_ALMACEN o 'archivos')")
+    almacen.add_argument("--ruta", default=None, help="Directorio de datos o archivo .db (por defecto TIENDA_RUTA)")
+    almacen.add_argument("--json", action="store_true", help="Salida en JSON (para scripts)")
+
+    migrar = subparsers.add_parser("migrar-sqlite", help="Importa los CSV/JSON actuales a una base SQLite")
+    migrar.add_argument("--origen", default=".", help="Directorio con productos.csv, clientes.csv y pedidos.json")
+    migrar.add_argument("--destino", default="tienda.db", help="Archivo SQLite a crear o completar")
+    migrar.set_defaults(funcion=comando_migrar_sqlite)
+
+    reconstruir = subparsers.add_parser("reconstruir-agregados", parents=[almacen],
+                                        help="Recalcula los acumulados de ventas desde todos los pedidos")
+    reconstruir.set_defaults(funcion=comando_reconstruir_agregados)
+
+    convertir = subparsers.add_parser("convertir-pedidos",
+                                      help="Convierte el historial de pedidos entre JSON y el snapshot binario")
+    convertir.add_argument("--formato", choices=["binario", "json"], required=True, help="Formato de destino")
+    convertir.add_argument("--directorio", default=".", help="Directorio de datos")
+    convertir.set_defaults(funcion=comando_convertir_pedidos)
+
+    importar = subparsers.add_parser("importar-pedidos", parents=[almacen],
+                                     help="Crea en lote los pedidos de un archivo JSON o JSON Lines (p. ej. ventas sin conexión)")
+    importar.add_argument("archivo", help="Pedidos: {'id_cliente', 'productos': {id: cantidad} o 'items', 'fecha_pedido'?}")
+    importar.add_argument("--atomico", action="store_true",
+                          help="Si algún pedido es inválido no se crea ninguno (por defecto se crean los válidos)")
+    importar.add_argument("--rechazos", help="Archivo JSON donde guardar los pedidos rechazados y su motivo")
+    importar.add_argument("--mostrar", type=int, default=20, help="Rechazos a listar en pantalla")
+    importar.set_defaults(funcion=comando_importar_pedidos)
+
+    productos = subparsers.add_parser("productos", parents=[almacen], help="Lista los productos o busca por nombre")
+    productos.add_argument("--buscar", help="Nombre o parte del nombre")
+    productos.add_argument("--codigo", help="Código de barras o SKU exacto")
+    productos.set_defaults(funcion=comando_productos)
+
+    pedido = subparsers.add_parser("crear-pedido", parents=[almacen], help="Crea un pedido desde un archivo JSON")
+    pedido.add_argument("archivo", help='{"id_cliente": N, "productos": {"id_producto": cantidad}}; "-" = stdin')
+    pedido.set_defaults(funcion=comando_crear_pedido)
+
+    reporte = subparsers.add_parser("reporte", parents=[almacen], help="Resumen de ventas, por mes y los más vendidos")
+    reporte.add_argument("--desde", help="Fecha desde (YYYY-MM-DD)")
+    reporte.add_argument("--hasta", help="Fecha hasta (YYYY-MM-DD)")
+    reporte.add_argument("--limite", type=int, default=10, help="Cantidad de productos y clientes en los rankings")
+    reporte.set_defaults(funcion=comando_reporte)
+
+    exportar = subparsers.add_parser("exportar", parents=[almacen], help="Exporta los pedidos a Excel o PDF")
+    exportar.add_argument("formato", choices=["xlsx", "pdf"])
+    exportar.add_argument("archivo", help="Archivo de destino")
+    exportar.add_argument("--desde", help="Fecha desde (YYYY-MM-DD)")
+    exportar.add_argument("--hasta", help="Fecha hasta (YYYY-MM-DD)")
+    exportar.add_argument("--cliente", type=int, help="Solo los pedidos de este cliente")
+    exportar.add_argument("--solo-resumen", action="store_true", help="PDF: solo totales por mes y por cliente")
+    exportar.set_defaults(funcion=comando_exportar)
+
+    importar_productos = subparsers.add_parser(
+        "importar-productos", parents=[almacen],
+        help="Actualiza o da de alta productos desde un CSV (id_producto, nombre, precio, stock, codigo)")
+    importar_productos.add_argument("archivo", help="CSV con encabezado; columnas vacías = no cambiar, "
+                                                    "id_producto vacío = producto nuevo")
+    importar_productos.set_defaults(funcion=comando_importar_productos)
+
+    return parser
+
+
+def main(argv=None):
+    args = crear_parser().parse_args(argv)
+    return args.funcion(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+# dinero.py
+"""Montos en centavos enteros.
+
+Precios, subtotales y totales se calculan y acumulan como ``int`` de centavos, así las sumas
+son exactas y no dependen del orden ni de redondeos intermedios. En JSON y CSV se siguen
+guardando como número con decimales (p. ej. 12000.0) para no cambiar el formato de los archivos.
+"""
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+
+def a_centavos(valor):
+    """Convierte pesos (int, float, str o Decimal) a centavos enteros, redondeando al centavo más cercano."""
+    if isinstance(valor, int) and not isinstance(valor, bool):
+        return valor * 100
+    try:
+        # str() evita arrastrar el error binario del float (0.285 -> '0.285', no 0.28499...)
+        pesos = Decimal(str(valor).strip())
+    except InvalidOperation:
+        raise ValueError(f"Monto inválido: {valor!r}") from None
+    if not pesos.is_finite():
+        raise ValueError(f"Monto inválido: {valor!r}")
+    return int((pesos * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def a_pesos(centavos):
+    """Centavos -> float con dos decimales, para JSON/CSV y cálculos de solo lectura."""
+    return centavos / 100
+
+
+def formatear(centavos):
+    """Texto con dos decimales sin pasar por float: 123456 -> '1234.56'."""
+    signo = '-' if centavos < 0 else ''
+    pesos, resto = divmod(abs(centavos), 100)
+    return f"{signo}{pesos}.{resto:02d}"
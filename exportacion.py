@@ -0,0 +1,179 @@
+# exportacion.py
+import itertools
+import os
+import tempfile
+import threading
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from persistencia import PersistenciaJSON
+
+PENDIENTE = 'pendiente'
+EN_CURSO = 'en curso'
+TERMINADO = 'terminado'
+CANCELADO = 'cancelado'
+ERROR = 'error'
+
+
+class ExportacionCancelada(Exception):
+    pass
+
+
+class TrabajoExportacion:
+    """Estado de una exportación encolada (se consulta desde el hilo de la interfaz)."""
+
+    def __init__(self, id_trabajo, tipo, archivo, total_pedidos=None):
+        self.id_trabajo = id_trabajo
+        self.tipo = tipo
+        self.archivo = archivo
+        # None si no se conoce hasta terminar (pedidos filtrados que se recorren en el hilo de trabajo)
+        self.total_pedidos = total_pedidos
+        self.estado = PENDIENTE
+        self.hechos = 0
+        self.total = total_pedidos
+        self.resultado = None
+        self.error = None
+        self.creado = datetime.now()
+        self.terminado = None
+        self.notificado = False
+        self.cancelacion = threading.Event()
+        self.futuro = None
+
+    @property
+    def porcentaje(self):
+        return 100.0 * self.hechos / self.total if self.total else 0.0
+
+    def __str__(self):
+        return f"Trabajo {self.id_trabajo} | {self.tipo.upper()} {self.archivo} | {self.estado} ({self.porcentaje:.0f}%)"
+
+
+class ColaExportacion:
+    """Cola de exportaciones Excel/PDF que corren en un pool de hilos.
+
+    Cada trabajo exporta los pedidos que había al encolarlo: los creados después no cambian el
+    reporte y la caja puede seguir vendiendo mientras se genera. El archivo se escribe en un
+    temporal y solo reemplaza al destino si la exportación termina bien.
+    """
+
+    def __init__(self, max_hilos=1):
+        self._pool = ThreadPoolExecutor(max_workers=max_hilos, thread_name_prefix='exportacion')
+        self._trabajos = {}
+        self._ids = itertools.count(1)
+        self._cerrojo = threading.Lock()
+
+    def encolar(self, tipo, archivo, pedidos, **opciones):
+        """Encola una exportación ('excel' o 'pdf') y devuelve el ID del trabajo.
+
+        ``pedidos`` es una secuencia que solo crece al final (se exportan los que tiene ahora) o un
+        iterable que ya es una instantánea (``Tienda.instantanea_pedidos``): acá no se copia nada.
+        """
+        if tipo not in ('excel', 'pdf'):
+            raise ValueError(f"Tipo de exportación desconocido: {tipo}")
+        total = None
+        if isinstance(pedidos, Sequence):
+            total = len(pedidos)
+            pedidos = itertools.islice(pedidos, total)
+        with self._cerrojo:
+            trabajo = TrabajoExportacion(next(self._ids), tipo, archivo, total)
+            self._trabajos[trabajo.id_trabajo] = trabajo
+        trabajo.futuro = self._pool.submit(self._ejecutar, trabajo, pedidos, opciones)
+        return trabajo.id_trabajo
+
+    def estado(self, id_trabajo):
+        return self._trabajos.get(id_trabajo)
+
+    def trabajos(self):
+        with self._cerrojo:
+            return list(self._trabajos.values())
+
+    def cancelar(self, id_trabajo):
+        """Cancela un trabajo pendiente o en curso. Devuelve False si ya había terminado."""
+        trabajo = self._trabajos.get(id_trabajo)
+        if trabajo is None or trabajo.estado in (TERMINADO, ERROR, CANCELADO):
+            return False
+        trabajo.cancelacion.set()
+        if trabajo.futuro.cancel():
+            self._finalizar(trabajo, CANCELADO)
+        return True
+
+    def notificaciones(self):
+        """Trabajos finalizados que todavía no se mostraron al usuario."""
+        avisos = []
+        for trabajo in self.trabajos():
+            if trabajo.terminado is not None and not trabajo.notificado:
+                trabajo.notificado = True
+                avisos.append(trabajo)
+        return avisos
+
+    def en_curso(self):
+        return [t for t in self.trabajos() if t.estado in (PENDIENTE, EN_CURSO)]
+
+    def cerrar(self, esperar=True):
+        self._pool.shutdown(wait=esperar, cancel_futures=not esperar)
+
+    # --------------------------
+    # Hilo de trabajo
+    # --------------------------
+
+    @staticmethod
+    def _finalizar(trabajo, estado):
+        trabajo.estado = estado
+        trabajo.terminado = datetime.now()
+
+    def _vigilar(self, trabajo, pedidos):
+        leidos = 0
+        for pedido in pedidos:
+            if trabajo.cancelacion.is_set():
+                raise ExportacionCancelada()
+            yield pedido
+            leidos += 1
+            trabajo.hechos += 1
+        if trabajo.total_pedidos is None:
+            trabajo.total_pedidos = leidos
+
+    @staticmethod
+    def _temporal(archivo):
+        # Junto al destino (mismo disco, para os.replace) y con su extensión
+        base, extension = os.path.splitext(os.path.basename(archivo))
+        fd, temporal = tempfile.mkstemp(prefix=f'.{base}.', suffix=f'.tmp{extension}',
+                                        dir=os.path.dirname(os.path.abspath(archivo)))
+        os.close(fd)
+        return temporal
+
+    @staticmethod
+    def _descartar(temporal):
+        if temporal is not None:
+            try:
+                os.remove(temporal)
+            except FileNotFoundError:
+                pass
+
+    def _ejecutar(self, trabajo, pedidos, opciones):
+        trabajo.estado = EN_CURSO
+        temporal = None
+        try:
+            temporal = self._temporal(trabajo.archivo)
+            if trabajo.tipo == 'excel':
+                trabajo.resultado = PersistenciaJSON.exportar_pedidos_excel(
+                    temporal, self._vigilar(trabajo, pedidos), **opciones)
+            else:
+                def progreso(hechos, total):
+                    if trabajo.cancelacion.is_set():
+                        raise ExportacionCancelada()
+                    # Segunda etapa: dibujar los bloques del PDF
+                    trabajo.hechos, trabajo.total = hechos, total
+
+                trabajo.resultado = PersistenciaJSON.exportar_pedidos_pdf(
+                    temporal, self._vigilar(trabajo, pedidos), progreso=progreso, **opciones)
+            os.replace(temporal, trabajo.archivo)
+        except ExportacionCancelada:
+            self._descartar(temporal)
+            self._finalizar(trabajo, CANCELADO)
+        except Exception as e:
+            self._descartar(temporal)
+            trabajo.error = e
+            self._finalizar(trabajo, ERROR)
+        else:
+            trabajo.total = trabajo.hechos = trabajo.total or trabajo.hechos
+            self._finalizar(trabajo, TERMINADO)
@@ -1,26 +1,75 @@
+import os
+import re
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
 from builtins import ValueError
+from contextlib import contextmanager
 from datetime import datetime
-from persistencia import PersistenciaCSV, PersistenciaJSON
+from itertools import islice
+from agregados import AgregadosVentas
+from busqueda import IndiceBusqueda, IndiceCodigos
+from dinero import a_centavos, a_pesos, formatear
+from lista_pedidos import ListaPedidos, marca_tiempo
+from metricas import registro
+from persistencia import ConflictoVersion, PersistenciaJSON, crear_almacen
 from rich.console import Console
 
 console = Console()
 
+# Pedidos acumulados en el diario antes de compactarlos en el snapshot
+COMPACTAR_CADA = 500
+# Intentos de confirmar un pedido cuando otra terminal cambió el stock en el medio (modo multiterminal)
+REINTENTOS_CONFLICTO = 5
+
+
+def capturar_mensaje(funcion, *args, **kwargs):
+    """Llama a ``funcion`` sin mostrar nada en consola; devuelve (resultado, último mensaje o None).
+
+    Las operaciones de la tienda informan los errores por consola: así los usan la API y la CLI.
+    """
+    with console.capture() as captura:
+        resultado = funcion(*args, **kwargs)
+    lineas = [linea.strip() for linea in captura.get().splitlines() if linea.strip()]
+    if not lineas:
+        return resultado, None
+    # Sin el ícono ni el "Error:" del principio
+    return resultado, re.sub(r'^[✗✔✅⚠]\s*(Error:\s*)?', '', lineas[-1])
+
 
 class Producto:
-    def __init__(self, id_producto, nombre, precio, stock):  # CAMBIADO: __init__
+    __slots__ = ('id_producto', 'nombre', 'precio_centavos', 'stock', 'version', 'codigo')
+
+    def __init__(self, id_producto, nombre, precio, stock, version=0, codigo=None):  # CAMBIADO: __init__
         self.id_producto = int(id_producto)
         self.nombre = nombre
-        self.precio = float(precio)
+        self.precio = precio
         self.stock = int(stock)
+        # Versión guardada de la fila; el almacén la avanza en cada escritura (control optimista entre terminales)
+        self.version = int(version or 0)
+        # Código de barras (EAN/UPC) o SKU opcional; único entre productos (ver Tienda.buscar_por_codigo)
+        self.codigo = codigo.strip() if codigo and codigo.strip() else None
+
+    @property
+    def precio(self):
+        # El precio se guarda en centavos enteros (ver dinero.py)
+        return a_pesos(self.precio_centavos)
+
+    @precio.setter
+    def precio(self, precio):
+        self.precio_centavos = a_centavos(precio)
 
     def __str__(self):
-        return f"ID: {self.id_producto} | Nombre: {self.nombre} | Precio: ${self.precio:.2f} | Stock: {self.stock}"
+        return f"ID: {self.id_producto} | Nombre: {self.nombre} | Precio: ${formatear(self.precio_centavos)} | Stock: {self.stock}"
 
     def to_dict(self):
-        return {'id_producto': self.id_producto, 'nombre': self.nombre, 'precio': self.precio, 'stock': self.stock}
+        return {'id_producto': self.id_producto, 'nombre': self.nombre, 'precio': self.precio, 'stock': self.stock,
+                'version': self.version, 'codigo': self.codigo}
 
 
 class Cliente:
+    __slots__ = ('id_cliente', 'nombre', 'email')
+
     def __init__(self, id_cliente, nombre, email):  # CAMBIADO: __init__
         self.id_cliente = int(id_cliente)
         self.nombre = nombre
@@ -33,34 +82,418 @@ class Cliente:
         return {'id_cliente': self.id_cliente, 'nombre': self.nombre, 'email': self.email}
 
 
+class PoliticaDurabilidad:
+    """Define cuándo se vuelcan a disco los cambios pendientes de productos y clientes.
+
+    - ``cada_n``: volcar al acumular N modificaciones (1 = inmediato, el comportamiento clásico).
+    - ``intervalo``: volcar a los N segundos del primer cambio pendiente (None = sin temporizador).
+    Dentro de ``Tienda.batch()`` nunca se vuelca hasta salir del bloque.
+    """
+
+    def __init__(self, cada_n=1, intervalo=None):
+        self.cada_n = cada_n
+        self.intervalo = intervalo
+
+    @staticmethod
+    def desde_entorno():
+        """Lee TIENDA_VOLCAR_CADA y TIENDA_VOLCAR_SEGUNDOS."""
+        cada_n = int(os.environ.get('TIENDA_VOLCAR_CADA', 1))
+        intervalo = os.environ.get('TIENDA_VOLCAR_SEGUNDOS')
+        return PoliticaDurabilidad(cada_n, float(intervalo) if intervalo else None)
+
+
+class ResultadoLote:
+    """Resultado de ``Tienda.crear_pedidos_bulk``: pedidos creados, rechazados y tiempo total."""
+
+    def __init__(self, creados, rechazados, segundos):
+        self.creados = creados
+        # [{'posicion', 'id_cliente', 'motivo'}]; posicion es el orden de la solicitud en el lote
+        self.rechazados = rechazados
+        self.segundos = segundos
+
+    @property
+    def pedidos_por_segundo(self):
+        return len(self.creados) / self.segundos if self.segundos else 0.0
+
+    def to_dict(self):
+        return {'creados': len(self.creados), 'rechazados': self.rechazados,
+                'segundos': round(self.segundos, 3), 'pedidos_por_segundo': round(self.pedidos_por_segundo, 1)}
+
+
+def validar_cantidades(solicitados):
+    """ValueError si [(id_producto, cantidad)] está vacío o tiene cantidades no positivas."""
+    if not solicitados or any(cantidad <= 0 for _, cantidad in solicitados):
+        raise ValueError("El pedido no tiene productos o tiene cantidades no positivas.")
+
+
+def leer_cantidades(productos_con_cantidad):
+    """[(id_producto, cantidad)] de {id_producto: cantidad}; ValueError si algún ID o cantidad es inválido."""
+    try:
+        solicitados = [(int(i), int(c)) for i, c in productos_con_cantidad.items()]
+    except (TypeError, ValueError, AttributeError):
+        raise ValueError("ID de producto o cantidad inválida.") from None
+    validar_cantidades(solicitados)
+    return solicitados
+
+
+def _rechazo(posicion, solicitud, motivo, id_cliente=None):
+    if id_cliente is None and isinstance(solicitud, dict):
+        id_cliente = solicitud.get('id_cliente')
+    return {'posicion': posicion, 'id_cliente': id_cliente, 'motivo': str(motivo)}
+
+
 class Tienda:
-    def __init__(self):
-        self.productos = self._cargar_productos()
-        self.clientes = self._cargar_clientes()
-        # --- Corrección: garantizar que pedidos siempre sea lista ---
-        pedidos_cargados = PersistenciaJSON.leer_pedidos('pedidos.json')
-        self.pedidos = pedidos_cargados if isinstance(pedidos_cargados, list) else []
+    def __init__(self, almacen=None, politica=None):
+        # Archivos CSV/JSON o SQLite, según configuración (ver persistencia.crear_almacen)
+        self.almacen = almacen if almacen is not None else crear_almacen()
+        self.politica = politica if politica is not None else PoliticaDurabilidad.desde_entorno()
+        # IDs modificados (o eliminados) desde el último volcado, por colección
+        self._pendientes = {'productos': set(), 'clientes': set()}
+        self._cambios = 0
+        self._lotes_abiertos = 0
+        self._temporizador = None
+        # Serializa el acceso al almacenamiento (el temporizador vuelca desde otro hilo)
+        self._cerrojo = threading.RLock()
+        # Último ID asignado por entidad; nunca retrocede aunque se eliminen filas
+        self._secuencias = {'productos': 0, 'clientes': 0, 'pedidos': 0}
+        self._secuencias.update(self.almacen.cargar_secuencias())
+        self._secuencias_modificadas = False
+        # Las colecciones se cargan recién en el primer acceso (o en segundo plano con precargar())
+        self._productos = self._clientes = self._pedidos = None
+        self._cerrojos_carga = {'productos': threading.Lock(), 'clientes': threading.Lock(),
+                                'pedidos': threading.Lock()}
+        # Acumulados de ventas para reportes; se arman en el primer uso
+        self._agregados = None
+        self._agregados_modificados = False
+        self._pedidos_del_almacen = False
+
+    def _asegurar_cargado(self, coleccion):
+        if getattr(self, '_' + coleccion) is None:
+            with self._cerrojos_carga[coleccion]:
+                if getattr(self, '_' + coleccion) is None:
+                    setattr(self, coleccion, getattr(self, '_cargar_' + coleccion)())
+                    if coleccion == 'pedidos':
+                        # Los acumulados guardados corresponden a estos pedidos (no a una lista asignada a mano)
+                        self._pedidos_del_almacen = True
+
+    def precargar(self):
+        """Carga productos, clientes y pedidos en un hilo aparte; quien los use antes espera a que terminen."""
+        def cargar_todo():
+            for coleccion in ('productos', 'clientes', 'pedidos'):
+                self._asegurar_cargado(coleccion)
+
+        hilo = threading.Thread(target=cargar_todo, name='precarga', daemon=True)
+        hilo.start()
+        return hilo
+
+    @property
+    def productos(self):
+        self._asegurar_cargado('productos')
+        return self._productos
+
+    @productos.setter
+    def productos(self, productos):
+        # La colección se publica al final: otro hilo no debe verla antes que su índice
+        self.indice_busqueda = IndiceBusqueda(productos)
+        self.indice_codigos = IndiceCodigos(productos)
+        self._ajustar_secuencia('productos', productos.keys())
+        self._productos = productos
+
+    @property
+    def clientes(self):
+        self._asegurar_cargado('clientes')
+        return self._clientes
+
+    @clientes.setter
+    def clientes(self, clientes):
+        self._ajustar_secuencia('clientes', clientes.keys())
+        self._clientes = clientes
+
+    # --------------------------
+    # Secuencias de IDs
+    # --------------------------
+
+    def _ajustar_secuencia(self, entidad, ids):
+        # Datos cargados o asignados por fuera de la Tienda: la secuencia no puede quedar por detrás
+        self._secuencias[entidad] = max(self._secuencias[entidad], max(ids, default=0))
+
+    def siguiente_id(self, entidad):
+        """Reserva el próximo ID de 'productos', 'clientes' o 'pedidos' en O(1), sin reutilizar IDs borrados."""
+        getattr(self, entidad)  # la secuencia se ajusta al cargar la colección
+        with self._cerrojo:
+            if self.almacen.compartido:
+                # Con varias terminales el ID sale de la secuencia guardada, bajo el bloqueo del almacén
+                self._secuencias[entidad] = self.almacen.reservar_id(entidad, self._secuencias[entidad] + 1)
+                return self._secuencias[entidad]
+            self._secuencias[entidad] += 1
+            self._secuencias_modificadas = True
+            return self._secuencias[entidad]
+
+    # --------------------------
+    # Pedidos e índices secundarios
+    # --------------------------
+
+    @property
+    def pedidos(self):
+        self._asegurar_cargado('pedidos')
+        return self._pedidos
+
+    @pedidos.setter
+    def pedidos(self, pedidos):
+        # Guardados por columnas: ocupan mucha menos memoria que una lista de dicts
+        if not isinstance(pedidos, ListaPedidos):
+            pedidos = ListaPedidos(pedidos)
+        self._ajustar_secuencia('pedidos', (pedidos.max_id(),))
+        # Los índices se arman en la primera consulta que los use: abrir el historial no los paga
+        self._pedidos_por_cliente = self._fechas = None
+        self._agregados = None
+        self._pedidos_del_almacen = False
+        self._pedidos = pedidos
+
+    def _asegurar_indices(self):
+        self.sincronizar()
+        pedidos = self.pedidos
+        with self._cerrojo:
+            if self._fechas is not None:
+                return
+            # Índices: cliente -> posiciones en self.pedidos, y marcas de tiempo ordenadas (para bisect).
+            # Se arman desde las columnas, sin crear una vista por pedido
+            por_cliente = {}
+            fechas = []
+            for posicion, (id_cliente, ts) in enumerate(pedidos.claves_indice()):
+                por_cliente.setdefault(id_cliente, []).append(posicion)
+                if ts is not None:
+                    fechas.append((ts, posicion))
+            fechas.sort()
+            self._pedidos_por_cliente = por_cliente
+            self._fechas = fechas
+
+    def _indexar_pedido(self, posicion, pedido):
+        if self._fechas is None:
+            return  # el pedido entra cuando se armen los índices
+        self._pedidos_por_cliente.setdefault(pedido.get('id_cliente'), []).append(posicion)
+        ts = marca_tiempo(pedido.get('fecha_pedido'))
+        if ts is not None:
+            # Los pedidos llegan casi siempre en orden, así que insort inserta al final
+            insort(self._fechas, (ts, posicion))
+
+    def _incorporar_pedido(self, pedido):
+        # Agrega un pedido ya confirmado a la lista, los índices y los acumulados
+        pedidos = self.pedidos
+        with self._cerrojo:
+            pedidos.append(pedido)
+            self._indexar_pedido(len(pedidos) - 1, pedido)
+            if self._agregados is not None:
+                self._agregados.agregar(pedido)
+                self._agregados_modificados = True
+
+    # --------------------------
+    # Varias terminales
+    # --------------------------
+
+    def sincronizar(self):
+        """Incorpora los pedidos que registraron otras terminales (solo en modo multiterminal).
+
+        Los reportes y consultas de pedidos la llaman solos; el historial que todavía no se leyó
+        no hace falta sincronizarlo porque se leerá completo.
+        """
+        if not self.almacen.compartido or self._pedidos is None:
+            return
+        with self._cerrojo:
+            pedidos = self._pedidos
+            ultimo = pedidos[-1].get('id_pedido', 0) if len(pedidos) else 0
+            nuevos = self.almacen.pedidos_nuevos(ultimo)
+            if nuevos is None:
+                # Otra terminal compactó el diario: releer el historial completo
+                self.pedidos = self._cargar_pedidos()
+                self._pedidos_del_almacen = True
+                return
+            for pedido in nuevos:
+                self._incorporar_pedido(pedido)
+            if nuevos:
+                self._ajustar_secuencia('pedidos', (nuevos[-1].get('id_pedido', 0),))
+
+    def _refrescar(self, coleccion, ids):
+        """Trae del almacén la versión actual de algunos productos o clientes (modo multiterminal)."""
+        locales = getattr(self, coleccion)
+        filas = self.almacen.leer_registros(coleccion, ids)
+        with self._cerrojo:
+            for i in ids:
+                if i in self._pendientes[coleccion]:
+                    continue  # cambio local todavía sin guardar: se confirma (o choca) al volcar
+                fila = filas.get(i)
+                if fila is None:
+                    if locales.pop(i, None) is not None and coleccion == 'productos':
+                        self.indice_busqueda.quitar(i)
+                        self.indice_codigos.quitar(i)
+                elif coleccion == 'clientes':
+                    locales[i] = Cliente(**fila)
+                else:
+                    fresco = Producto(**fila)
+                    producto = locales.setdefault(i, fresco)
+                    if producto is not fresco:
+                        # Se actualiza el mismo objeto: el menú puede tener referencias a él
+                        for atributo in Producto.__slots__:
+                            setattr(producto, atributo, getattr(fresco, atributo))
+                    self.indice_busqueda.agregar(i, producto.nombre)
+                    self.indice_codigos.agregar(i, producto.codigo)
+
+    # --------------------------
+    # Acumulados de ventas
+    # --------------------------
+
+    @property
+    def agregados(self):
+        """Totales por día, mes, producto y cliente (``AgregadosVentas``) para los reportes."""
+        self.sincronizar()
+        pedidos = self.pedidos
+        with self._cerrojo:
+            if self._agregados is None:
+                self._agregados = self._cargar_agregados(pedidos)
+            return self._agregados
+
+    def _cargar_agregados(self, pedidos):
+        guardados = self.almacen.cargar_agregados() if self._pedidos_del_almacen else None
+        ultimo = pedidos[-1].get('id_pedido', 0) if pedidos else 0
+        if (not guardados or guardados.get('formato') != AgregadosVentas.FORMATO
+                or guardados.get('hasta_id_pedido', 0) > ultimo):
+            # Sin acumulados válidos: recorrer todos los pedidos una vez
+            self._agregados_modificados = True
+            return AgregadosVentas.desde_pedidos(pedidos)
+        agregados = AgregadosVentas.from_dict(guardados)
+        # Completar con los pedidos posteriores al último guardado (están al final de la lista)
+        nuevos = []
+        for pedido in reversed(pedidos):
+            if pedido.get('id_pedido', 0) <= agregados.hasta_id_pedido:
+                break
+            nuevos.append(pedido)
+        for pedido in reversed(nuevos):
+            agregados.agregar(pedido)
+        self._agregados_modificados = bool(nuevos)
+        return agregados
+
+    def _guardar_agregados(self):
+        if self._agregados is not None and self._agregados_modificados:
+            self.almacen.guardar_agregados(self._agregados.to_dict())
+            self._agregados_modificados = False
+
+    def reconstruir_agregados(self):
+        """Recalcula los acumulados desde todos los pedidos y los guarda."""
+        agregados = AgregadosVentas.desde_pedidos(self.pedidos)
+        with self._cerrojo:
+            self._agregados = agregados
+            self._agregados_modificados = True
+            self._guardar_agregados()
+        return agregados
 
-    # ... (el resto del código permanece igual)
 
     def _cargar_productos(self):
-        datos = PersistenciaCSV.leer_datos('productos.csv', ['id_producto', 'nombre', 'precio', 'stock'])
+        datos = self.almacen.cargar_productos()
         return {int(p['id_producto']): Producto(**p) for p in datos}
 
     def _cargar_clientes(self):
-        datos = PersistenciaCSV.leer_datos('clientes.csv', ['id_cliente', 'nombre', 'email'])
+        datos = self.almacen.cargar_clientes()
         return {int(c['id_cliente']): Cliente(**c) for c in datos}
 
+    def _cargar_pedidos(self):
+        return self.almacen.cargar_pedidos()
+
     def _guardar_productos(self):
-        PersistenciaCSV.escribir_datos('productos.csv', list(self.productos.values()),
-                                       ['id_producto', 'nombre', 'precio', 'stock'])
+        self.almacen.guardar_productos(self.productos)
 
     def _guardar_clientes(self):
-        PersistenciaCSV.escribir_datos('clientes.csv', list(self.clientes.values()),
-                                       ['id_cliente', 'nombre', 'email'])
+        self.almacen.guardar_clientes(self.clientes)
 
     def _guardar_pedidos(self):
-        PersistenciaJSON.escribir_pedidos('pedidos.json', self.pedidos)
+        self.almacen.guardar_pedidos(self.pedidos)
+
+    def _registrar_pedido(self, pedido, ids_modificados):
+        with self._cerrojo:
+            self.almacen.registrar_pedido(pedido, self.productos, ids_modificados)
+
+    def _compactar_si_corresponde(self):
+        # Después de agregar el pedido a la lista: el snapshot debe incluirlo antes de vaciar el diario
+        if self.almacen.pedidos_en_diario < COMPACTAR_CADA:
+            return
+        with self._cerrojo:
+            if self.almacen.compartido:
+                # Desde disco y bajo el bloqueo: incluye los pedidos de las demás terminales
+                self.almacen.compactar_pedidos()
+            else:
+                self._guardar_pedidos()
+            self._guardar_agregados()
+
+    # --------------------------
+    # Cambios pendientes y volcado por lotes
+    # --------------------------
+
+    def marcar_modificado(self, coleccion, id_):
+        """Registra que un producto/cliente cambió; se guarda según la política de durabilidad."""
+        with self._cerrojo:
+            self._pendientes[coleccion].add(id_)
+            self._cambios += 1
+            if self._lotes_abiertos:
+                return
+            if self.politica.cada_n and self._cambios >= self.politica.cada_n:
+                self.volcar()
+            elif self.politica.intervalo and self._temporizador is None:
+                self._temporizador = threading.Timer(self.politica.intervalo, self.volcar)
+                self._temporizador.daemon = True
+                self._temporizador.start()
+
+    def hay_cambios_pendientes(self):
+        return any(self._pendientes.values()) or self._secuencias_modificadas
+
+    def volcar(self):
+        """Escribe las colecciones con cambios pendientes, una sola vez cada una."""
+        with self._cerrojo:
+            if self._temporizador is not None:
+                self._temporizador.cancel()
+                self._temporizador = None
+            ids_productos, ids_clientes = self._pendientes['productos'], self._pendientes['clientes']
+            if ids_productos:
+                self._guardar_productos_modificados(ids_productos)
+                self._pendientes['productos'] = set()
+            if ids_clientes:
+                self.almacen.guardar_clientes(self.clientes, ids_clientes)
+                self._pendientes['clientes'] = set()
+            if self._secuencias_modificadas:
+                self.almacen.guardar_secuencias(self._secuencias)
+                self._secuencias_modificadas = False
+            self._cambios = 0
+
+    def _guardar_productos_modificados(self, ids):
+        while ids:
+            try:
+                self.almacen.guardar_productos(self.productos, ids)
+                return
+            except ConflictoVersion as conflicto:
+                # Otra terminal los modificó antes: vale su versión; el resto se guarda igual
+                console.print(f"[bold yellow]⚠ Productos {conflicto.ids} modificados en otra terminal; "
+                              f"se conserva esa versión.[/bold yellow]")
+                ids = ids - set(conflicto.ids)
+                self._pendientes['productos'] -= set(conflicto.ids)
+                self._refrescar('productos', conflicto.ids)
+
+    @contextmanager
+    def batch(self):
+        """Agrupa modificaciones: se guardan una sola vez al salir del bloque ``with``."""
+        with self._cerrojo:
+            self._lotes_abiertos += 1
+        try:
+            yield self
+        finally:
+            with self._cerrojo:
+                self._lotes_abiertos -= 1
+                if not self._lotes_abiertos and self.hay_cambios_pendientes():
+                    self.volcar()
+
+    def cerrar(self):
+        """Vuelca lo pendiente; llamar antes de terminar la aplicación."""
+        self.volcar()
+        with self._cerrojo:
+            self._guardar_agregados()
+        registro.volcar_configurado()
 
     def obtener_siguiente_id(self, coleccion):
         return max(coleccion.keys()) + 1 if coleccion else 1
@@ -68,108 +501,424 @@ class Tienda:
     def obtener_lista(self, coleccion):
         return list(coleccion.values())
 
-    def agregar_producto(self, nombre, precio, stock):
-        nuevo_id = self.obtener_siguiente_id(self.productos)
-        nuevo_producto = Producto(nuevo_id, nombre, precio, stock)
-        self.productos[nuevo_id] = nuevo_producto
-        self._guardar_productos()
-        console.print(f"[bold green]✔ Producto '{nombre}' agregado con ID {nuevo_id}.[/bold green]")
+    def crear_producto(self, nombre, precio, stock, codigo=None):
+        """Da de alta un producto con el próximo ID y lo devuelve (None si el código ya está en uso)."""
+        if not self._codigo_disponible(codigo):
+            return None
+        self._asegurar_cargado('productos')  # cargar antes de tomar el cerrojo
+        with self._cerrojo:
+            nuevo_id = self.siguiente_id('productos')
+            nuevo_producto = Producto(nuevo_id, nombre, precio, stock, codigo=codigo)
+            self._productos[nuevo_id] = nuevo_producto
+            self.indice_busqueda.agregar(nuevo_id, nombre)
+            self.indice_codigos.agregar(nuevo_id, nuevo_producto.codigo)
+            self.marcar_modificado('productos', nuevo_id)
+        return nuevo_producto
+
+    def agregar_producto(self, nombre, precio, stock, codigo=None):
+        nuevo_producto = self.crear_producto(nombre, precio, stock, codigo)
+        if nuevo_producto is None:
+            return
+        console.print(f"[bold green]✔ Producto '{nombre}' agregado con ID {nuevo_producto.id_producto}.[/bold green]")
+
+    def crear_cliente(self, nombre, email):
+        """Da de alta un cliente con el próximo ID y lo devuelve."""
+        self._asegurar_cargado('clientes')
+        with self._cerrojo:
+            nuevo_id = self.siguiente_id('clientes')
+            cliente = Cliente(nuevo_id, nombre, email)
+            self._clientes[nuevo_id] = cliente
+            self.marcar_modificado('clientes', nuevo_id)
+        return cliente
+
+    def actualizar_cliente(self, id_cli, nombre=None, email=None):
+        """Cambia el nombre y/o el email indicados; False si el cliente no existe."""
+        cliente = self.clientes.get(id_cli)
+        if not cliente:
+            console.print(f"[bold red]✗ Error:[/bold red] Cliente ID {id_cli} no encontrado.", style="red")
+            return False
+        with self._cerrojo:
+            if nombre is not None:
+                cliente.nombre = nombre
+            if email is not None:
+                cliente.email = email
+            self.marcar_modificado('clientes', id_cli)
+        console.print(f"[bold green]✔ Cliente ID {id_cli} actualizado.[/bold green]")
+        return True
 
-    def actualizar_producto(self, id_prod, nombre=None, precio=None, stock=None):
+    def eliminar_cliente(self, id_cli):
+        self._asegurar_cargado('clientes')
+        with self._cerrojo:
+            eliminado = self._clientes.pop(id_cli, None) is not None
+            if eliminado:
+                self.marcar_modificado('clientes', id_cli)
+        if eliminado:
+            console.print(f"[bold green]✔ Cliente ID {id_cli} eliminado.[/bold green]")
+            return True
+        console.print(f"[bold red]✗ Error:[/bold red] Cliente ID {id_cli} no encontrado.", style="red")
+        return False
+
+    def actualizar_producto(self, id_prod, nombre=None, precio=None, stock=None, codigo=None):
+        """Cambia los datos indicados; ``codigo=''`` quita el código de barras/SKU del producto."""
+        if self.almacen.compartido:
+            self._refrescar('productos', [id_prod])  # editar sobre el stock actual, no el leído al abrir
         prod = self.productos.get(id_prod)
         if not prod:
             console.print(f"[bold red]✗ Error:[/bold red] Producto ID {id_prod} no encontrado.", style="red")
             return False
-
-        if nombre is not None:
-            prod.nombre = nombre
-        if precio is not None:
-            prod.precio = float(precio)
-        if stock is not None:
-            prod.stock = int(stock)
-
-        self._guardar_productos()
+        if not self._codigo_disponible(codigo, id_prod):
+            return False
+        # Convertido antes de cambiar nada: un precio inválido no deja el producto a medias
+        precio_centavos = a_centavos(precio) if precio is not None else None
+
+        with self._cerrojo:
+            if nombre is not None:
+                prod.nombre = nombre
+                self.indice_busqueda.agregar(id_prod, nombre)
+            if precio_centavos is not None:
+                prod.precio_centavos = precio_centavos
+            if stock is not None:
+                prod.stock = int(stock)
+            if codigo is not None:
+                prod.codigo = codigo.strip() or None
+                self.indice_codigos.agregar(id_prod, prod.codigo)
+            self.marcar_modificado('productos', id_prod)
         console.print(f"[bold green]✔ Producto ID {id_prod} actualizado.[/bold green]")
         return True
 
     def eliminar_producto(self, id_prod):
-        if id_prod in self.productos:
-            del self.productos[id_prod]
-            self._guardar_productos()
+        self._asegurar_cargado('productos')
+        with self._cerrojo:
+            eliminado = self._productos.pop(id_prod, None) is not None
+            if eliminado:
+                self.indice_busqueda.quitar(id_prod)
+                self.indice_codigos.quitar(id_prod)
+                self.marcar_modificado('productos', id_prod)
+        if eliminado:
             console.print(f"[bold green]✔ Producto ID {id_prod} eliminado.[/bold green]")
             return True
         console.print(f"[bold red]✗ Error:[/bold red] Producto ID {id_prod} no encontrado.", style="red")
         return False
 
+    def _codigo_disponible(self, codigo, id_prod=None):
+        if not codigo:
+            return True
+        self._asegurar_cargado('productos')  # el índice se arma con los productos
+        dueno = self.indice_codigos.dueno(codigo.strip())
+        if dueno is not None and dueno != id_prod:
+            console.print(f"[bold red]✗ Error:[/bold red] El código {codigo.strip()} ya es del producto ID {dueno}.",
+                          style="red")
+            return False
+        return True
+
+    @registro.cronometrar('tienda.crear_pedido')
     def crear_pedido(self, id_cliente, productos_con_cantidad):
+        compartido = self.almacen.compartido
+        if compartido and id_cliente not in self.clientes:
+            self._refrescar('clientes', [id_cliente])  # puede haberse dado de alta en otra terminal
         if id_cliente not in self.clientes:
             console.print("[bold red]✗ Error:[/bold red] Cliente no encontrado.", style="red")
             return
 
-        items_pedido = []
-        costo_total = 0
+        try:
+            solicitados = leer_cantidades(productos_con_cantidad)
+        except ValueError as error:
+            console.print(f"[bold red]✗ Error:[/bold red] {error}", style="red")
+            return
 
-        for id_prod_str, cantidad in productos_con_cantidad.items():
-            try:
-                id_prod = int(id_prod_str)
-                cantidad = int(cantidad)
-            except ValueError:
-                console.print("[bold red]✗ Error:[/bold red] ID de producto o cantidad inválida.", style="red")
+        for _ in range(REINTENTOS_CONFLICTO):
+            if compartido:
+                # Stock y versiones al día: otras terminales venden los mismos productos
+                self._refrescar('productos', {id_prod for id_prod, _ in solicitados})
+            preparado = self._preparar_pedido(solicitados)
+            if preparado is None:
                 return
+            items_pedido, total_centavos, descuentos = preparado
+
+            if compartido:
+                self._asegurar_cargado('pedidos')  # la secuencia local queda al menos en el último ID del historial
+                # Provisorio: el almacén asigna el definitivo al confirmar, bajo su bloqueo
+                nuevo_id = self._secuencias['pedidos'] + 1
+            else:
+                # --- Corrección: generación segura del ID (el ID de pedido sale del propio diario al recargar) ---
+                nuevo_id = self.siguiente_id('pedidos')
+
+            nuevo_pedido = {
+                'id_pedido': nuevo_id,
+                'id_cliente': id_cliente,
+                'nombre_cliente': self.clientes[id_cliente].nombre,
+                'fecha_pedido': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                'items': items_pedido,
+                'total_pedido': a_pesos(total_centavos)
+            }
+
+            # Descuento y registro juntos bajo el cerrojo: un volcado de productos en el medio
+            # guardaría un stock que todavía no tiene su pedido en el diario
+            with self._cerrojo:
+                for id_prod, cantidad in descuentos.items():
+                    self.productos[id_prod].stock -= cantidad
+                try:
+                    self._registrar_pedido(nuevo_pedido, list(descuentos))
+                    break
+                except BaseException as error:
+                    # Si no se pudo confirmar en disco, la memoria vuelve al estado anterior
+                    for id_prod, cantidad in descuentos.items():
+                        self.productos[id_prod].stock += cantidad
+                    if not isinstance(error, ConflictoVersion):
+                        raise
+        else:
+            console.print("[bold red]✗ Error:[/bold red] El stock cambió en otra terminal. Pedido cancelado, "
+                          "intente de nuevo.", style="red")
+            return
+
+        if compartido:
+            # Trae este pedido y los que otras terminales confirmaron antes, en orden de ID
+            self._ajustar_secuencia('pedidos', (nuevo_pedido['id_pedido'],))
+            self.sincronizar()
+        else:
+            self._incorporar_pedido(nuevo_pedido)
+        self._compactar_si_corresponde()
+        registro.contar('tienda.pedidos_creados')
+        console.print(
+            f"\n[bold green]✅ Pedido {nuevo_pedido['id_pedido']} creado exitosamente.[/bold green] Total: [bold yellow]${formatear(total_centavos)}[/bold yellow]"
+        )
+        return nuevo_pedido
+
+    def _preparar_pedido(self, solicitados):
+        """Valida stock e importes de [(id_producto, cantidad)]; (items, total en centavos, descuentos) o None."""
+        try:
+            return self._armar_pedido(solicitados)
+        except ValueError as error:
+            console.print(f"[bold red]✗ Error:[/bold red] {error}", style="red")
+            return None
+
+    def _armar_pedido(self, solicitados, reservado=None):
+        """Como ``_preparar_pedido``, pero ValueError con el motivo si no se puede armar.
 
+        ``reservado`` es {id_producto: cantidad} ya comprometida por pedidos anteriores del mismo lote.
+        """
+        reservado = reservado or {}
+        items_pedido = []
+        total_centavos = 0
+        descuentos = {}
+
+        # Validar todo el pedido antes de tocar el stock
+        for id_prod, cantidad in solicitados:
             producto = self.productos.get(id_prod)
             if not producto:
-                console.print(f"[bold red]✗ Error:[/bold red] Producto ID {id_prod} no encontrado. Pedido cancelado.",
-                              style="red")
-                return
+                raise ValueError(f"Producto ID {id_prod} no encontrado. Pedido cancelado.")
 
-            if producto.stock < cantidad:
-                console.print(
-                    f"[bold red]✗ Error:[/bold red] Stock insuficiente para {producto.nombre}. Pedido cancelado.",
-                    style="red")
-                return
+            if producto.stock < reservado.get(id_prod, 0) + descuentos.get(id_prod, 0) + cantidad:
+                raise ValueError(f"Stock insuficiente para {producto.nombre}. Pedido cancelado.")
 
-            producto.stock -= cantidad
+            descuentos[id_prod] = descuentos.get(id_prod, 0) + cantidad
 
+            # Cuentas en centavos: el total es exactamente la suma de los subtotales
+            subtotal = producto.precio_centavos * cantidad
             items_pedido.append({
                 'id_producto': id_prod,
                 'nombre': producto.nombre,
                 'cantidad': cantidad,
                 'precio_unitario': producto.precio,
-                'subtotal': round(producto.precio * cantidad, 2)
+                'subtotal': a_pesos(subtotal)
             })
-            costo_total += items_pedido[-1]['subtotal']
-
-        # --- Corrección: generación segura del ID ---
-        if not self.pedidos:
-            nuevo_id = 1
+            total_centavos += subtotal
+        return items_pedido, total_centavos, descuentos
+
+    # --------------------------
+    # Pedidos en lote
+    # --------------------------
+
+    @registro.cronometrar('tienda.crear_pedidos_bulk')
+    def crear_pedidos_bulk(self, solicitudes, atomico=False):
+        """Crea muchos pedidos juntos: se validan en una pasada contra el stock y se guardan una sola vez.
+
+        Cada solicitud es un dict con 'id_cliente', los productos como en ``crear_pedido``
+        ('productos': {id_producto: cantidad}) o como items ('items': [{'id_producto', 'cantidad'}])
+        y, opcional, 'fecha_pedido' (la de la venta original). Con ``atomico`` un solo pedido
+        inválido rechaza el lote entero; si no, se crean los válidos y el resto queda en
+        ``rechazados`` con su motivo. Devuelve un ``ResultadoLote``; no escribe en consola.
+        """
+        inicio = time.perf_counter()
+        entradas = []
+        rechazados = []
+        for posicion, solicitud in enumerate(solicitudes):
+            try:
+                entradas.append((posicion, self._leer_solicitud(solicitud)))
+            except ValueError as error:
+                rechazados.append(_rechazo(posicion, solicitud, error))
+
+        compartido = self.almacen.compartido
+        creados = []
+        for _ in range(REINTENTOS_CONFLICTO):
+            if compartido:
+                # Clientes dados de alta y stock vendido en otras terminales
+                self._refrescar('clientes', {e[0] for _, e in entradas if e[0] not in self.clientes})
+                self._refrescar('productos', {i for _, e in entradas for i, _ in e[1]})
+            preparados, invalidos = self._preparar_lote(entradas)
+            if not preparados or (atomico and (invalidos or rechazados)):
+                rechazados.extend(invalidos)
+                if atomico:
+                    rechazados.extend(_rechazo(posicion, None, 'Lote cancelado por otro pedido inválido.',
+                                               pedido[0]) for posicion, pedido, *_ in preparados)
+                break
+            try:
+                creados = self._confirmar_lote(preparados)
+                rechazados.extend(invalidos)
+                break
+            except ConflictoVersion:
+                continue
         else:
-            nuevo_id = max(p['id_pedido'] for p in self.pedidos) + 1
-
-        nuevo_pedido = {
-            'id_pedido': nuevo_id,
-            'id_cliente': id_cliente,
-            'nombre_cliente': self.clientes[id_cliente].nombre,
-            'fecha_pedido': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            'items': items_pedido,
-            'total_pedido': round(costo_total, 2)
-        }
-
-        self.pedidos.append(nuevo_pedido)
-        self._guardar_productos()
-        self._guardar_pedidos()
-        console.print(
-            f"\n[bold green]✅ Pedido {nuevo_id} creado exitosamente.[/bold green] Total: [bold yellow]${costo_total:.2f}[/bold yellow]"
-        )
+            rechazados.extend(_rechazo(posicion, None, 'El stock cambió en otra terminal.', id_cliente)
+                              for posicion, (id_cliente, _, _) in entradas)
+
+        rechazados.sort(key=lambda rechazo: rechazo['posicion'])
+        registro.contar('tienda.pedidos_creados', len(creados))
+        registro.contar('tienda.pedidos_rechazados', len(rechazados))
+        return ResultadoLote(creados, rechazados, time.perf_counter() - inicio)
+
+    @staticmethod
+    def _leer_solicitud(solicitud):
+        """(id_cliente, [(id_producto, cantidad)], fecha o None) de una solicitud; ValueError si es inválida."""
+        if not isinstance(solicitud, dict):
+            raise ValueError("Solicitud inválida.")
+        try:
+            id_cliente = int(solicitud['id_cliente'])
+            if 'productos' in solicitud:
+                solicitados = [(int(i), int(c)) for i, c in solicitud['productos'].items()]
+            else:
+                solicitados = [(int(it['id_producto']), int(it['cantidad'])) for it in solicitud['items']]
+        except (KeyError, TypeError, ValueError, AttributeError):
+            raise ValueError("ID de cliente, de producto o cantidad inválida.") from None
+        validar_cantidades(solicitados)
+        fecha = solicitud.get('fecha_pedido')
+        if fecha is not None:
+            if marca_tiempo(fecha) is None:
+                raise ValueError(f"Fecha inválida: {fecha}.")
+            fecha = datetime.fromisoformat(fecha).strftime("%Y-%m-%d %H:%M:%S")
+        return id_cliente, solicitados, fecha
+
+    def _preparar_lote(self, entradas):
+        """Arma los pedidos del lote en orden, descontando del stock disponible lo que ya tomó cada uno."""
+        reservado = {}
+        preparados, invalidos = [], []
+        for posicion, (id_cliente, solicitados, fecha) in entradas:
+            try:
+                if id_cliente not in self.clientes:
+                    raise ValueError("Cliente no encontrado.")
+                items, total_centavos, descuentos = self._armar_pedido(solicitados, reservado)
+            except ValueError as error:
+                invalidos.append(_rechazo(posicion, None, error, id_cliente))
+                continue
+            for id_prod, cantidad in descuentos.items():
+                reservado[id_prod] = reservado.get(id_prod, 0) + cantidad
+            preparados.append((posicion, (id_cliente, fecha), items, total_centavos, descuentos))
+        return preparados, invalidos
+
+    def _confirmar_lote(self, preparados):
+        """Descuenta el stock y registra los pedidos en una sola escritura; devuelve los pedidos creados."""
+        compartido = self.almacen.compartido
+        ahora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if compartido:
+            self._asegurar_cargado('pedidos')  # la secuencia local queda al menos en el último ID del historial
+        nuevos = []
+        descontado = {}
+        with self._cerrojo:
+            for numero, (_, (id_cliente, fecha), items, total_centavos, descuentos) in enumerate(preparados, 1):
+                nuevos.append({
+                    'id_pedido': self._secuencias['pedidos'] + numero if compartido else self.siguiente_id('pedidos'),
+                    'id_cliente': id_cliente,
+                    'nombre_cliente': self.clientes[id_cliente].nombre,
+                    'fecha_pedido': fecha or ahora,
+                    'items': items,
+                    'total_pedido': a_pesos(total_centavos)
+                })
+                for id_prod, cantidad in descuentos.items():
+                    descontado[id_prod] = descontado.get(id_prod, 0) + cantidad
+            for id_prod, cantidad in descontado.items():
+                self.productos[id_prod].stock -= cantidad
+            try:
+                self.almacen.registrar_pedidos(nuevos, self.productos, list(descontado))
+            except BaseException:
+                for id_prod, cantidad in descontado.items():
+                    self.productos[id_prod].stock += cantidad
+                raise
+
+        if compartido:
+            self._ajustar_secuencia('pedidos', (nuevos[-1]['id_pedido'],))
+            self.sincronizar()
+        else:
+            for pedido in nuevos:
+                self._incorporar_pedido(pedido)
+        self._compactar_si_corresponde()
+        return nuevos
 
     def historial_pedidos_cliente(self, id_cliente):
         if id_cliente not in self.clientes:
             return None
-        return [p for p in self.pedidos if p['id_cliente'] == id_cliente]
+        self._asegurar_indices()
+        pedidos = self.pedidos
+        return [pedidos[i] for i in self._pedidos_por_cliente.get(id_cliente, [])]
+
+    def _posiciones_por_fecha(self, desde=None, hasta=None):
+        self._asegurar_indices()
+        inicio = marca_tiempo(desde) if desde else None
+        fin = marca_tiempo(hasta) if hasta else None
+        izq = bisect_left(self._fechas, (inicio,)) if inicio is not None else 0
+        # Hasta el último segundo del día indicado
+        der = bisect_right(self._fechas, (fin + 86399, float('inf'))) if fin is not None else len(self._fechas)
+        return (posicion for _, posicion in self._fechas[izq:der])
+
+    def filtrar_pedidos_por_fecha(self, desde=None, hasta=None):
+        """Pedidos entre dos fechas (YYYY-MM-DD, inclusive) ordenados por fecha, en O(log n + k)."""
+        return [self.pedidos[posicion] for posicion in self._posiciones_por_fecha(desde, hasta)]
+
+    def iterar_pedidos(self, desde=None, hasta=None, id_cliente=None, limite=None):
+        """Generador de pedidos filtrados por fecha y/o cliente usando los índices, sin copiar la lista.
+
+        Con ``limite`` solo se recorren los pedidos en posiciones menores (ver ``instantanea_pedidos``).
+        """
+        if id_cliente is not None:
+            self._asegurar_indices()
+            pedidos = self.pedidos
+            del_cliente = (pedidos[posicion] for posicion in self._pedidos_por_cliente.get(id_cliente, [])
+                           if limite is None or posicion < limite)
+            yield from PersistenciaJSON.filtrar_flujo(del_cliente, desde, hasta)
+        elif desde or hasta:
+            for posicion in self._posiciones_por_fecha(desde, hasta):
+                if limite is None or posicion < limite:
+                    yield self.pedidos[posicion]
+        else:
+            yield from islice(self.pedidos, limite)
 
+    def instantanea_pedidos(self, desde=None, hasta=None, id_cliente=None):
+        """Como ``iterar_pedidos``, pero fijo en los pedidos que hay ahora aunque se sigan creando otros.
+
+        No copia nada: el historial solo crece al final, así que alcanza con recordar su largo.
+        """
+        self._asegurar_cargado('pedidos')
+        with self._cerrojo:
+            limite = len(self._pedidos)
+        return self.iterar_pedidos(desde, hasta, id_cliente, limite)
+
+    def buscar_por_codigo(self, codigo):
+        """Producto con ese código de barras o SKU (tal como lo envía el escáner), o None."""
+        productos = self.productos
+        id_producto = self.indice_codigos.buscar(codigo)
+        return productos.get(id_producto) if id_producto is not None else None
+
+    @registro.cronometrar('tienda.buscar_productos')
     def buscar_productos_por_nombre(self, termino):
-        return [p for p in self.productos.values() if termino.lower() in p.nombre.lower()]
+        # Subcadena sin distinguir mayúsculas ni acentos, resuelta con el índice de trigramas
+        productos = self.productos
+        return [productos[i] for i in self.indice_busqueda.buscar(termino)]
+
+    @registro.cronometrar('tienda.sugerir_productos')
+    def sugerir_productos(self, termino, limite=10):
+        """Productos con nombre parecido a ``termino``, del más al menos parecido."""
+        productos = self.productos
+        return [productos[i] for i in self.indice_busqueda.sugerir(termino, limite)]
 
     def generar_reporte_ventas(self):
-        total_vendido = sum(pedido.get('total_pedido', 0) for pedido in self.pedidos)
-        return total_vendido
\ No newline at end of file
+        # Leído de los acumulados: no recorre los pedidos
+        return self.agregados.total
\ No newline at end of file
@@ -0,0 +1,323 @@
+# lista_pedidos.py
+from array import array
+from collections.abc import Mapping, Sequence
+from datetime import datetime, timedelta
+
+from dinero import a_centavos, a_pesos
+
+_EPOCA = datetime(1970, 1, 1)
+_UN_SEGUNDO = timedelta(seconds=1)
+
+CLAVES_PEDIDO = ('id_pedido', 'id_cliente', 'nombre_cliente', 'fecha_pedido', 'items', 'total_pedido')
+CLAVES_ITEM = ('id_producto', 'nombre', 'cantidad', 'precio_unitario', 'subtotal')
+# Columnas int64 de ListaPedidos (los atributos llevan '_' delante); inicio_items tiene un valor más que pedidos
+COLUMNAS_PEDIDO = ('id_pedido', 'id_cliente', 'nombre_cliente', 'fecha', 'total', 'inicio_items')
+COLUMNAS_ITEM = ('item_producto', 'item_nombre', 'item_cantidad', 'item_precio', 'item_subtotal')
+
+
+def _a_centavos(valor):
+    """Centavos enteros si ``valor`` se recupera exacto con ``a_pesos``; si no, None."""
+    if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+        return None
+    try:
+        centavos = a_centavos(valor)
+    except ValueError:  # inf / nan
+        return None
+    return centavos if a_pesos(centavos) == valor else None
+
+
+def _a_segundos(fecha):
+    """Segundos desde 1970 de una fecha 'YYYY-MM-DD HH:MM:SS'; None si tiene otro formato."""
+    if not isinstance(fecha, str) or len(fecha) != 19 or fecha[10] != ' ':
+        return None
+    try:
+        ts = (datetime.fromisoformat(fecha) - _EPOCA) // _UN_SEGUNDO
+    except ValueError:
+        return None
+    return ts if _a_fecha(ts) == fecha else None
+
+
+def marca_tiempo(fecha):
+    """Convierte 'YYYY-MM-DD[ HH:MM:SS]' en segundos desde 1970 (entero); None si no es válida."""
+    try:
+        return int((datetime.fromisoformat(fecha) - _EPOCA) // _UN_SEGUNDO)
+    except (TypeError, ValueError):
+        return None
+
+
+def _valor_irregular(pedido, nombre):
+    # Equivalente de una columna para un pedido guardado como dict (0 si falta o no es numérico)
+    if nombre == 'fecha':
+        return marca_tiempo(pedido.get('fecha_pedido')) or 0
+    if nombre == 'total':
+        total = pedido.get('total_pedido')
+        return round(total * 100) if isinstance(total, (int, float)) else 0
+    valor = pedido.get(nombre)
+    return valor if isinstance(valor, int) else 0
+
+
+def _a_fecha(segundos):
+    return (_EPOCA + timedelta(seconds=segundos)).isoformat(' ')
+
+
+class _TablaTextos:
+    """Guarda cada texto distinto una sola vez (nombres de clientes y productos)."""
+
+    __slots__ = ('_textos', '_posiciones')
+
+    def __init__(self, textos=()):
+        self._textos = list(textos)
+        self._posiciones = {texto: i for i, texto in enumerate(self._textos)}
+
+    def indice(self, texto):
+        posicion = self._posiciones.get(texto)
+        if posicion is None:
+            posicion = self._posiciones[texto] = len(self._textos)
+            self._textos.append(texto)
+        return posicion
+
+    def __getitem__(self, posicion):
+        return self._textos[posicion]
+
+    def __len__(self):
+        return len(self._textos)
+
+    def __iter__(self):
+        return iter(self._textos)
+
+
+class VistaPedido(Mapping):
+    """Pedido de una ``ListaPedidos`` visto como dict de solo lectura (``p['total_pedido']``, ``p.get(...)``).
+
+    ``dict(vista)`` devuelve el pedido como dict común, con los items como lista de dicts.
+    """
+
+    __slots__ = ('_lista', '_posicion')
+
+    def __init__(self, lista, posicion):
+        self._lista = lista
+        self._posicion = posicion
+
+    def __getitem__(self, clave):
+        lista, i = self._lista, self._posicion
+        if clave == 'id_pedido':
+            return lista._id_pedido[i]
+        if clave == 'id_cliente':
+            return lista._id_cliente[i]
+        if clave == 'nombre_cliente':
+            return lista._textos[lista._nombre_cliente[i]]
+        if clave == 'fecha_pedido':
+            return _a_fecha(lista._fecha[i])
+        if clave == 'items':
+            return lista._items(i)
+        if clave == 'total_pedido':
+            return a_pesos(lista._total[i])
+        raise KeyError(clave)
+
+    def __iter__(self):
+        return iter(CLAVES_PEDIDO)
+
+    def __len__(self):
+        return len(CLAVES_PEDIDO)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class ListaPedidos(Sequence):
+    """Pedidos guardados por columnas en arreglos compactos en lugar de una lista de dicts.
+
+    Cada pedido ocupa unos pocos enteros (IDs, fecha en segundos, total en centavos) y sus items
+    se guardan en arreglos paralelos; los nombres de clientes y productos se guardan una sola vez.
+    Se lee como una lista de pedidos: ``lista[i]`` devuelve una ``VistaPedido``. Los pedidos con
+    claves o valores fuera del formato habitual se conservan tal cual, como dict.
+    """
+
+    def __init__(self, pedidos=(), textos=None):
+        self._textos = textos if textos is not None else _TablaTextos()
+        for nombre in COLUMNAS_PEDIDO + COLUMNAS_ITEM:
+            setattr(self, '_' + nombre, array('q'))
+        # Items del pedido i: posiciones _inicio_items[i] .. _inicio_items[i + 1] - 1
+        self._inicio_items.append(0)
+        # posición -> dict original de los pedidos que no encajan en las columnas
+        self._irregulares = {}
+        for pedido in pedidos:
+            self.append(pedido)
+
+    def __len__(self):
+        return len(self._id_pedido)
+
+    def __getitem__(self, posicion):
+        if isinstance(posicion, slice):
+            return [self[i] for i in range(*posicion.indices(len(self)))]
+        if posicion < 0:
+            posicion += len(self)
+        if not 0 <= posicion < len(self):
+            raise IndexError('índice de pedido fuera de rango')
+        irregular = self._irregulares.get(posicion)
+        return irregular if irregular is not None else VistaPedido(self, posicion)
+
+    def __eq__(self, otra):
+        if not isinstance(otra, Sequence):
+            return NotImplemented
+        return len(self) == len(otra) and all(a == b for a, b in zip(self, otra))
+
+    def __repr__(self):
+        return f"{type(self).__name__}({len(self)} pedidos)"
+
+    @property
+    def textos(self):
+        """Nombres de clientes y productos; las columnas nombre_* guardan posiciones de esta lista."""
+        return self._textos
+
+    @property
+    def irregulares(self):
+        """{posición: pedido} de los pedidos guardados como dict por no encajar en las columnas."""
+        return self._irregulares
+
+    def columnas(self):
+        """{nombre: arreglo int64} con todas las columnas (ver COLUMNAS_PEDIDO y COLUMNAS_ITEM)."""
+        return {nombre: getattr(self, '_' + nombre) for nombre in COLUMNAS_PEDIDO + COLUMNAS_ITEM}
+
+    def max_id(self):
+        """Mayor id_pedido de la lista (0 si está vacía), sin armar las vistas."""
+        # Los pedidos irregulares tienen 0 en la columna
+        return max(max(self._id_pedido, default=0),
+                   max((p.get('id_pedido', 0) for p in self.irregulares.values()), default=0))
+
+    def claves_indice(self):
+        """(id_cliente, fecha en segundos o None) de cada pedido, sin armar las vistas."""
+        irregulares = self.irregulares
+        for posicion, (id_cliente, fecha) in enumerate(zip(self._id_cliente, self._fecha)):
+            if irregulares and posicion in irregulares:
+                pedido = irregulares[posicion]
+                yield pedido.get('id_cliente'), marca_tiempo(pedido.get('fecha_pedido'))
+            else:
+                yield id_cliente, fecha
+
+    def valores_columna(self, nombre):
+        """Valores de 'id_pedido', 'id_cliente', 'fecha' (segundos) o 'total' (centavos) en orden, sin armar las vistas."""
+        if nombre not in ('id_pedido', 'id_cliente', 'fecha', 'total'):
+            raise ValueError(f"Columna sin valores numéricos: {nombre}")
+        irregulares = self._irregulares
+        for posicion, valor in enumerate(getattr(self, '_' + nombre)):
+            if irregulares and posicion in irregulares:
+                yield _valor_irregular(irregulares[posicion], nombre)
+            else:
+                yield valor
+
+    def append(self, pedido):
+        columnas = self._columnas(pedido)
+        if columnas is None:
+            self._irregulares[len(self)] = pedido
+            columnas = (0, 0, 0, 0, 0, [])
+        id_pedido, id_cliente, nombre_cliente, fecha, total, items = columnas
+        self._id_pedido.append(id_pedido)
+        self._id_cliente.append(id_cliente)
+        self._nombre_cliente.append(nombre_cliente)
+        self._fecha.append(fecha)
+        self._total.append(total)
+        for id_producto, nombre, cantidad, precio, subtotal in items:
+            self._item_producto.append(id_producto)
+            self._item_nombre.append(nombre)
+            self._item_cantidad.append(cantidad)
+            self._item_precio.append(precio)
+            self._item_subtotal.append(subtotal)
+        self._inicio_items.append(len(self._item_producto))
+
+    def _columnas(self, pedido):
+        """Valores por columna del pedido, o None si no encaja en el formato habitual."""
+        if tuple(pedido) != CLAVES_PEDIDO or not isinstance(pedido['nombre_cliente'], str):
+            return None
+        id_pedido, id_cliente = pedido['id_pedido'], pedido['id_cliente']
+        if type(id_pedido) is not int or type(id_cliente) is not int:
+            return None
+        fecha = _a_segundos(pedido['fecha_pedido'])
+        total = _a_centavos(pedido['total_pedido'])
+        if fecha is None or total is None:
+            return None
+        items = []
+        for it in pedido['items']:
+            if tuple(it) != CLAVES_ITEM or not isinstance(it['nombre'], str):
+                return None
+            if type(it['id_producto']) is not int or type(it['cantidad']) is not int:
+                return None
+            precio, subtotal = _a_centavos(it['precio_unitario']), _a_centavos(it['subtotal'])
+            if precio is None or subtotal is None:
+                return None
+            items.append((it['id_producto'], self._textos.indice(it['nombre']), it['cantidad'], precio, subtotal))
+        return (id_pedido, id_cliente, self._textos.indice(pedido['nombre_cliente']), fecha, total, items)
+
+    def _items(self, posicion):
+        # Los items se arman al pedirlos: son dicts nuevos, modificarlos no cambia la lista
+        return [{'id_producto': self._item_producto[j],
+                 'nombre': self._textos[self._item_nombre[j]],
+                 'cantidad': self._item_cantidad[j],
+                 'precio_unitario': a_pesos(self._item_precio[j]),
+                 'subtotal': a_pesos(self._item_subtotal[j])}
+                for j in range(self._inicio_items[posicion], self._inicio_items[posicion + 1])]
+
+
+class ListaPedidosMapeada(ListaPedidos):
+    """``ListaPedidos`` cuyas columnas son vistas de solo lectura sobre un archivo mapeado (mmap).
+
+    Abrirla no lee los pedidos: el sistema trae del disco solo las páginas que se consultan.
+    Los pedidos agregados después van a una ``ListaPedidos`` en memoria (la cola) que comparte
+    la tabla de nombres; para el resto del programa es una sola lista.
+    """
+
+    def __init__(self, columnas, textos, irregulares=None, recurso=None):
+        self._textos = _TablaTextos(textos)
+        for nombre, vista in columnas.items():
+            setattr(self, '_' + nombre, vista)
+        self._irregulares = dict(irregulares or {})
+        # Mantiene vivo el mmap mientras existan las vistas
+        self._recurso = recurso
+        self._base = len(self._id_pedido)
+        self._cola = ListaPedidos(textos=self._textos)
+
+    def __len__(self):
+        return self._base + len(self._cola)
+
+    def __getitem__(self, posicion):
+        if not isinstance(posicion, slice):
+            if posicion < 0:
+                posicion += len(self)
+            if self._base <= posicion < len(self):
+                return self._cola[posicion - self._base]
+        return super().__getitem__(posicion)
+
+    def append(self, pedido):
+        self._cola.append(pedido)
+
+    @property
+    def irregulares(self):
+        if not self._cola.irregulares:
+            return self._irregulares
+        return {**self._irregulares, **{self._base + i: p for i, p in self._cola.irregulares.items()}}
+
+    def columnas(self):
+        # Copia las columnas del archivo y les agrega las de la cola
+        cola = self._cola.columnas()
+        unidas = {}
+        for nombre, vista in super().columnas().items():
+            columna = array('q')
+            columna.frombytes(memoryview(vista).cast('B'))
+            if nombre == 'inicio_items':
+                desplazamiento = columna[-1]
+                columna.extend(i + desplazamiento for i in cola[nombre][1:])
+            else:
+                columna.extend(cola[nombre])
+            unidas[nombre] = columna
+        return unidas
+
+    def max_id(self):
+        return max(super().max_id(), self._cola.max_id())
+
+    def claves_indice(self):
+        yield from super().claves_indice()
+        yield from self._cola.claves_indice()
+
+    def valores_columna(self, nombre):
+        yield from super().valores_columna(nombre)
+        yield from self._cola.valores_columna(nombre)
@@ -1,4 +1,6 @@
+import argparse
 import datetime
+import os
 from builtins import ValueError
 from time import sleep
 
@@ -12,11 +14,16 @@ from rich.rule import Rule
 from rich.table import Table
 from rich.text import Text
 
+from dinero import formatear
+from exportacion import ColaExportacion, TERMINADO
 from gestion import Tienda, Producto, Cliente
-from persistencia import PersistenciaJSON
+from metricas import registro
+from paginador import Paginador
+from perfilado import Perfilador
 
 console = Console()
 tienda_app = Tienda()
+cola_exportacion = ColaExportacion()
 
 
 def leer_int(prompt: str, permitir_vacio: bool = False):
@@ -91,40 +98,102 @@ def mostrar_menu():
     console.print(Rule(style="green"))
 
 
+def mostrar_paginado(titulo: str, filas, columnas: list, celdas, ordenables: dict):
+    """Muestra ``filas`` de a una página (solo se leen y dibujan las filas visibles).
+
+    ``columnas``: [(encabezado, opciones de add_column)]; ``celdas(fila)``: textos de una fila;
+    ``ordenables``: {número de columna (desde 1): función que devuelve una clave de orden por fila}.
+    Si todo entra en una página se muestra sin pedir nada, como una tabla común.
+    """
+    paginador = Paginador(filas)
+    orden = None  # (número de columna, descendente)
+    while True:
+        primera, ultima = paginador.rango()
+        tabla = Table(
+            title=f"[bold cyan]{titulo}[/bold cyan]",
+            caption=f"Página {paginador.pagina} de {paginador.total_paginas} · filas {primera}-{ultima} de {len(paginador)}"
+            if paginador.total_paginas > 1 else None,
+            show_header=True,
+            header_style="bold green",
+            box=box.SIMPLE,
+            style="white"
+        )
+        for numero, (encabezado, opciones) in enumerate(columnas, 1):
+            if orden and orden[0] == numero:
+                encabezado += " ▼" if orden[1] else " ▲"
+                if opciones.get("width"):
+                    opciones = dict(opciones, width=opciones["width"] + 2)
+            tabla.add_column(encabezado, **opciones)
+        with registro.medir('menu.dibujar_tabla'):
+            for fila in paginador.filas_pagina():
+                tabla.add_row(*celdas(fila))
+            console.print(tabla)
+        if paginador.total_paginas == 1:
+            return
+
+        columnas_orden = ", ".join(f"{n}={columnas[n - 1][0]}" for n in ordenables)
+        opcion = console.input(
+            "[dim][n] siguiente · [p] anterior · [i]/[u] primera/última · número = ir a página · "
+            f"o<columna> ordenar ({columnas_orden}) · ENTER salir:[/dim] ").strip().lower()
+        if not opcion:
+            return
+        if opcion == "n":
+            paginador.siguiente()
+        elif opcion == "p":
+            paginador.anterior()
+        elif opcion == "i":
+            paginador.primera()
+        elif opcion == "u":
+            paginador.ultima()
+        elif opcion.isdigit():
+            paginador.ir_a(int(opcion))
+        elif opcion.startswith("o") and opcion[1:].isdigit() and int(opcion[1:]) in ordenables:
+            numero = int(opcion[1:])
+            # Elegir otra vez la misma columna invierte el orden
+            descendente = bool(orden and orden[0] == numero and not orden[1])
+            paginador.ordenar(ordenables[numero](), descendente)
+            orden = (numero, descendente)
+        else:
+            console.print("[bold red]✗ Opción no válida.[/bold red]")
+
+
 def mostrar_lista(titulo: str, lista_objetos: list):
     if not lista_objetos:
         console.print(f"[bold yellow]⚠ No hay {titulo.lower()} registrados.[/bold yellow]")
         return
-    tabla = Table(
-        title=f"[bold cyan]{titulo}[/bold cyan]",
-        show_header=True,
-        header_style="bold green",
-        box=box.SIMPLE,
-        style="white"
-    )
     primera = lista_objetos[0]
     if isinstance(primera, Producto):
-        tabla.add_column("ID", justify="center", style="cyan", width=6)
-        tabla.add_column("Nombre", style="white")
-        tabla.add_column("Precio", justify="right", style="yellow", width=10)
-        tabla.add_column("Stock", justify="center", style="bright_green", width=6)
-        for p in lista_objetos:
+        def celdas(p):
             color_stock = "green" if p.stock > 10 else "yellow" if p.stock > 0 else "red"
-            tabla.add_row(str(p.id_producto), p.nombre, f"$ {p.precio:.2f}",
-                          f"[{color_stock}]{p.stock}[/{color_stock}]")
+            return (str(p.id_producto), p.nombre, f"$ {formatear(p.precio_centavos)}",
+                    f"[{color_stock}]{p.stock}[/{color_stock}]", p.codigo or "")
+        columnas = [("ID", dict(justify="center", style="cyan", width=6)),
+                    ("Nombre", dict(style="white")),
+                    ("Precio", dict(justify="right", style="yellow", width=10)),
+                    ("Stock", dict(justify="center", style="bright_green", width=6)),
+                    ("Código", dict(style="bright_black"))]
+        ordenables = {1: lambda: (p.id_producto for p in lista_objetos),
+                      2: lambda: (p.nombre.lower() for p in lista_objetos),
+                      3: lambda: (p.precio_centavos for p in lista_objetos),
+                      4: lambda: (p.stock for p in lista_objetos),
+                      5: lambda: (p.codigo or "" for p in lista_objetos)}
     elif isinstance(primera, Cliente):
-        tabla.add_column("ID", justify="center", style="cyan", width=6)
-        tabla.add_column("Nombre", style="white")
-        tabla.add_column("Email", style="yellow")
-        for c in lista_objetos:
-            tabla.add_row(str(c.id_cliente), c.nombre, c.email)
+        def celdas(c):
+            return str(c.id_cliente), c.nombre, c.email
+        columnas = [("ID", dict(justify="center", style="cyan", width=6)),
+                    ("Nombre", dict(style="white")),
+                    ("Email", dict(style="yellow"))]
+        ordenables = {1: lambda: (c.id_cliente for c in lista_objetos),
+                      2: lambda: (c.nombre.lower() for c in lista_objetos),
+                      3: lambda: (c.email.lower() for c in lista_objetos)}
     else:
         keys = list(vars(primera).keys())
-        for k in keys:
-            tabla.add_column(k, style="white")
-        for obj in lista_objetos:
-            tabla.add_row(*[str(getattr(obj, k)) for k in keys])
-    console.print(tabla)
+
+        def celdas(obj):
+            return [str(getattr(obj, k)) for k in keys]
+        columnas = [(k, dict(style="white")) for k in keys]
+        ordenables = {}
+    mostrar_paginado(titulo, lista_objetos, columnas, celdas, ordenables)
 
 
 # ---------------------- MANEJO CRUD PRODUCTOS ----------------------
@@ -169,8 +238,8 @@ def manejar_crud_productos():
             stock = None
             while stock is None:
                 stock = leer_int("[bold white]Stock:[/bold white] ")
-            tienda_app.agregar_producto(nombre, precio, stock)
-            console.print("[bold green]✔ Producto creado correctamente.[/bold green]")
+            codigo = console.input("[bold white]Código de barras o SKU (opcional):[/bold white] ").strip()
+            tienda_app.agregar_producto(nombre, precio, stock, codigo or None)
             pausa()
         elif opcion == '2':
             console.print(Rule("[bold cyan]LISTA DE PRODUCTOS[/bold cyan]", style="cyan"))
@@ -184,8 +253,9 @@ def manejar_crud_productos():
             nombre = console.input("Nuevo Nombre (vacío = no cambiar): ").strip()
             precio = leer_float("Nuevo Precio (vacío = no cambiar): ", permitir_vacio=True)
             stock = leer_int("Nuevo Stock (vacío = no cambiar): ", permitir_vacio=True)
-            tienda_app.actualizar_producto(id_prod, nombre or None, precio, stock)
-            console.print("[bold green]✔ Producto actualizado correctamente.[/bold green]")
+            codigo = console.input("Nuevo Código de barras/SKU (vacío = no cambiar, - = quitar): ").strip()
+            tienda_app.actualizar_producto(id_prod, nombre or None, precio, stock,
+                                           "" if codigo == "-" else codigo or None)
             pausa()
         elif opcion == '4':
             id_prod = leer_int("[bold white]ID del producto a eliminar:[/bold white] ")
@@ -249,15 +319,8 @@ def manejar_crud_clientes():
                 console.print("[bold red]✗ El email no puede quedar vacío.[/bold red]")
                 pausa()
                 continue
-            nuevo_id = tienda_app.obtener_siguiente_id(tienda_app.clientes)
-            cliente = Cliente(nuevo_id, nombre, email)
-            tienda_app.clientes[nuevo_id] = cliente
-            try:
-                tienda_app._guardar_clientes()
-            except Exception:
-                console.print(
-                    "[bold yellow]⚠ No se pudo guardar en persistencia. Cliente creado en memoria.[/bold yellow]")
-            console.print(f"[bold green]✔ Cliente creado con ID {nuevo_id}.[/bold green]")
+            cliente = tienda_app.crear_cliente(nombre, email)
+            console.print(f"[bold green]✔ Cliente creado con ID {cliente.id_cliente}.[/bold green]")
             pausa()
         elif opcion == '2':
             console.print(Rule("[bold cyan]LISTA DE CLIENTES[/bold cyan]", style="cyan"))
@@ -268,39 +331,20 @@ def manejar_crud_clientes():
             if id_cli is None:
                 pausa()
                 continue
-            cliente = tienda_app.clientes.get(id_cli)
-            if not cliente:
+            if id_cli not in tienda_app.clientes:
                 console.print(f"[bold red]✗ Cliente ID {id_cli} no encontrado.[/bold red]")
                 pausa()
                 continue
             nombre = console.input("Nuevo Nombre (vacío = no cambiar): ").strip()
             email = console.input("Nuevo Email (vacío = no cambiar): ").strip()
-            if nombre:
-                cliente.nombre = nombre
-            if email:
-                cliente.email = email
-            try:
-                tienda_app._guardar_clientes()
-            except Exception:
-                console.print(
-                    "[bold yellow]⚠ No se pudo guardar en persistencia. Cambios aplicados en memoria.[/bold yellow]")
-            console.print("[bold green]✔ Cliente actualizado correctamente.[/bold green]")
+            tienda_app.actualizar_cliente(id_cli, nombre or None, email or None)
             pausa()
         elif opcion == '4':
             id_cli = leer_int("[bold white]ID del cliente a eliminar:[/bold white] ")
             if id_cli is None:
                 pausa()
                 continue
-            if id_cli in tienda_app.clientes:
-                del tienda_app.clientes[id_cli]
-                try:
-                    tienda_app._guardar_clientes()
-                except Exception:
-                    console.print(
-                        "[bold yellow]⚠ No se pudo guardar en persistencia. Eliminado en memoria.[/bold yellow]")
-                console.print("[bold green]✔ Cliente eliminado correctamente.[/bold green]")
-            else:
-                console.print(f"[bold red]✗ Cliente ID {id_cli} no encontrado.[/bold red]")
+            tienda_app.eliminar_cliente(id_cli)
             pausa()
         elif opcion == '0':
             console.print(
@@ -355,51 +399,54 @@ def manejar_crear_pedido():
     console.print(Rule("[bold cyan]PRODUCTOS DISPONIBLES[/bold cyan]", style="cyan"))
     mostrar_lista("Productos", productos)
 
-    # Crear pedido
-    pedido_items = []
-    total_pedido = 0.0
+    # Crear pedido: cantidades acumuladas por producto
+    cantidades = {}
+    total_centavos = 0
 
     while True:
         console.print("\n[bold cyan]Agregar producto al pedido:[/bold cyan]")
-        id_producto = leer_int("[bold white]ID del producto (0 para terminar):[/bold white] ")
+        entrada = console.input("[bold white]ID o código de barras del producto (0 para terminar):[/bold white] ").strip()
 
-        if id_producto == 0:
+        if entrada == "0":
             break
 
-        if id_producto is None:
+        if not entrada:
             continue
 
-        producto = tienda_app.productos.get(id_producto)
+        # Primero el código (lo que envía el escáner) y, si no hay ninguno así, el ID
+        producto = tienda_app.buscar_por_codigo(entrada)
+        if producto is None and entrada.isdigit():
+            producto = tienda_app.productos.get(int(entrada))
         if not producto:
-            console.print(f"[bold red]✗ Producto ID {id_producto} no encontrado.[/bold red]")
+            console.print(f"[bold red]✗ Producto '{entrada}' no encontrado.[/bold red]")
             continue
+        id_producto = producto.id_producto
 
-        if producto.stock <= 0:
+        disponible = producto.stock - cantidades.get(id_producto, 0)
+        if disponible <= 0:
             console.print(f"[bold red]✗ Producto '{producto.nombre}' sin stock disponible.[/bold red]")
             continue
 
-        cantidad = leer_int(f"[bold white]Cantidad de '{producto.nombre}' (stock: {producto.stock}):[/bold white] ")
+        texto = console.input(
+            f"[bold white]Cantidad de '{producto.nombre}' (stock: {disponible}, ENTER = 1):[/bold white] ").strip()
+        cantidad = int(texto) if texto.isdigit() else None if texto else 1
         if cantidad is None or cantidad <= 0:
             console.print("[bold red]✗ Cantidad inválida.[/bold red]")
             continue
 
-        if cantidad > producto.stock:
-            console.print(f"[bold red]✗ Stock insuficiente. Solo hay {producto.stock} unidades.[/bold red]")
+        if cantidad > disponible:
+            console.print(f"[bold red]✗ Stock insuficiente. Solo hay {disponible} unidades.[/bold red]")
             continue
 
         # Agregar al pedido
-        subtotal = producto.precio * cantidad
-        pedido_items.append({
-            'producto': producto,
-            'cantidad': cantidad,
-            'subtotal': subtotal
-        })
-        total_pedido += subtotal
-
-        console.print(f"[bold green]✔ Agregado: {cantidad} x {producto.nombre} = ${subtotal:.2f}[/bold green]")
-        console.print(f"[bold yellow]Total acumulado: ${total_pedido:.2f}[/bold yellow]")
-
-    if not pedido_items:
+        subtotal = producto.precio_centavos * cantidad
+        cantidades[id_producto] = cantidades.get(id_producto, 0) + cantidad
+        total_centavos += subtotal
+
+        console.print(f"[bold green]✔ Agregado: {cantidad} x {producto.nombre} = ${formatear(subtotal)}[/bold green]")
+        console.print(f"[bold yellow]Total acumulado: ${formatear(total_centavos)}[/bold yellow]")
+
+    if not cantidades:
         console.print("[bold yellow]⚠ Pedido cancelado. No se agregaron productos.[/bold yellow]")
         pausa()
         return
@@ -407,50 +454,14 @@ def manejar_crear_pedido():
     # Confirmar pedido
     console.print("\n[bold cyan]RESUMEN DEL PEDIDO:[/bold cyan]")
     console.print(f"Cliente: {cliente.nombre} ({cliente.email})")
-    console.print(f"Total: ${total_pedido:.2f}")
+    console.print(f"Total: ${formatear(total_centavos)}")
 
     confirmar = console.input("\n[bold white]¿Confirmar pedido? (s/n): [/bold white]").strip().lower()
 
     if confirmar == 's':
-        # Procesar pedido: actualizar stock en objetos Producto
-        for item in pedido_items:
-            producto = item['producto']
-            cantidad = item['cantidad']
-            producto.stock -= cantidad
-
-        # --- CAMBIO: construir pedido en formato persistible y guardarlo ---
+        # --- CAMBIO: la Tienda valida stock, genera el ID y anexa el pedido al diario ---
         try:
-            # Convertir items a estructura serializable esperada por la persistencia
-            items_serializables = []
-            for item in pedido_items:
-                prod_obj = item['producto']
-                items_serializables.append({
-                    'id_producto': prod_obj.id_producto,
-                    'nombre': prod_obj.nombre,
-                    'cantidad': int(item['cantidad']),
-                    'precio_unitario': float(prod_obj.precio),
-                    'subtotal': round(float(item['subtotal']), 2)
-                })
-
-            # Generar nuevo id de pedido (igual lógica que en gestion.py)
-            nuevo_id = tienda_app.obtener_siguiente_id({p['id_pedido']: p for p in tienda_app.pedidos}) \
-                if tienda_app.pedidos else 1
-
-            nuevo_pedido = {
-                'id_pedido': nuevo_id,
-                'id_cliente': id_cliente,
-                'nombre_cliente': cliente.nombre,
-                'fecha_pedido': __import__('datetime').datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                'items': items_serializables,
-                'total_pedido': round(total_pedido, 2)
-            }
-
-            tienda_app.pedidos.append(nuevo_pedido)                # agregar al listado en memoria
-            tienda_app._guardar_productos()                        # guardar cambios de stock
-            tienda_app._guardar_pedidos()                          # --- CAMBIO: guardar pedidos persistente
-
-            console.print("[bold green]✔ Pedido creado exitosamente![/bold green]")
-            console.print(f"[bold green]Total: ${total_pedido:.2f}[/bold green]")
+            tienda_app.crear_pedido(id_cliente, cantidades)
         except Exception as e:
             console.print(f"[bold yellow]⚠ No se pudo guardar en persistencia: {e}[/bold yellow]")
     else:
@@ -476,31 +487,22 @@ def mostrar_historial_pedidos():
         pausa()
         return
 
-    tabla = Table(
-        title="[bold cyan]Historial de Pedidos[/bold cyan]",
-        show_header=True,
-        header_style="bold green",
-        box=box.SIMPLE,
-        style="white"
-    )
-    tabla.add_column("ID", style="cyan", width=6, justify="center")
-    tabla.add_column("Fecha", style="white", width=19, justify="center")
-    tabla.add_column("Cliente", style="white")
-    tabla.add_column("Productos", style="white")
-    tabla.add_column("Total", style="yellow", justify="right", width=12)
-
-    for pedido in pedidos:
+    def celdas(pedido):
         productos = ", ".join(f"{it.get('nombre')} ({it.get('cantidad')})" for it in pedido.get('items', []))
-        tabla.add_row(
-            str(pedido.get('id_pedido')),
-            pedido.get('fecha_pedido', ''),
-            pedido.get('nombre_cliente', ''),
-            productos,
-            f"$ {pedido.get('total_pedido', 0):.2f}"
-        )
-
+        return (str(pedido.get('id_pedido')), pedido.get('fecha_pedido', ''), pedido.get('nombre_cliente', ''),
+                productos, f"$ {pedido.get('total_pedido', 0):.2f}")
+
+    columnas = [("ID", dict(style="cyan", width=6, justify="center")),
+                ("Fecha", dict(style="white", width=19, justify="center")),
+                ("Cliente", dict(style="white")),
+                ("Productos", dict(style="white")),
+                ("Total", dict(style="yellow", justify="right", width=12))]
+    # Claves leídas de las columnas de la lista: ordenar no arma una vista por pedido
+    ordenables = {1: lambda: pedidos.valores_columna('id_pedido'),
+                  2: lambda: pedidos.valores_columna('fecha'),
+                  5: lambda: pedidos.valores_columna('total')}
     console.print("\n")
-    console.print(tabla)
+    mostrar_paginado("Historial de Pedidos", pedidos, columnas, celdas, ordenables)
     pausa()
 
 
@@ -522,24 +524,15 @@ def manejar_buscar_productos():
         pausa()
         return
 
-    productos = tienda_app.obtener_lista(tienda_app.productos)
-    productos_encontrados = []
-
-    for producto in productos:
-        if termino.lower() in producto.nombre.lower():
-            productos_encontrados.append(producto)
+    productos_encontrados = tienda_app.buscar_productos_por_nombre(termino)
 
     if productos_encontrados:
         console.print(f"\n[bold green]✔ Se encontraron {len(productos_encontrados)} producto(s):[/bold green]")
         mostrar_lista(f"Productos que contienen '{termino}'", productos_encontrados)
     else:
         console.print(f"\n[bold yellow]⚠ No se encontraron productos que contengan '{termino}'.[/bold yellow]")
-        # Mostrar sugerencias
-        sugerencias = []
-        for producto in productos:
-            if any(palabra in producto.nombre.lower() for palabra in termino.lower().split()):
-                sugerencias.append(producto)
-
+        # Mostrar sugerencias (nombres parecidos, ordenados por similitud)
+        sugerencias = tienda_app.sugerir_productos(termino)
         if sugerencias:
             console.print("\n[bold cyan]Sugerencias:[/bold cyan]")
             mostrar_lista("Productos similares", sugerencias)
@@ -548,6 +541,13 @@ def manejar_buscar_productos():
 
 
 # ---------------------- GENERAR REPORTE DE VENTAS ----------------------
+def leer_filtros_exportacion():
+    desde = console.input("Fecha desde (YYYY-MM-DD, vacío = sin límite): ").strip() or None
+    hasta = console.input("Fecha hasta  (YYYY-MM-DD, vacío = sin límite): ").strip() or None
+    id_cliente = leer_int("ID de cliente (vacío = todos): ", permitir_vacio=True)
+    return desde, hasta, id_cliente
+
+
 def manejar_generar_reporte():
     console.print(
         Panel.fit(
@@ -571,6 +571,7 @@ def manejar_generar_reporte():
         menu_tabla.add_row("3", "[bold]Estadísticas históricas[/bold] (por mes / top productos)")
         menu_tabla.add_row("4", "[bold]Exportar a Excel (.xlsx)[/bold]")
         menu_tabla.add_row("5", "[bold]Exportar a PDF[/bold]")
+        menu_tabla.add_row("6", "[bold]Exportaciones en segundo plano[/bold] (estado / cancelar)")
         menu_tabla.add_row("0", "[bold]Volver[/bold]")
         console.print(Panel(Align.left(menu_tabla), title="[bold cyan]Opciones de Reporte[/bold cyan]", box=box.ROUNDED, border_style="bright_green"))
 
@@ -585,16 +586,17 @@ def manejar_generar_reporte():
                 pausa()
                 continue
 
-            total_vendido = sum(p.get("total_pedido", 0) for p in pedidos)
-            total_pedidos = len(pedidos)
-            clientes_unicos = len(set(p.get("id_cliente") for p in pedidos))
+            # Acumulados mantenidos pedido a pedido: no se recorre la lista
+            agregados = tienda_app.agregados
+            total_pedidos = agregados.pedidos
+            clientes_unicos = agregados.clientes_distintos
             # tabla resumen
             tabla_resumen = Table(show_header=True, header_style="bold green", box=box.SIMPLE)
             tabla_resumen.add_column("Métrica", style="cyan")
             tabla_resumen.add_column("Valor", style="white", justify="right")
             tabla_resumen.add_row("Pedidos Totales", str(total_pedidos))
             tabla_resumen.add_row("Clientes distintos", str(clientes_unicos))
-            tabla_resumen.add_row("Total vendido", f"$ {total_vendido:.2f}")
+            tabla_resumen.add_row("Total vendido", f"$ {formatear(agregados.total_centavos)}")
             console.print(tabla_resumen)
             pausa()
             continue
@@ -605,7 +607,7 @@ def manejar_generar_reporte():
             hasta = console.input("Fecha hasta  (YYYY-MM-DD, vacío = sin límite): ").strip()
             desde_val = desde if desde else None
             hasta_val = hasta if hasta else None
-            pedidos_filtrados = PersistenciaJSON.filtrar_pedidos_por_fecha(pedidos, desde=desde_val, hasta=hasta_val)
+            pedidos_filtrados = tienda_app.filtrar_pedidos_por_fecha(desde=desde_val, hasta=hasta_val)
             if not pedidos_filtrados:
                 console.print("[bold yellow]⚠ No se encontraron pedidos en ese rango.[/bold yellow]")
                 pausa()
@@ -629,32 +631,13 @@ def manejar_generar_reporte():
                 pausa()
                 continue
 
-            # ventas por mes
-            from collections import defaultdict, Counter
-            ventas_por_mes = defaultdict(float)
-            productos_counter = Counter()
-            ventas_por_cliente = defaultdict(float)
-
-            for p in pedidos:
-                fecha = p.get("fecha_pedido", "")
-                try:
-                    dt = datetime.strptime(fecha, "%Y-%m-%d %H:%M:%S")
-                except Exception:
-                    try:
-                        dt = datetime.strptime(fecha, "%Y-%m-%d")
-                    except Exception:
-                        continue
-                key_mes = f"{dt.year}-{dt.month:02d}"
-                ventas_por_mes[key_mes] += float(p.get("total_pedido", 0))
-                ventas_por_cliente[p.get("nombre_cliente", "Desconocido")] += float(p.get("total_pedido", 0))
-                for it in p.get("items", []):
-                    productos_counter.update({it.get("nombre", "SinNombre"): int(it.get("cantidad", 0))})
+            agregados = tienda_app.agregados
 
             # Mostrar ventas por mes en tabla compacta
             tabla_mes = Table(title="[bold cyan]Ventas por Mes[/bold cyan]", show_header=True, header_style="bold green", box=box.SIMPLE)
             tabla_mes.add_column("Mes", style="cyan")
             tabla_mes.add_column("Ventas", style="yellow", justify="right")
-            for mes, monto in sorted(ventas_por_mes.items()):
+            for mes, _, monto in agregados.ventas_por_mes():
                 tabla_mes.add_row(mes, f"$ {monto:.2f}")
             console.print(tabla_mes)
 
@@ -662,7 +645,7 @@ def manejar_generar_reporte():
             tabla_top = Table(title="[bold cyan]Top Productos (unidades vendidas)[/bold cyan]", show_header=True, header_style="bold green", box=box.SIMPLE)
             tabla_top.add_column("Producto", style="white")
             tabla_top.add_column("Unidades", style="yellow", justify="right")
-            for prod, cnt in productos_counter.most_common(10):
+            for prod, cnt, _ in agregados.top_productos(10):
                 tabla_top.add_row(prod, str(cnt))
             console.print(tabla_top)
 
@@ -670,10 +653,20 @@ def manejar_generar_reporte():
             tabla_clientes = Table(title="[bold cyan]Top Clientes (por monto)[/bold cyan]", show_header=True, header_style="bold green", box=box.SIMPLE)
             tabla_clientes.add_column("Cliente", style="white")
             tabla_clientes.add_column("Total Comprado", style="yellow", justify="right")
-            for cliente, monto in sorted(ventas_por_cliente.items(), key=lambda x: x[1], reverse=True)[:10]:
+            for cliente, _, monto in agregados.top_clientes(10):
                 tabla_clientes.add_row(cliente, f"$ {monto:.2f}")
             console.print(tabla_clientes)
 
+            # Tamaño de canasta: también sale de los acumulados, sin recorrer el historial
+            canasta = agregados.tamano_canasta()
+            tabla_canasta = Table(title="[bold cyan]Tamaño de Canasta[/bold cyan]", show_header=True, header_style="bold green", box=box.SIMPLE)
+            tabla_canasta.add_column("Items por pedido", style="white", justify="center")
+            tabla_canasta.add_column("Pedidos", style="yellow", justify="right")
+            for items, cantidad in canasta['pedidos_por_items'].items():
+                tabla_canasta.add_row(str(items), str(cantidad))
+            console.print(tabla_canasta)
+            console.print(f"Promedio: {canasta['items_promedio']:.2f} items / {canasta['unidades_promedio']:.2f} unidades por pedido")
+
             pausa()
             continue
 
@@ -684,9 +677,12 @@ def manejar_generar_reporte():
                 pausa()
                 continue
             archivo = console.input("Nombre archivo destino (ej: reporte_pedidos.xlsx): ").strip() or "reporte_pedidos.xlsx"
+            desde, hasta, id_cliente = leer_filtros_exportacion()
             try:
-                PersistenciaJSON.exportar_pedidos_excel(archivo, pedidos)
-                console.print(f"[bold green]✔ Exportado a Excel: {archivo}[/bold green]")
+                # Se genera en segundo plano con los pedidos que hay ahora (sin copiarlos)
+                id_trabajo = cola_exportacion.encolar('excel', archivo,
+                                                      tienda_app.instantanea_pedidos(desde, hasta, id_cliente))
+                console.print(f"[bold green]✔ Exportación a Excel encolada (trabajo {id_trabajo}): {archivo}[/bold green]")
             except Exception as e:
                 console.print(f"[bold red]✗ Error exportando a Excel:[/bold red] {e}")
             pausa()
@@ -699,38 +695,163 @@ def manejar_generar_reporte():
                 pausa()
                 continue
             archivo = console.input("Nombre archivo destino (ej: reporte_pedidos.pdf): ").strip() or "reporte_pedidos.pdf"
+            desde, hasta, id_cliente = leer_filtros_exportacion()
+            solo_resumen = console.input("¿Solo resumen por mes y cliente? (s/n): ").strip().lower() == 's'
             try:
-                PersistenciaJSON.exportar_pedidos_pdf(archivo, pedidos, titulo="Reporte de Pedidos")
-                console.print(f"[bold green]✔ Exportado a PDF: {archivo}[/bold green]")
+                id_trabajo = cola_exportacion.encolar('pdf', archivo, tienda_app.instantanea_pedidos(desde, hasta, id_cliente),
+                                                      titulo="Reporte de Pedidos", solo_resumen=solo_resumen)
+                console.print(f"[bold green]✔ Exportación a PDF encolada (trabajo {id_trabajo}): {archivo}[/bold green]")
             except Exception as e:
                 console.print(f"[bold red]✗ Error exportando a PDF:[/bold red] {e}")
             pausa()
             continue
 
+        # --- trabajos de exportación ---
+        if opcion == "6":
+            mostrar_trabajos_exportacion()
+            pausa()
+            continue
+
         console.print("[bold red]✗ Opción no válida. Intente de nuevo.[/bold red]")
         pausa()
 
 
+def mostrar_trabajos_exportacion():
+    trabajos = cola_exportacion.trabajos()
+    if not trabajos:
+        console.print("[bold yellow]⚠ No hay exportaciones registradas.[/bold yellow]")
+        return
+    tabla = Table(title="[bold cyan]Exportaciones[/bold cyan]", show_header=True, header_style="bold green", box=box.SIMPLE)
+    tabla.add_column("ID", style="cyan", justify="center", width=4)
+    tabla.add_column("Tipo", style="white")
+    tabla.add_column("Archivo", style="white")
+    tabla.add_column("Pedidos", justify="right")
+    tabla.add_column("Estado", style="yellow")
+    tabla.add_column("Avance", justify="right")
+    for t in trabajos:
+        estado = f"{t.estado}: {t.error}" if t.error else t.estado
+        pedidos = str(t.total_pedidos) if t.total_pedidos is not None else f"{t.hechos}…"
+        tabla.add_row(str(t.id_trabajo), t.tipo.upper(), t.archivo, pedidos, estado, f"{t.porcentaje:.0f}%")
+    console.print(tabla)
+    if cola_exportacion.en_curso():
+        id_trabajo = leer_int("ID del trabajo a cancelar (vacío = ninguno): ", permitir_vacio=True)
+        if id_trabajo is not None:
+            if cola_exportacion.cancelar(id_trabajo):
+                console.print(f"[bold green]✔ Trabajo {id_trabajo} cancelado.[/bold green]")
+            else:
+                console.print(f"[bold red]✗ El trabajo {id_trabajo} no existe o ya terminó.[/bold red]")
+
+
+def mostrar_diagnostico():
+    """Pantalla oculta (opción 9): tiempos y contadores de las operaciones medidas."""
+    if not registro.activo:
+        console.print("[bold yellow]⚠ Las métricas están desactivadas (TIENDA_METRICAS=1 las activa al iniciar).[/bold yellow]")
+        if console.input("[bold cyan]¿Activarlas ahora? (s/n): [/bold cyan]").strip().lower() == "s":
+            registro.activar()
+            console.print("[bold green]✔ Métricas activadas.[/bold green]")
+        pausa()
+        return
+
+    resumen = registro.resumen()
+    tabla = Table(title="[bold cyan]Tiempos (ms)[/bold cyan]", show_header=True, header_style="bold green",
+                  box=box.SIMPLE, style="white")
+    tabla.add_column("Operación", style="cyan")
+    for encabezado in ("Llamadas", "p50", "p95", "p99", "Máx."):
+        tabla.add_column(encabezado, justify="right")
+    for fila in resumen['tiempos']:
+        etiquetas = ", ".join(f"{k}={v}" for k, v in fila['etiquetas'].items())
+        tabla.add_row(f"{fila['nombre']} {etiquetas}".strip(), str(fila['cantidad']), f"{fila['p50_ms']:.2f}",
+                      f"{fila['p95_ms']:.2f}", f"{fila['p99_ms']:.2f}", f"{fila['max_ms']:.2f}")
+    console.print(tabla)
+
+    tabla = Table(title="[bold cyan]Contadores[/bold cyan]", show_header=True, header_style="bold green",
+                  box=box.SIMPLE, style="white")
+    tabla.add_column("Contador", style="cyan")
+    tabla.add_column("Valor", justify="right")
+    for fila in resumen['contadores']:
+        etiquetas = ", ".join(f"{k}={v}" for k, v in fila['etiquetas'].items())
+        tabla.add_row(f"{fila['nombre']} {etiquetas}".strip(), str(fila['valor']))
+    console.print(tabla)
+
+    ruta = console.input("[bold cyan]Archivo para volcar las métricas (.prom o .json, ENTER para omitir): [/bold cyan]").strip()
+    if ruta:
+        try:
+            registro.volcar(ruta)
+            console.print(f"[bold green]✔ Métricas guardadas en {ruta}[/bold green]")
+        except OSError as error:
+            console.print(f"[bold red]✗ Error:[/bold red] No se pudo escribir {ruta}: {error}", style="red")
+    pausa()
+
+
+def mostrar_notificaciones():
+    for t in cola_exportacion.notificaciones():
+        if t.estado == TERMINADO:
+            console.print(f"[bold green]🔔 Exportación {t.id_trabajo} lista: {t.archivo} ({t.resultado} pedidos)[/bold green]")
+        else:
+            detalle = f": {t.error}" if t.error else ""
+            console.print(f"[bold yellow]🔔 Exportación {t.id_trabajo} ({t.archivo}) {t.estado}{detalle}[/bold yellow]")
+
+
+
+perfilador = None  # con --profile, cada acción del menú se perfila (ver perfilado.py)
+
+
+def ejecutar(accion):
+    """Ejecuta una acción del menú; con --profile queda su perfil en el directorio elegido."""
+    if perfilador is None:
+        return accion()
+    return perfilador.ejecutar(accion.__name__, accion)
+
+
+def volumen_datos():
+    """Tamaño de las colecciones ya cargadas; las que nadie usó no se leen solo para contarlas."""
+    volumen = {"Almacenamiento": type(tienda_app.almacen).__name__}
+    for coleccion in ("productos", "clientes", "pedidos"):
+        datos = getattr(tienda_app, "_" + coleccion)
+        volumen[coleccion.capitalize()] = "sin cargar" if datos is None else len(datos)
+    return volumen
+
 
 # ---------------------- MAIN LOOP ----------------------
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gestión de Tienda (menú interactivo)")
+    parser.add_argument("--profile", nargs="?", const="perfiles", metavar="DIRECTORIO",
+                        help="Perfilar cada acción del menú con cProfile (por defecto en ./perfiles)")
+    args = parser.parse_args()
+    if args.profile:
+        perfilador = Perfilador(os.path.join(args.profile, datetime.datetime.now().strftime("%Y%m%d-%H%M%S")),
+                                contexto=volumen_datos)
+        # Lo que se tarda en responder a las preguntas no es tiempo de la aplicación
+        console.input = perfilador.sin_medir(console.input)
+        console.print(f"[bold yellow]⏱ Perfilando acciones en {perfilador.directorio}[/bold yellow]")
+
+    # El menú se muestra de inmediato; los datos se cargan mientras tanto
+    tienda_app.precargar()
     while True:
         mostrar_menu()
+        mostrar_notificaciones()
         opcion = console.input("\n[bold cyan]>>> Seleccione una opción: [/bold cyan]").strip()
 
         if opcion == '1':
-            manejar_crud_productos()
+            ejecutar(manejar_crud_productos)
         elif opcion == '2':
-            manejar_crud_clientes()
+            ejecutar(manejar_crud_clientes)
         elif opcion == '3':
-            manejar_crear_pedido()
+            ejecutar(manejar_crear_pedido)
         elif opcion == '4':
-            mostrar_historial_pedidos()
+            ejecutar(mostrar_historial_pedidos)
         elif opcion == '5':
-            manejar_buscar_productos()
+            ejecutar(manejar_buscar_productos)
         elif opcion == '6':
-            manejar_generar_reporte()
+            ejecutar(manejar_generar_reporte)
+        elif opcion == '9':
+            ejecutar(mostrar_diagnostico)
         elif opcion == '0':
+            if cola_exportacion.en_curso():
+                console.print("[bold yellow]⏳ Esperando que terminen las exportaciones en curso...[/bold yellow]")
+            cola_exportacion.cerrar(esperar=True)
+            tienda_app.cerrar()
+            resumen = perfilador.cerrar() if perfilador is not None else None
             console.clear()
 
             # Mensaje inicial de cierre
@@ -780,4 +901,6 @@ if __name__ == "__main__":
 
             sleep(1.5)
             console.clear()
+            if resumen:
+                console.print(f"[bold yellow]⏱ Resumen de perfiles: {resumen}[/bold yellow]")
             break
\ No newline at end of file
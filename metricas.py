@@ -0,0 +1,181 @@
+# metricas.py
+"""Métricas de rendimiento opcionales: tiempos y contadores de las operaciones principales.
+
+Se activan con la variable de entorno TIENDA_METRICAS=1 (o ``registro.activar()``); apagadas,
+cada punto medido cuesta solo una comparación. Los tiempos se guardan como muestras recientes
+(hasta ``MUESTRAS`` por métrica) para calcular p50/p95/p99.
+
+Con TIENDA_METRICAS_ARCHIVO=ruta, ``Tienda.cerrar()`` deja ahí un volcado: formato de texto de
+Prometheus si la ruta termina en .prom o .txt, JSON en otro caso.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+# Muestras de tiempo guardadas por métrica (las más recientes)
+MUESTRAS = 10000
+PERCENTILES = (0.5, 0.95, 0.99)
+
+
+class _Temporizador:
+    __slots__ = ('cantidad', 'suma', 'maximo', 'muestras')
+
+    def __init__(self):
+        self.cantidad = 0
+        self.suma = 0.0
+        self.maximo = 0.0
+        self.muestras = deque(maxlen=MUESTRAS)
+
+    def agregar(self, segundos):
+        self.cantidad += 1
+        self.suma += segundos
+        self.maximo = max(self.maximo, segundos)
+        self.muestras.append(segundos)
+
+    def percentil(self, p):
+        ordenadas = sorted(self.muestras)
+        if not ordenadas:
+            return 0.0
+        return ordenadas[min(len(ordenadas) - 1, int(p * len(ordenadas)))]
+
+
+def _clave(nombre, etiquetas):
+    return nombre, tuple(sorted(etiquetas.items()))
+
+
+class RegistroMetricas:
+    """Contadores y temporizadores del proceso, con etiquetas opcionales (p. ej. ``formato='csv'``)."""
+
+    def __init__(self, activo=False):
+        self.activo = activo
+        self._cerrojo = threading.Lock()
+        self._contadores = {}
+        self._temporizadores = {}
+
+    def activar(self, activo=True):
+        self.activo = activo
+
+    def reiniciar(self):
+        with self._cerrojo:
+            self._contadores.clear()
+            self._temporizadores.clear()
+
+    def contar(self, nombre, cantidad=1, **etiquetas):
+        if not self.activo:
+            return
+        clave = _clave(nombre, etiquetas)
+        with self._cerrojo:
+            self._contadores[clave] = self._contadores.get(clave, 0) + cantidad
+
+    def registrar_tiempo(self, nombre, segundos, **etiquetas):
+        if not self.activo:
+            return
+        clave = _clave(nombre, etiquetas)
+        with self._cerrojo:
+            temporizador = self._temporizadores.get(clave)
+            if temporizador is None:
+                temporizador = self._temporizadores[clave] = _Temporizador()
+            temporizador.agregar(segundos)
+
+    @contextmanager
+    def medir(self, nombre, **etiquetas):
+        """Registra cuánto tarda el bloque ``with`` (también si termina con una excepción)."""
+        if not self.activo:
+            yield
+            return
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar_tiempo(nombre, time.perf_counter() - inicio, **etiquetas)
+
+    def cronometrar(self, nombre, **etiquetas):
+        """Decorador: mide cada llamada a la función con ``medir``."""
+        def decorador(funcion):
+            @wraps(funcion)
+            def envoltura(*args, **kwargs):
+                if not self.activo:
+                    return funcion(*args, **kwargs)
+                with self.medir(nombre, **etiquetas):
+                    return funcion(*args, **kwargs)
+            return envoltura
+        return decorador
+
+    # --------------------------
+    # Consulta y volcado
+    # --------------------------
+
+    def resumen(self):
+        """{'contadores': [...], 'tiempos': [...]} con p50/p95/p99 en milisegundos, ordenado por nombre."""
+        with self._cerrojo:
+            contadores = [{'nombre': nombre, 'etiquetas': dict(etiquetas), 'valor': valor}
+                          for (nombre, etiquetas), valor in sorted(self._contadores.items())]
+            tiempos = []
+            for (nombre, etiquetas), t in sorted(self._temporizadores.items()):
+                fila = {'nombre': nombre, 'etiquetas': dict(etiquetas), 'cantidad': t.cantidad,
+                        'total_ms': t.suma * 1000, 'max_ms': t.maximo * 1000}
+                for p in PERCENTILES:
+                    fila[f'p{round(p * 100)}_ms'] = t.percentil(p) * 1000
+                tiempos.append(fila)
+        return {'contadores': contadores, 'tiempos': tiempos}
+
+    def a_prometheus(self, prefijo='tienda'):
+        """Texto en el formato de exposición de Prometheus (contadores y resúmenes en segundos)."""
+        lineas = []
+        with self._cerrojo:
+            contadores = sorted(self._contadores.items())
+            temporizadores = sorted(self._temporizadores.items())
+        vistos = set()
+        for (nombre, etiquetas), valor in contadores:
+            metrica = f"{prefijo}_{_nombre_prometheus(nombre)}_total"
+            if metrica not in vistos:
+                vistos.add(metrica)
+                lineas.append(f"# TYPE {metrica} counter")
+            lineas.append(f"{metrica}{_etiquetas_prometheus(etiquetas)} {valor}")
+        for (nombre, etiquetas), t in temporizadores:
+            metrica = f"{prefijo}_{_nombre_prometheus(nombre)}_segundos"
+            if metrica not in vistos:
+                vistos.add(metrica)
+                lineas.append(f"# TYPE {metrica} summary")
+            for p in PERCENTILES:
+                lineas.append(f"{metrica}{_etiquetas_prometheus(etiquetas + (('quantile', str(p)),))} "
+                              f"{t.percentil(p):.6f}")
+            lineas.append(f"{metrica}_sum{_etiquetas_prometheus(etiquetas)} {t.suma:.6f}")
+            lineas.append(f"{metrica}_count{_etiquetas_prometheus(etiquetas)} {t.cantidad}")
+        return "\n".join(lineas) + "\n"
+
+    def volcar(self, ruta):
+        """Escribe las métricas en ``ruta`` (Prometheus si termina en .prom o .txt, si no JSON)."""
+        if ruta.endswith(('.prom', '.txt')):
+            contenido = self.a_prometheus()
+        else:
+            contenido = json.dumps(self.resumen(), ensure_ascii=False, indent=2) + "\n"
+        temporal = ruta + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as file:
+            file.write(contenido)
+        os.replace(temporal, ruta)
+        return ruta
+
+    def volcar_configurado(self):
+        """Vuelca a TIENDA_METRICAS_ARCHIVO si está definida y las métricas están activas."""
+        ruta = os.environ.get('TIENDA_METRICAS_ARCHIVO')
+        if self.activo and ruta:
+            return self.volcar(ruta)
+        return None
+
+
+def _nombre_prometheus(nombre):
+    return ''.join(c if c.isalnum() else '_' for c in nombre)
+
+
+def _etiquetas_prometheus(etiquetas):
+    if not etiquetas:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in etiquetas) + '}'
+
+
+registro = RegistroMetricas(activo=os.environ.get('TIENDA_METRICAS', '0') == '1')
@@ -0,0 +1,89 @@
+# paginador.py
+"""Listados por páginas para colecciones grandes (productos, clientes, pedidos).
+
+El paginador guarda solo la página actual y, si se ordenó, la permutación de posiciones:
+mostrar una página lee únicamente sus filas de la colección (una ``ListaPedidos`` arma las
+vistas de esas filas y nada más), así el costo de dibujarla no depende del tamaño total.
+"""
+from array import array
+
+TAMANO_PAGINA = 20
+
+
+class Paginador:
+    """Cursor por páginas sobre una secuencia (lista, ``ListaPedidos``, ...) con orden opcional.
+
+    ``filas`` solo necesita ``len()`` y acceso por posición. Las páginas se numeran desde 1.
+    """
+
+    def __init__(self, filas, tamano=TAMANO_PAGINA):
+        if tamano < 1:
+            raise ValueError("El tamaño de página debe ser al menos 1")
+        self.filas = filas
+        self.tamano = tamano
+        self.pagina = 1
+        # Posición en ``filas`` de cada fila en el orden elegido; None = orden original
+        self._orden = None
+        self._descendente = False
+
+    def __len__(self):
+        return len(self.filas)
+
+    @property
+    def total_paginas(self):
+        return max(1, -(-len(self.filas) // self.tamano))
+
+    def ordenar(self, claves=None, descendente=False):
+        """Ordena por ``claves`` (un valor por fila, en el orden de ``filas``) y vuelve a la página 1.
+
+        Sin ``claves`` se usa el orden original (invertido si ``descendente``), sin recorrer nada.
+        Para pedidos conviene pasar ``ListaPedidos.valores_columna(...)``: no arma las vistas.
+        """
+        if claves is None:
+            self._orden = None
+        else:
+            claves = list(claves)
+            if len(claves) != len(self.filas):
+                raise ValueError("Se necesita una clave de orden por fila")
+            # sorted es estable: a igual clave se respeta el orden original
+            self._orden = array('q', sorted(range(len(claves)), key=claves.__getitem__, reverse=descendente))
+        self._descendente = descendente
+        self.pagina = 1
+
+    def _posicion(self, indice):
+        if self._orden is not None:
+            return self._orden[indice]
+        return len(self.filas) - 1 - indice if self._descendente else indice
+
+    def ir_a(self, pagina):
+        """Salta a la página indicada (se ajusta a las que existen) y devuelve sus filas."""
+        self.pagina = min(max(1, pagina), self.total_paginas)
+        return self.filas_pagina()
+
+    def siguiente(self):
+        return self.ir_a(self.pagina + 1)
+
+    def anterior(self):
+        return self.ir_a(self.pagina - 1)
+
+    def primera(self):
+        return self.ir_a(1)
+
+    def ultima(self):
+        return self.ir_a(self.total_paginas)
+
+    def filas_pagina(self):
+        """Filas de la página actual: solo se leen estas de la colección."""
+        # Si la colección cambió de tamaño desde que se ordenó, el orden guardado ya no sirve
+        if self._orden is not None and len(self._orden) != len(self.filas):
+            self._orden = None
+        self.pagina = min(self.pagina, self.total_paginas)
+        inicio = (self.pagina - 1) * self.tamano
+        fin = min(inicio + self.tamano, len(self.filas))
+        return [self.filas[self._posicion(i)] for i in range(inicio, fin)]
+
+    def rango(self):
+        """(primera, última) fila de la página actual, numeradas desde 1; (0, 0) si no hay filas."""
+        inicio = (self.pagina - 1) * self.tamano
+        fin = min(inicio + self.tamano, len(self.filas))
+        return (inicio + 1, fin) if fin > inicio else (0, 0)
@@ -0,0 +1,105 @@
+# perfilado.py
+"""Perfilado por acción del menú (``python main.py --profile [directorio]``).
+
+Cada acción (crear pedido, reporte, historial...) se ejecuta bajo ``cProfile`` y deja su propio
+archivo ``NNN-accion.prof`` (se abre con ``pstats`` o snakeviz). Al cerrar se escribe
+``resumen.txt``: por acción, cuántas veces se usó, el tiempo medido y las funciones más costosas.
+
+El tiempo que el usuario tarda en responder no cuenta: las lecturas de teclado envueltas con
+``sin_medir`` pausan el perfilador. Solo se mide el hilo del menú (la precarga y las
+exportaciones en segundo plano corren en otros hilos).
+"""
+import cProfile
+import io
+import os
+import pstats
+import time
+from datetime import datetime
+from functools import wraps
+
+# Funciones listadas por acción en el resumen
+FUNCIONES_RESUMEN = 25
+
+
+class Perfilador:
+    """Perfila llamadas con nombre y guarda un ``.prof`` por llamada en ``directorio``."""
+
+    def __init__(self, directorio, contexto=None):
+        os.makedirs(directorio, exist_ok=True)
+        self.directorio = directorio
+        # Función que devuelve {descripción: valor} para el encabezado (p. ej. volumen de datos)
+        self.contexto = contexto
+        self._perfil_actual = None
+        self._numero = 0
+        self._pausado = 0.0  # segundos sin medir dentro de la acción en curso
+        # accion -> [llamadas, segundos medidos, pstats.Stats acumulado]
+        self._acciones = {}
+
+    def ejecutar(self, accion, funcion, *args, **kwargs):
+        """Ejecuta ``funcion`` perfilándola como ``accion`` y devuelve su resultado."""
+        if self._perfil_actual is not None:  # acción dentro de otra: cuenta en la de afuera
+            return funcion(*args, **kwargs)
+        perfil = cProfile.Profile()
+        self._perfil_actual = perfil
+        self._numero += 1
+        self._pausado = 0.0
+        inicio = time.perf_counter()
+        perfil.enable()
+        try:
+            return funcion(*args, **kwargs)
+        finally:
+            perfil.disable()
+            self._perfil_actual = None
+            self._registrar(accion, perfil, time.perf_counter() - inicio - self._pausado)
+
+    def _registrar(self, accion, perfil, segundos):
+        perfil.dump_stats(os.path.join(self.directorio, f"{self._numero:03d}-{accion}.prof"))
+        datos = self._acciones.setdefault(accion, [0, 0.0, None])
+        datos[0] += 1
+        datos[1] += segundos
+        if datos[2] is None:
+            datos[2] = pstats.Stats(perfil)
+        else:
+            datos[2].add(perfil)
+
+    def sin_medir(self, funcion):
+        """Envuelve ``funcion`` (p. ej. una lectura de teclado) para que su tiempo no se mida."""
+        @wraps(funcion)
+        def envoltura(*args, **kwargs):
+            perfil = self._perfil_actual
+            if perfil is None:
+                return funcion(*args, **kwargs)
+            perfil.disable()
+            inicio = time.perf_counter()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                # Tampoco cuenta en el tiempo total de la acción
+                self._pausado += time.perf_counter() - inicio
+                perfil.enable()
+        return envoltura
+
+    def resumen(self, orden='cumulative'):
+        """Texto con las acciones de la más a la menos costosa y sus funciones más pesadas."""
+        salida = io.StringIO()
+        salida.write(f"Perfil de Gestión de Tienda - {datetime.now().isoformat(timespec='seconds')}\n")
+        for clave, valor in (self.contexto() if self.contexto else {}).items():
+            salida.write(f"{clave}: {valor}\n")
+        acciones = sorted(self._acciones.items(), key=lambda item: item[1][1], reverse=True)
+        salida.write("\nAcción                         Llamadas   Total (s)   Media (s)\n")
+        for accion, (llamadas, segundos, _) in acciones:
+            salida.write(f"{accion:<30} {llamadas:>8} {segundos:>11.3f} {segundos / llamadas:>11.3f}\n")
+        for accion, (llamadas, segundos, estadisticas) in acciones:
+            salida.write(f"\n=== {accion} ({llamadas} llamadas, {segundos:.3f} s) ===\n")
+            estadisticas.stream = salida
+            estadisticas.strip_dirs().sort_stats(orden).print_stats(FUNCIONES_RESUMEN)
+        return salida.getvalue()
+
+    def cerrar(self):
+        """Escribe ``resumen.txt`` y devuelve su ruta (None si no se perfiló nada)."""
+        if not self._acciones:
+            return None
+        ruta = os.path.join(self.directorio, 'resumen.txt')
+        with open(ruta, 'w', encoding='utf-8') as file:
+            file.write(self.resumen())
+        return ruta
@@ -1,16 +1,282 @@
 # persistencia.py
 import csv
+import glob
 import json
+import os
+import tempfile
+import threading
 from builtins import FileNotFoundError
-from typing import List, Dict
+from contextlib import contextmanager, nullcontext
+from itertools import groupby
+from typing import Dict, Iterable
 
-# Para exportar Excel/PDF
-from openpyxl import Workbook
-from openpyxl.utils import get_column_letter
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import landscape, letter
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import SimpleDocTemplate, Table as RLTable, TableStyle, Paragraph, Spacer
+from agregados import AgregadosVentas
+from dinero import a_centavos, a_pesos, formatear
+from metricas import registro
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# openpyxl y reportlab (Excel/PDF) se importan dentro de cada exportación: la mayoría de las
+# sesiones nunca exporta y cargarlos al inicio retrasa el arranque del menú.
+
+
+# =======================
+# Escritura atómica y transacciones
+# =======================
+
+RUTA_TRANSACCION = 'transaccion.journal'
+
+# 'codigo' (código de barras/SKU) va al final: los CSV anteriores, sin esa columna, se leen con codigo vacío
+CAMPOS_PRODUCTO = ['id_producto', 'nombre', 'precio', 'stock', 'version', 'codigo']
+CAMPOS_CLIENTE = ['id_cliente', 'nombre', 'email']
+
+# Archivo de bloqueo compartido por las terminales que usan el mismo directorio de datos
+RUTA_BLOQUEO = 'tienda.lock'
+
+
+class ConflictoVersion(Exception):
+    """Otra terminal modificó los productos ``ids`` desde que esta los leyó (modo multiterminal)."""
+
+    def __init__(self, ids):
+        super().__init__(f"Productos modificados por otra terminal: {sorted(ids)}")
+        self.ids = list(ids)
+
+
+@contextmanager
+def bloqueo_archivo(ruta):
+    """Bloqueo exclusivo entre procesos sobre ``ruta`` mientras dura el bloque ``with``."""
+    with open(ruta, 'a+b') as file:
+        if fcntl is not None:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+        else:
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+            else:
+                file.seek(0)
+                msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _sincronizar_directorio(directorio):
+    """Fuerza a disco la entrada de directorio tras un renombrado (no disponible en Windows)."""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(directorio, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _formato(nombre_archivo):
+    # Etiqueta de las métricas de E/S: la extensión del archivo (csv, json, jsonl, bin...)
+    return os.path.splitext(nombre_archivo)[1].lstrip('.').lower() or 'otro'
+
+
+def _preparar_temporal(nombre_archivo, volcar, newline=None, binario=False):
+    """Escribe el contenido en un temporal junto al destino, con fsync, y devuelve su ruta."""
+    directorio = os.path.dirname(os.path.abspath(nombre_archivo))
+    fd, temporal = tempfile.mkstemp(prefix='.' + os.path.basename(nombre_archivo) + '.', suffix='.tmp',
+                                    dir=directorio)
+    formato = _formato(nombre_archivo)
+    try:
+        with registro.medir('persistencia.escritura', formato=formato), \
+                (os.fdopen(fd, 'wb') if binario else os.fdopen(fd, 'w', newline=newline, encoding='utf-8')) as file:
+            volcar(file)
+            file.flush()
+            with registro.medir('persistencia.fsync', formato=formato):
+                os.fsync(file.fileno())
+            if registro.activo:
+                registro.contar('persistencia.bytes_escritos', os.fstat(file.fileno()).st_size, formato=formato)
+    except BaseException:
+        os.remove(temporal)
+        raise
+    return temporal
+
+
+def _publicar(temporal, nombre_archivo):
+    os.replace(temporal, nombre_archivo)
+    _sincronizar_directorio(os.path.dirname(os.path.abspath(nombre_archivo)))
+
+
+def escribir_atomico(nombre_archivo, volcar, newline=None, binario=False):
+    """Reemplaza el archivo de forma atómica: el destino nunca queda a medio escribir."""
+    _publicar(_preparar_temporal(nombre_archivo, volcar, newline, binario), nombre_archivo)
+
+
+def anexar_linea(ruta, linea, solo_si_falta=False):
+    """Agrega una línea al final del archivo y hace fsync.
+
+    Si el archivo quedó con una línea cortada se empieza en una línea nueva.
+    Con ``solo_si_falta`` no se vuelve a escribir si ya es la última línea (reintentos idempotentes).
+    """
+    anexar_lineas(ruta, [linea], solo_si_falta)
+
+
+def anexar_lineas(ruta, lineas, solo_si_falta=False):
+    """Agrega varias líneas con una sola escritura y un solo fsync (ver ``anexar_linea``).
+
+    Con ``solo_si_falta`` se omiten las primeras líneas del bloque que ya estén completas al final del
+    archivo. Si el corte dejó una línea a medias eso no alcanza para evitar duplicados: las
+    transacciones guardan el tamaño previo del archivo y vuelven a él (``TransaccionArchivos``).
+    """
+    bloques = [(linea + '\n').encode('utf-8') for linea in lineas]
+    if not bloques:
+        return
+    with open(ruta, 'a+b') as file:
+        file.seek(0, os.SEEK_END)
+        tamano = file.tell()
+        if solo_si_falta:
+            file.seek(max(0, tamano - sum(map(len, bloques))))
+            cola = file.read()
+            # Si la última línea del archivo es la k-ésima del bloque, se verifica que estén las k primeras
+            ultima = cola[cola.rfind(b'\n', 0, len(cola) - 1) + 1:]
+            posiciones = {bloque: i for i, bloque in enumerate(bloques)}
+            escritas = posiciones.get(ultima, -1) + 1
+            if escritas and cola.endswith(b''.join(bloques[:escritas])):
+                bloques = bloques[escritas:]
+            if not bloques:
+                return
+        datos = b''.join(bloques)
+        if tamano > 0:
+            file.seek(tamano - 1)
+            if file.read(1) != b'\n':
+                datos = b'\n' + datos
+        formato = _formato(ruta)
+        with registro.medir('persistencia.escritura', formato=formato):
+            file.write(datos)
+            file.flush()
+            with registro.medir('persistencia.fsync', formato=formato):
+                os.fsync(file.fileno())
+        registro.contar('persistencia.bytes_escritos', len(datos), formato=formato)
+
+
+def _truncar(ruta, tamano):
+    """Recorta ``ruta`` a ``tamano`` bytes si creció (con fsync)."""
+    try:
+        with open(ruta, 'r+b') as file:
+            if os.fstat(file.fileno()).st_size > tamano:
+                file.truncate(tamano)
+                file.flush()
+                os.fsync(file.fileno())
+    except FileNotFoundError:
+        pass
+
+
+class TransaccionArchivos:
+    """Confirma juntas varias escrituras de archivos usando un diario de intención (write-ahead).
+
+    Cada escritura se prepara en un temporal con fsync. Al confirmar se escribe el diario con
+    las operaciones pendientes (punto de confirmación), se aplican y se borra el diario.
+    Si el proceso se corta en medio, ``recuperar`` rehace las operaciones al arrancar.
+    """
+
+    def __init__(self, ruta_diario=RUTA_TRANSACCION):
+        self.ruta_diario = ruta_diario
+        self.renombres = []
+        self.anexos = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        if tipo is None:
+            self.confirmar()
+        else:
+            self.descartar()
+        return False
+
+    def escribir_csv(self, nombre_archivo, lista_objetos, campos):
+        temporal = _preparar_temporal(nombre_archivo, lambda f: _volcar_csv(f, lista_objetos, campos), newline='')
+        self.renombres.append([temporal, nombre_archivo])
+
+    def escribir_pedidos(self, nombre_archivo, pedidos):
+        temporal = _preparar_temporal(nombre_archivo, lambda f: _volcar_pedidos(f, pedidos))
+        self.renombres.append([temporal, nombre_archivo])
+
+    def escribir_json(self, nombre_archivo, datos):
+        temporal = _preparar_temporal(nombre_archivo, lambda f: json.dump(datos, f))
+        self.renombres.append([temporal, nombre_archivo])
+
+    def anexar_pedido(self, nombre_archivo, pedido):
+        self.anexos.append([PersistenciaJSON.ruta_diario(nombre_archivo), json.dumps(pedido)])
+
+    def anexar_pedidos(self, nombre_archivo, pedidos):
+        ruta = PersistenciaJSON.ruta_diario(nombre_archivo)
+        self.anexos.extend([ruta, json.dumps(pedido)] for pedido in pedidos)
+
+    def operaciones(self):
+        """Lo que se guarda en el diario: renombrados, líneas a anexar y el tamaño previo de cada archivo anexado."""
+        tamanos = {}
+        for ruta, _ in self.anexos:
+            if ruta not in tamanos:
+                tamanos[ruta] = os.path.getsize(ruta) if os.path.exists(ruta) else 0
+        return {'renombrar': self.renombres, 'anexar': self.anexos, 'tamanos': tamanos}
+
+    def confirmar(self):
+        operaciones = self.operaciones()
+        escribir_atomico(self.ruta_diario, lambda f: json.dump(operaciones, f))
+        TransaccionArchivos._aplicar(operaciones)
+        os.remove(self.ruta_diario)
+        self.renombres, self.anexos = [], []
+
+    def descartar(self):
+        for temporal, _ in self.renombres:
+            try:
+                os.remove(temporal)
+            except FileNotFoundError:
+                pass
+        self.renombres, self.anexos = [], []
+
+    @staticmethod
+    def _aplicar(operaciones):
+        for temporal, destino in operaciones['renombrar']:
+            # Si el temporal ya no existe, ese renombrado se completó antes del corte
+            if os.path.exists(temporal):
+                _publicar(temporal, destino)
+        tamanos = operaciones.get('tamanos')
+        if tamanos is not None:
+            # Volver al tamaño previo descarta lo que se haya alcanzado a anexar (incluida una línea a medias)
+            for ruta, tamano in tamanos.items():
+                _truncar(ruta, tamano)
+        # Las líneas seguidas del mismo archivo se anexan juntas (un fsync por archivo).
+        # Diarios anteriores, sin tamaños: solo se omiten las líneas ya completas al final
+        for ruta, grupo in groupby(operaciones['anexar'], key=lambda anexo: anexo[0]):
+            anexar_lineas(ruta, [linea for _, linea in grupo], solo_si_falta=tamanos is None)
+
+    @staticmethod
+    def recuperar(ruta_diario=RUTA_TRANSACCION, archivos=()):
+        """Completa una transacción confirmada e interrumpida y limpia temporales huérfanos.
+
+        Solo se borran los temporales de ``escribir_atomico`` (``.<archivo>.*.tmp``) del diario, de
+        los destinos que nombra y de ``archivos``: otros ``.tmp`` del directorio no son nuestros.
+        Devuelve True si había una transacción pendiente.
+        """
+        pendiente = False
+        try:
+            with open(ruta_diario, 'r', encoding='utf-8') as file:
+                operaciones = json.load(file)
+        except FileNotFoundError:
+            operaciones = None
+        conocidos = [ruta_diario, *archivos]
+        if operaciones is not None:
+            TransaccionArchivos._aplicar(operaciones)
+            os.remove(ruta_diario)
+            pendiente = True
+            conocidos.extend(destino for _, destino in operaciones['renombrar'])
+        for ruta in set(map(os.path.abspath, conocidos)):
+            directorio, nombre = os.path.split(ruta)
+            for huerfano in glob.glob(os.path.join(glob.escape(directorio), '.' + glob.escape(nombre) + '.*.tmp')):
+                os.remove(huerfano)
+        return pendiente
 
 
 # =======================
@@ -21,6 +287,7 @@ class PersistenciaCSV:
     """Maneja la lectura y escritura en archivos CSV para Productos y Clientes."""
 
     @staticmethod
+    @registro.cronometrar('persistencia.csv.leer')
     def leer_datos(nombre_archivo, campos):
         datos = []
         try:
@@ -36,13 +303,18 @@ class PersistenciaCSV:
         return datos
 
     @staticmethod
+    @registro.cronometrar('persistencia.csv.escribir')
     def escribir_datos(nombre_archivo, lista_objetos, campos):
-        """Escribe una lista de objetos (con método .to_dict()) al CSV."""
-        with open(nombre_archivo, mode='w', newline='', encoding='utf-8') as file:
-            writer = csv.DictWriter(file, fieldnames=campos)
-            writer.writeheader()
-            for obj in lista_objetos:
-                writer.writerow(obj.to_dict())
+        """Escribe una lista de objetos (con método .to_dict()) al CSV de forma atómica."""
+        escribir_atomico(nombre_archivo, lambda file: _volcar_csv(file, lista_objetos, campos), newline='')
+
+
+def _volcar_csv(file, lista_objetos, campos):
+    writer = csv.DictWriter(file, fieldnames=campos)
+    writer.writeheader()
+    for obj in lista_objetos:
+        # Objetos con to_dict() o filas ya leídas del CSV (fusión multiterminal)
+        writer.writerow(obj if isinstance(obj, dict) else obj.to_dict())
 
 
 # =======================
@@ -53,80 +325,196 @@ class PersistenciaJSON:
     """Maneja la lectura y escritura en archivos JSON para Pedidos."""
 
     @staticmethod
+    def ruta_diario(nombre_archivo):
+        """Devuelve la ruta del diario (JSON Lines) asociado al snapshot de pedidos."""
+        base, _ = os.path.splitext(nombre_archivo)
+        return base + '.jsonl'
+
+    @staticmethod
+    @registro.cronometrar('persistencia.json.leer_pedidos')
     def leer_pedidos(nombre_archivo):
+        """Reconstruye los pedidos a partir del snapshot más la cola del diario."""
         try:
             with open(nombre_archivo, 'r', encoding='utf-8') as file:
-                return json.load(file)
+                pedidos = json.load(file)
         except FileNotFoundError:
-            return []
+            pedidos = []
         except json.JSONDecodeError:
             print(
                 f"[bold yellow]Advertencia:[/bold yellow] Archivo '{nombre_archivo}' vacío o corrupto. Inicializando lista de pedidos vacía.")
-            return []
+            pedidos = []
+        if not isinstance(pedidos, list):
+            return pedidos
+
+        # Los pedidos del diario que ya estén en el snapshot (compactación interrumpida) se ignoran
+        ids_vistos = {p.get('id_pedido') for p in pedidos}
+        for pedido in PersistenciaJSON._leer_diario(nombre_archivo):
+            if pedido.get('id_pedido') not in ids_vistos:
+                ids_vistos.add(pedido.get('id_pedido'))
+                pedidos.append(pedido)
+        return pedidos
+
+    @staticmethod
+    def _leer_diario(nombre_archivo):
+        try:
+            with open(PersistenciaJSON.ruta_diario(nombre_archivo), 'r', encoding='utf-8') as file:
+                for linea in file:
+                    linea = linea.strip()
+                    if not linea:
+                        continue
+                    try:
+                        yield json.loads(linea)
+                    except json.JSONDecodeError:
+                        # Línea incompleta por un corte durante la escritura: se descarta
+                        continue
+        except FileNotFoundError:
+            return
+
+    @staticmethod
+    def lineas_diario(nombre_archivo):
+        """Cantidad de pedidos pendientes de compactar en el diario."""
+        try:
+            with open(PersistenciaJSON.ruta_diario(nombre_archivo), 'rb') as file:
+                return sum(1 for linea in file if linea.strip())
+        except FileNotFoundError:
+            return 0
 
     @staticmethod
+    @registro.cronometrar('persistencia.json.anexar_pedido')
+    def anexar_pedido(nombre_archivo, pedido):
+        """Agrega un pedido al final del diario: costo O(1) sin importar el historial."""
+        anexar_linea(PersistenciaJSON.ruta_diario(nombre_archivo), json.dumps(pedido))
+
+    @staticmethod
+    @registro.cronometrar('persistencia.json.escribir_pedidos')
     def escribir_pedidos(nombre_archivo, pedidos):
-        with open(nombre_archivo, 'w', encoding='utf-8') as file:
-            # Usamos indent=4 para que el JSON sea legible
-            json.dump(pedidos, file, indent=4)
+        escribir_atomico(nombre_archivo, lambda file: _volcar_pedidos(file, pedidos))
+
+    @staticmethod
+    @registro.cronometrar('persistencia.json.compactar_pedidos')
+    def compactar_pedidos(nombre_archivo, pedidos):
+        """Vuelca todos los pedidos al snapshot y vacía el diario."""
+        PersistenciaJSON.escribir_pedidos(nombre_archivo, pedidos)
+        try:
+            os.remove(PersistenciaJSON.ruta_diario(nombre_archivo))
+        except FileNotFoundError:
+            pass
 
     # --------------------------
     # Export / Utilities
     # --------------------------
 
     @staticmethod
-    def exportar_pedidos_excel(nombre_archivo: str, pedidos: List[Dict]):
+    def iterar_pedidos(nombre_archivo):
+        """Recorre los pedidos guardados (snapshot + diario) de a uno, sin cargarlos todos en memoria."""
+        # Como en leer_pedidos: lo del diario que ya está en el snapshot (compactación interrumpida) se omite
+        ids_vistos = set()
+        try:
+            with open(nombre_archivo, 'r', encoding='utf-8') as file:
+                for linea in file:
+                    linea = linea.strip().rstrip(',')
+                    if linea in ('', '[', ']', '[]'):
+                        continue
+                    try:
+                        pedido = json.loads(linea)
+                    except json.JSONDecodeError:
+                        pedido = None
+                    if not isinstance(pedido, dict):
+                        if ids_vistos:
+                            raise ValueError(f"Línea inválida en '{nombre_archivo}': {linea[:40]}")
+                        # Snapshot antiguo con indent=4 (o en una sola línea): no se puede leer por líneas
+                        yield from PersistenciaJSON.leer_pedidos(nombre_archivo)
+                        return
+                    ids_vistos.add(pedido.get('id_pedido'))
+                    yield pedido
+        except FileNotFoundError:
+            pass
+        for pedido in PersistenciaJSON._leer_diario(nombre_archivo):
+            if pedido.get('id_pedido') not in ids_vistos:
+                ids_vistos.add(pedido.get('id_pedido'))
+                yield pedido
+
+    @staticmethod
+    def filtrar_flujo(pedidos, desde=None, hasta=None, id_cliente=None):
+        """Generador que deja pasar los pedidos del rango de fechas (YYYY-MM-DD) y cliente indicados."""
+        for pedido in pedidos:
+            # Las fechas ISO se comparan bien como texto: no hace falta strptime por pedido
+            dia = (pedido.get('fecha_pedido') or '')[:10]
+            if desde and dia < desde:
+                continue
+            if hasta and dia > hasta:
+                continue
+            if id_cliente is not None and pedido.get('id_cliente') != id_cliente:
+                continue
+            yield pedido
+
+    @staticmethod
+    @registro.cronometrar('persistencia.exportar.excel')
+    def exportar_pedidos_excel(nombre_archivo: str, pedidos: Iterable[Dict], desde=None, hasta=None, id_cliente=None):
         """
         Exporta pedidos a un archivo Excel.
         Crea 2 hojas: 'Pedidos' (resumen por pedido) y 'Items' (cada producto por fila vinculando id_pedido).
+        Usa hojas de solo escritura y consume ``pedidos`` como flujo (lista o generador), así que
+        la memoria no crece con el historial. Devuelve la cantidad de pedidos exportados.
         """
-        wb = Workbook()
-        ws1 = wb.active
-        ws1.title = "Pedidos"
+        from openpyxl import Workbook
+        from openpyxl.utils import get_column_letter
+
+        wb = Workbook(write_only=True)
+        ws1 = wb.create_sheet(title="Pedidos")
+        ws2 = wb.create_sheet(title="Items")
 
-        # Encabezados resumen pedidos
         encabezados = ["id_pedido", "id_cliente", "nombre_cliente", "fecha_pedido", "total_pedido"]
-        ws1.append(encabezados)
+        encabezados_items = ["id_pedido", "id_producto", "nombre", "cantidad", "precio_unitario", "subtotal"]
+        # Ajustar ancho columnas de forma sencilla (en modo solo escritura va antes de la primera fila)
+        for ws, columnas in ((ws1, encabezados), (ws2, encabezados_items)):
+            for i, col in enumerate(columnas, 1):
+                ws.column_dimensions[get_column_letter(i)].width = max(len(col) + 2, 10)
+            ws.append(columnas)
 
-        for p in pedidos:
+        cantidad = 0
+        for p in PersistenciaJSON.filtrar_flujo(pedidos, desde, hasta, id_cliente):
             ws1.append([
                 p.get("id_pedido"),
                 p.get("id_cliente"),
                 p.get("nombre_cliente"),
                 p.get("fecha_pedido"),
-                p.get("total_pedido"),
+                _monto(p.get("total_pedido", 0)),
             ])
-
-        # Ajustar ancho columnas de forma sencilla
-        for i, col in enumerate(encabezados, 1):
-            ws1.column_dimensions[get_column_letter(i)].width = max(len(col) + 2, 10)
-
-        # Hoja de items
-        ws2 = wb.create_sheet(title="Items")
-        encabezados_items = ["id_pedido", "id_producto", "nombre", "cantidad", "precio_unitario", "subtotal"]
-        ws2.append(encabezados_items)
-
-        for p in pedidos:
             for it in p.get("items", []):
                 ws2.append([
                     p.get("id_pedido"),
                     it.get("id_producto"),
                     it.get("nombre"),
                     it.get("cantidad"),
-                    it.get("precio_unitario"),
-                    it.get("subtotal"),
+                    _monto(it.get("precio_unitario", 0)),
+                    _monto(it.get("subtotal", 0)),
                 ])
-        for i, col in enumerate(encabezados_items, 1):
-            ws2.column_dimensions[get_column_letter(i)].width = max(len(col) + 2, 10)
+            cantidad += 1
 
         wb.save(nombre_archivo)
+        if registro.activo:
+            registro.contar('persistencia.bytes_escritos', os.path.getsize(nombre_archivo), formato='xlsx')
+        return cantidad
 
     @staticmethod
-    def exportar_pedidos_pdf(nombre_archivo: str, pedidos: List[Dict], titulo: str = "Reporte de Pedidos"):
+    @registro.cronometrar('persistencia.exportar.pdf')
+    def exportar_pedidos_pdf(nombre_archivo: str, pedidos: Iterable[Dict], titulo: str = "Reporte de Pedidos",
+                             solo_resumen: bool = False, progreso=None, desde=None, hasta=None, id_cliente=None):
         """
         Exporta un PDF con un resumen de pedidos y una tabla de items.
         Usa reportlab; la salida es básica pero legible.
+
+        Las tablas se arman por bloques del tamaño de una página a medida que se leen los pedidos,
+        así reportlab maqueta cada bloque por separado en lugar de una tabla gigante.
+        Con ``solo_resumen`` se imprimen totales por mes y por cliente en lugar de cada pedido e item.
+        ``progreso(hechos, total)`` se llama mientras se dibujan los bloques.
+        Devuelve la cantidad de pedidos incluidos.
         """
+        from reportlab.lib.pagesizes import landscape, letter
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+
         doc = SimpleDocTemplate(nombre_archivo, pagesize=landscape(letter), rightMargin=18, leftMargin=18, topMargin=18, bottomMargin=18)
         styles = getSampleStyleSheet()
         flowables = []
@@ -134,60 +522,70 @@ class PersistenciaJSON:
         flowables.append(Paragraph(titulo, styles["Title"]))
         flowables.append(Spacer(1, 8))
 
-        # Tabla resumen de pedidos
-        pedidos_encabezado = ["ID", "Fecha", "Cliente", "Total"]
-        datos_pedidos = [pedidos_encabezado]
-        for p in pedidos:
-            datos_pedidos.append([
-                str(p.get("id_pedido", "")),
-                p.get("fecha_pedido", ""),
-                p.get("nombre_cliente", ""),
-                f"{p.get('total_pedido', 0):.2f}"
-            ])
+        cantidad = 0
+        flujo = PersistenciaJSON.filtrar_flujo(pedidos, desde, hasta, id_cliente)
+        if solo_resumen:
+            # Los mismos acumulados que usa el menú de reportes (agregados.AgregadosVentas)
+            agregados = AgregadosVentas.desde_pedidos(flujo)
+            cantidad = agregados.pedidos
 
-        t = RLTable(datos_pedidos, repeatRows=1)
-        t.setStyle(TableStyle([
-            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#0f766e")),
-            ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-            ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-            ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
-            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-            ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
-        ]))
-        flowables.append(t)
-        flowables.append(Spacer(1, 12))
-
-        # Items: lista todos los items (puede ser larga)
-        items_encabezado = ["Pedido ID", "ID Producto", "Nombre", "Cantidad", "Precio unit.", "Subtotal"]
-        datos_items = [items_encabezado]
-        for p in pedidos:
-            for it in p.get("items", []):
-                datos_items.append([
+            flowables.append(Paragraph(f"Pedidos: {cantidad} — Total vendido: {formatear(agregados.total_centavos)}", styles["Heading2"]))
+            meses = _TablasPorBloques(["Mes", "Pedidos", "Total"], [200, 120, 150], "#0f766e")
+            for mes, n, monto in agregados.ventas_por_mes():
+                meses.agregar([mes, str(n), f"{monto:.2f}"])
+            clientes = _TablasPorBloques(["Cliente", "Pedidos", "Total"], [300, 120, 150], "#0ea5a4")
+            for cliente, n, monto in agregados.top_clientes(limite=None):
+                clientes.agregar([cliente, str(n), f"{monto:.2f}"])
+            flowables.append(Paragraph("Ventas por mes", styles["Heading2"]))
+            flowables.extend(meses.cerrar())
+            flowables.append(Paragraph("Ventas por cliente", styles["Heading2"]))
+            flowables.extend(clientes.cerrar())
+        else:
+            # Tabla resumen de pedidos e items: lista todos los items (puede ser larga)
+            resumen = _TablasPorBloques(["ID", "Fecha", "Cliente", "Total"], [60, 130, 360, 100], "#0f766e")
+            items = _TablasPorBloques(["Pedido ID", "ID Producto", "Nombre", "Cantidad", "Precio unit.", "Subtotal"],
+                                      [70, 80, 330, 70, 90, 90], "#0ea5a4")
+            for p in flujo:
+                resumen.agregar([
                     str(p.get("id_pedido", "")),
-                    str(it.get("id_producto", "")),
-                    it.get("nombre", ""),
-                    str(it.get("cantidad", "")),
-                    f"{it.get('precio_unitario', 0):.2f}",
-                    f"{it.get('subtotal', 0):.2f}"
+                    p.get("fecha_pedido", ""),
+                    p.get("nombre_cliente", ""),
+                    formatear(a_centavos(p.get('total_pedido', 0)))
                 ])
+                for it in p.get("items", []):
+                    items.agregar([
+                        str(p.get("id_pedido", "")),
+                        str(it.get("id_producto", "")),
+                        it.get("nombre", ""),
+                        str(it.get("cantidad", "")),
+                        formatear(a_centavos(it.get('precio_unitario', 0))),
+                        formatear(a_centavos(it.get('subtotal', 0)))
+                    ])
+                cantidad += 1
 
-        if len(datos_items) > 1:
-            ti = RLTable(datos_items, repeatRows=1)
-            ti.setStyle(TableStyle([
-                ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#0ea5a4")),
-                ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-                ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
-                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-            ]))
-            flowables.append(Paragraph("Items por pedido", styles["Heading2"]))
-            flowables.append(ti)
+            flowables.extend(resumen.cerrar())
+            flowables.append(Spacer(1, 12))
+            tablas_items = items.cerrar()
+            if tablas_items:
+                flowables.append(Paragraph("Items por pedido", styles["Heading2"]))
+                flowables.extend(tablas_items)
 
+        if progreso is not None:
+            total_flowables = len(flowables)
+            doc.setProgressCallBack(
+                lambda tipo, valor: progreso(valor, total_flowables) if tipo == 'PROGRESS' else None)
         doc.build(flowables)
+        if registro.activo:
+            registro.contar('persistencia.bytes_escritos', os.path.getsize(nombre_archivo), formato='pdf')
+        return cantidad
 
     @staticmethod
     def filtrar_pedidos_por_fecha(pedidos, desde=None, hasta=None):
-        """Filtra los pedidos según un rango de fechas (YYYY-MM-DD)."""
+        """Filtra una lista cualquiera de pedidos según un rango de fechas (YYYY-MM-DD).
+
+        Recorre toda la lista; para el historial de la tienda use ``Tienda.filtrar_pedidos_por_fecha``,
+        que consulta un índice ordenado.
+        """
         import datetime
 
         def parse_fecha(fecha_str):
@@ -201,7 +599,8 @@ class PersistenciaJSON:
 
         pedidos_filtrados = []
         for pedido in pedidos:
-            fecha_pedido = parse_fecha(pedido.get("fecha"))
+            # --- Corrección: la clave es 'fecha_pedido' y trae hora ---
+            fecha_pedido = parse_fecha((pedido.get("fecha_pedido") or "")[:10])
             if not fecha_pedido:
                 continue
 
@@ -213,3 +612,459 @@ class PersistenciaJSON:
             pedidos_filtrados.append(pedido)
 
         return pedidos_filtrados
+
+
+FILAS_POR_TABLA = 30
+
+
+def _monto(valor):
+    # Redondeado al centavo: la celda muestra el mismo valor que el JSON sin residuos de float
+    return a_pesos(a_centavos(valor))
+
+
+class _TablasPorBloques:
+    """Arma tablas de a FILAS_POR_TABLA filas (una página) a medida que llegan las filas."""
+
+    def __init__(self, encabezado, anchos, color_encabezado):
+        from reportlab.lib import colors
+        from reportlab.platypus import TableStyle
+
+        self.encabezado = encabezado
+        self.anchos = anchos
+        self.estilo = TableStyle([
+            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor(color_encabezado)),
+            ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+            ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+            ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+            ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
+        ])
+        self.tablas = []
+        self._filas = [encabezado]
+
+    def agregar(self, fila):
+        self._filas.append(fila)
+        if len(self._filas) > FILAS_POR_TABLA:
+            self._cortar()
+
+    def _cortar(self):
+        from reportlab.platypus import Table as RLTable
+
+        # Anchos fijos para que las columnas coincidan entre bloques
+        tabla = RLTable(self._filas, colWidths=self.anchos, repeatRows=1)
+        tabla.setStyle(self.estilo)
+        self.tablas.append(tabla)
+        self._filas = [self.encabezado]
+
+    def cerrar(self):
+        if len(self._filas) > 1:
+            self._cortar()
+        return self.tablas
+
+
+# =======================
+# Almacenamiento configurable
+# =======================
+
+class PersistenciaArchivos:
+    """Almacenamiento por defecto: productos y clientes en CSV, pedidos en snapshot JSON + diario.
+
+    Un pedido solo anexa su línea al diario: el descuento de stock son sus items. ``stock.json``
+    guarda hasta qué pedido está incluido el stock de productos.csv; al cargar se descuentan los
+    pedidos posteriores del diario y al compactar se pliegan al CSV antes de vaciarlo.
+
+    Todas las implementaciones de almacenamiento exponen los mismos métodos
+    (``cargar_*``, ``guardar_*`` y ``registrar_pedido``) para que ``Tienda`` no dependa del formato.
+
+    Con ``compartido=True`` varias terminales (procesos) usan el mismo directorio: las escrituras se
+    hacen bajo ``tienda.lock`` fusionando con lo que hay en disco, el stock se confirma solo si la
+    versión del producto no cambió (si cambió: ``ConflictoVersion``) y los IDs salen de secuencias.json.
+    """
+
+    compartido = False
+
+    def __init__(self, directorio='.', compartido=False):
+        self.archivo_productos = os.path.join(directorio, 'productos.csv')
+        self.archivo_clientes = os.path.join(directorio, 'clientes.csv')
+        self.archivo_pedidos = os.path.join(directorio, 'pedidos.json')
+        # Si existe, el snapshot binario (ver persistencia_binaria.py) reemplaza a pedidos.json
+        self.archivo_binario = os.path.join(directorio, 'pedidos.bin')
+        self.archivo_transaccion = os.path.join(directorio, RUTA_TRANSACCION)
+        self.archivo_secuencias = os.path.join(directorio, 'secuencias.json')
+        self.archivo_agregados = os.path.join(directorio, 'agregados.json')
+        # Último pedido cuyo descuento de stock ya está en productos.csv (ver _ventas_sin_plegar)
+        self.archivo_stock = os.path.join(directorio, 'stock.json')
+        self.archivo_bloqueo = os.path.join(directorio, RUTA_BLOQUEO)
+        self.compartido = compartido
+        # El bloqueo de archivo no es reentrante: dentro del proceso se cuenta el anidamiento
+        self._cerrojo = threading.RLock()
+        self._nivel_bloqueo = 0
+        # Identidad del snapshot de pedidos leído; si cambia, otra terminal compactó el diario
+        self._firma_pedidos = None
+        self._posicion_diario = 0
+        # Último pedido descontado del stock que tiene este proceso en memoria (None: no se cargó del almacén)
+        self._stock_hasta = None
+        # Completar una compra que quedó a medio confirmar antes de leer los archivos (con otras
+        # terminales activas, bajo el bloqueo: sus temporales en curso no son huérfanos)
+        with self._exclusivo():
+            TransaccionArchivos.recuperar(self.archivo_transaccion, self.archivos())
+            if self.compartido:
+                # Las terminales leen el stock del CSV: tiene que incluir lo que quedó en el diario
+                self._plegar_stock()
+        self.pedidos_en_diario = 0
+
+    def archivos(self):
+        """Archivos del almacén que se reemplazan con ``escribir_atomico`` (sus temporales son nuestros)."""
+        return [self.archivo_productos, self.archivo_clientes, self.archivo_pedidos, self.archivo_binario,
+                self.archivo_secuencias, self.archivo_agregados, self.archivo_stock]
+
+    def cargar_productos(self):
+        filas = PersistenciaCSV.leer_datos(self.archivo_productos, CAMPOS_PRODUCTO)
+        if self.compartido:
+            return filas  # entre terminales el CSV siempre tiene el stock al día
+        descuentos, self._stock_hasta = self._ventas_sin_plegar()
+        return _descontar(filas, descuentos)
+
+    def _leer_stock_hasta(self):
+        """ID del último pedido incluido en el stock del CSV; None si no hay stock.json (datos anteriores)."""
+        try:
+            with open(self.archivo_stock, 'r', encoding='utf-8') as file:
+                return int(json.load(file)['hasta_id_pedido'])
+        except FileNotFoundError:
+            return None
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+            return 0
+
+    def _ventas_sin_plegar(self):
+        """({id_producto: unidades} de los pedidos del diario que faltan en el CSV, último ID de pedido)."""
+        hasta = self._leer_stock_hasta()
+        diario = list(PersistenciaJSON._leer_diario(self.archivo_pedidos))
+        ultimo = max([hasta or 0] + [pedido.get('id_pedido', 0) for pedido in diario])
+        if hasta is None:
+            # Sin stock.json el CSV se reescribía en cada pedido: ya incluye todo el diario
+            return {}, ultimo
+        descuentos = {}
+        ids_vistos = set()
+        for pedido in diario:
+            id_pedido = pedido.get('id_pedido', 0)
+            if id_pedido > hasta and id_pedido not in ids_vistos:
+                ids_vistos.add(id_pedido)
+                for item in pedido.get('items', []):
+                    descuentos[item['id_producto']] = descuentos.get(item['id_producto'], 0) + item['cantidad']
+        return descuentos, ultimo
+
+    def _plegar_stock(self):
+        """Pasa al CSV los descuentos del diario (antes de vaciarlo). Costo O(catálogo), solo al compactar."""
+        descuentos, ultimo = self._ventas_sin_plegar()
+        if self._leer_stock_hasta() == ultimo:
+            return
+        with TransaccionArchivos(self.archivo_transaccion) as tx:
+            if descuentos:
+                filas = _descontar(PersistenciaCSV.leer_datos(self.archivo_productos, CAMPOS_PRODUCTO), descuentos)
+                tx.escribir_csv(self.archivo_productos, filas, CAMPOS_PRODUCTO)
+            tx.escribir_json(self.archivo_stock, {'hasta_id_pedido': ultimo})
+
+    def cargar_clientes(self):
+        return PersistenciaCSV.leer_datos(self.archivo_clientes, CAMPOS_CLIENTE)
+
+    def usa_snapshot_binario(self):
+        return os.path.exists(self.archivo_binario)
+
+    @contextmanager
+    def bloqueo(self):
+        """Exclusión mutua con las demás terminales (y con los otros hilos de este proceso)."""
+        with self._cerrojo:
+            self._nivel_bloqueo += 1
+            try:
+                if self._nivel_bloqueo == 1:
+                    with bloqueo_archivo(self.archivo_bloqueo):
+                        yield
+                else:
+                    yield
+            finally:
+                self._nivel_bloqueo -= 1
+
+    def _exclusivo(self):
+        # Solo en modo multiterminal: un único proceso no necesita (ni crea) tienda.lock
+        return self.bloqueo() if self.compartido else nullcontext()
+
+    def _snapshot_pedidos(self):
+        return self.archivo_binario if self.usa_snapshot_binario() else self.archivo_pedidos
+
+    def _firma_snapshot(self):
+        try:
+            estado = os.stat(self._snapshot_pedidos())
+        except FileNotFoundError:
+            return None
+        return estado.st_ino, estado.st_mtime_ns, estado.st_size
+
+    def cargar_pedidos(self):
+        self.pedidos_en_diario = PersistenciaJSON.lineas_diario(self.archivo_pedidos)
+        self._firma_pedidos = self._firma_snapshot()
+        # pedidos_nuevos lee el diario desde acá (la primera vez, completo: filtra por ID)
+        self._posicion_diario = 0
+        if self.usa_snapshot_binario():
+            from persistencia_binaria import PersistenciaBinaria
+            pedidos = PersistenciaBinaria.leer_pedidos(self.archivo_binario)
+            # Los IDs crecen: lo que el diario tenga hasta el último ID del snapshot ya está incluido
+            ultimo = pedidos[-1].get('id_pedido', 0) if len(pedidos) else 0
+            for pedido in PersistenciaJSON._leer_diario(self.archivo_pedidos):
+                if pedido.get('id_pedido', 0) > ultimo:
+                    pedidos.append(pedido)
+                    ultimo = pedido['id_pedido']
+            return pedidos
+        pedidos = PersistenciaJSON.leer_pedidos(self.archivo_pedidos)
+        return pedidos if isinstance(pedidos, list) else []
+
+    def pedidos_nuevos(self, ultimo_id):
+        """Pedidos del diario con ID mayor a ``ultimo_id`` (los de otras terminales).
+
+        Devuelve None si otra terminal compactó el diario desde la última carga: hay que recargar todo.
+        """
+        if self._firma_snapshot() != self._firma_pedidos:
+            return None
+        try:
+            with open(PersistenciaJSON.ruta_diario(self.archivo_pedidos), 'rb') as file:
+                file.seek(self._posicion_diario)
+                datos = file.read()
+        except FileNotFoundError:
+            datos = b''
+        # Solo líneas completas: la última puede estar a medio escribir y se lee en la próxima llamada
+        fin = datos.rfind(b'\n') + 1
+        if not self._posicion_diario:
+            self.pedidos_en_diario = 0  # se vuelven a contar todas las líneas
+        self._posicion_diario += fin
+        nuevos = []
+        for linea in datos[:fin].splitlines():
+            try:
+                pedido = json.loads(linea)
+            except json.JSONDecodeError:
+                continue
+            self.pedidos_en_diario += 1
+            if pedido.get('id_pedido', 0) > ultimo_id:
+                nuevos.append(pedido)
+        return nuevos
+
+    def leer_registros(self, coleccion, ids):
+        """{id: fila} actual en disco de los productos o clientes ``ids`` (los que existan)."""
+        archivo, campos = self._csv(coleccion)
+        buscados = set(ids)
+        return {int(fila[campos[0]]): fila for fila in PersistenciaCSV.leer_datos(archivo, campos)
+                if int(fila[campos[0]]) in buscados}
+
+    def _csv(self, coleccion):
+        if coleccion == 'productos':
+            return self.archivo_productos, CAMPOS_PRODUCTO
+        return self.archivo_clientes, CAMPOS_CLIENTE
+
+    def reservar_id(self, entidad, minimo=1):
+        """Próximo ID de ``entidad`` tomado de la secuencia compartida (nunca menor que ``minimo``)."""
+        with self.bloqueo():
+            secuencias = self.cargar_secuencias()
+            nuevo = max(secuencias.get(entidad, 0) + 1, minimo)
+            secuencias[entidad] = nuevo
+            self.guardar_secuencias(secuencias)
+            return nuevo
+
+    def cargar_secuencias(self):
+        try:
+            with open(self.archivo_secuencias, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def guardar_secuencias(self, secuencias):
+        with self._exclusivo():
+            if self.compartido:
+                # Otra terminal pudo avanzar una secuencia: nunca se guarda un valor menor
+                guardadas = self.cargar_secuencias()
+                secuencias = {k: max(guardadas.get(k, 0), secuencias.get(k, 0)) for k in {**guardadas, **secuencias}}
+            escribir_atomico(self.archivo_secuencias, lambda file: json.dump(secuencias, file))
+
+    def cargar_agregados(self):
+        """Acumulados de ventas guardados (dict) o None si no hay o están dañados."""
+        try:
+            with open(self.archivo_agregados, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def guardar_agregados(self, agregados):
+        with self._exclusivo():
+            escribir_atomico(self.archivo_agregados, lambda file: json.dump(agregados, file))
+
+    def guardar_productos(self, productos, ids=None):
+        if self.compartido and ids is not None:
+            with self.bloqueo():
+                filas = self._fusionar('productos', productos, ids)
+                PersistenciaCSV.escribir_datos(self.archivo_productos, filas, CAMPOS_PRODUCTO)
+            self._avanzar_versiones(productos, ids)
+            return
+        # En CSV no hay escritura por fila: siempre se reescribe el archivo completo
+        if self.compartido:
+            PersistenciaCSV.escribir_datos(self.archivo_productos, list(productos.values()), CAMPOS_PRODUCTO)
+            return
+        # El stock en memoria ya descuenta los pedidos del diario: stock.json avanza junto con el CSV
+        if self._stock_hasta is None:
+            self._stock_hasta = self._ventas_sin_plegar()[1]
+        if self._leer_stock_hasta() == self._stock_hasta:
+            PersistenciaCSV.escribir_datos(self.archivo_productos, list(productos.values()), CAMPOS_PRODUCTO)
+            return
+        with TransaccionArchivos(self.archivo_transaccion) as tx:
+            tx.escribir_csv(self.archivo_productos, list(productos.values()), CAMPOS_PRODUCTO)
+            tx.escribir_json(self.archivo_stock, {'hasta_id_pedido': self._stock_hasta})
+
+    def guardar_clientes(self, clientes, ids=None):
+        if self.compartido and ids is not None:
+            with self.bloqueo():
+                filas = self._fusionar('clientes', clientes, ids)
+                PersistenciaCSV.escribir_datos(self.archivo_clientes, filas, CAMPOS_CLIENTE)
+            return
+        PersistenciaCSV.escribir_datos(self.archivo_clientes, list(clientes.values()), CAMPOS_CLIENTE)
+
+    def _fusionar(self, coleccion, locales, ids):
+        """Filas del CSV en disco con las de ``ids`` reemplazadas por las locales (llamar bajo el bloqueo).
+
+        En productos, cada fila reemplazada debe seguir en la versión que se leyó; si no, ``ConflictoVersion``.
+        """
+        archivo, campos = self._csv(coleccion)
+        clave = campos[0]
+        filas = {int(fila[clave]): {c: fila.get(c) for c in campos} for fila in PersistenciaCSV.leer_datos(archivo, campos)}
+        if coleccion == 'productos':
+            conflictos = [i for i in ids if i in locales and i in filas
+                          and int(filas[i]['version'] or 0) != locales[i].version]
+            if conflictos:
+                raise ConflictoVersion(conflictos)
+        for i in ids:
+            if i not in locales:
+                filas.pop(i, None)
+            elif coleccion == 'productos':
+                filas[i] = dict(locales[i].to_dict(), version=locales[i].version + 1)
+            else:
+                filas[i] = locales[i].to_dict()
+        return list(filas.values())
+
+    @staticmethod
+    def _avanzar_versiones(productos, ids):
+        # Recién confirmada la escritura: los objetos en memoria pasan a la versión guardada
+        for i in ids:
+            if i in productos:
+                productos[i].version += 1
+
+    def compactar_pedidos(self):
+        """Compacta desde disco, bajo el bloqueo: incluye los pedidos de todas las terminales."""
+        with self.bloqueo():
+            self.guardar_pedidos(self.cargar_pedidos())
+
+    def guardar_pedidos(self, pedidos):
+        """Compacta: vuelca todos los pedidos al snapshot y vacía el diario."""
+        self._plegar_stock()
+        if self.usa_snapshot_binario():
+            from persistencia_binaria import PersistenciaBinaria
+            PersistenciaBinaria.escribir_pedidos(self.archivo_binario, pedidos)
+            self._vaciar_diario()
+        else:
+            PersistenciaJSON.compactar_pedidos(self.archivo_pedidos, pedidos)
+        self.pedidos_en_diario = 0
+
+    def _vaciar_diario(self):
+        try:
+            os.remove(PersistenciaJSON.ruta_diario(self.archivo_pedidos))
+        except FileNotFoundError:
+            pass
+
+    def convertir_pedidos(self, formato):
+        """Pasa el historial (snapshot + diario) a 'binario' (pedidos.bin) o a 'json' (pedidos.json).
+
+        El snapshot del otro formato queda como respaldo con extensión .bak. Devuelve la cantidad de pedidos.
+        """
+        from persistencia_binaria import PersistenciaBinaria
+        if formato not in ('binario', 'json'):
+            raise ValueError(f"Formato de pedidos desconocido: {formato}")
+        pedidos = self.cargar_pedidos()
+        self._plegar_stock()
+        # Orden seguro ante cortes: snapshot nuevo, respaldo del anterior y recién ahí vaciar el diario
+        if formato == 'binario':
+            PersistenciaBinaria.escribir_pedidos(self.archivo_binario, pedidos)
+            anterior = self.archivo_pedidos
+        else:
+            PersistenciaJSON.escribir_pedidos(self.archivo_pedidos, pedidos)
+            anterior = self.archivo_binario
+        if os.path.exists(anterior):
+            os.replace(anterior, anterior + '.bak')
+        self._vaciar_diario()
+        self.pedidos_en_diario = 0
+        return len(pedidos)
+
+    def registrar_pedido(self, pedido, productos, ids_modificados):
+        self.registrar_pedidos([pedido], productos, ids_modificados)
+
+    def registrar_pedidos(self, pedidos, productos, ids_modificados):
+        """Confirma un lote de pedidos con un solo fsync del diario; el stock se descuenta de sus items."""
+        if self.compartido:
+            self._registrar_pedido_compartido(pedidos, productos, ids_modificados)
+            return
+        # El diario de intención deja el diario sin líneas cortadas si hay un corte a mitad de la escritura
+        with TransaccionArchivos(self.archivo_transaccion) as tx:
+            if not os.path.exists(self.archivo_stock):
+                # Datos anteriores a stock.json: una única vez se guarda el stock junto con el primer pedido
+                tx.escribir_csv(self.archivo_productos, list(productos.values()), CAMPOS_PRODUCTO)
+                tx.escribir_json(self.archivo_stock, {'hasta_id_pedido': pedidos[-1]['id_pedido']})
+            tx.anexar_pedidos(self.archivo_pedidos, pedidos)
+        self._stock_hasta = pedidos[-1]['id_pedido']
+        self.pedidos_en_diario += len(pedidos)
+
+    def _registrar_pedido_compartido(self, pedidos, productos, ids_modificados):
+        # Todo bajo el bloqueo: verificar versiones, numerar el pedido y confirmar stock + diario.
+        # El ID se asigna acá para que el diario quede en orden creciente de ID entre terminales.
+        with self.bloqueo():
+            filas = self._fusionar('productos', productos, ids_modificados)
+            secuencias = self.cargar_secuencias()
+            ultimo = secuencias.get('pedidos', 0)
+            for pedido in pedidos:
+                pedido['id_pedido'] = ultimo = max(ultimo + 1, pedido.get('id_pedido') or 0)
+            with TransaccionArchivos(self.archivo_transaccion) as tx:
+                # Entre terminales el stock se confirma en el CSV con cada pedido (control de versiones)
+                tx.escribir_csv(self.archivo_productos, filas, CAMPOS_PRODUCTO)
+                tx.escribir_json(self.archivo_stock, {'hasta_id_pedido': ultimo})
+                tx.anexar_pedidos(self.archivo_pedidos, pedidos)
+            secuencias['pedidos'] = ultimo
+            self.guardar_secuencias(secuencias)
+        # pedidos_en_diario lo lleva pedidos_nuevos, que también lee las líneas de esta terminal
+        self._avanzar_versiones(productos, ids_modificados)
+
+
+def _descontar(filas, descuentos):
+    """Filas de productos.csv con el stock menos ``descuentos`` ({id_producto: unidades})."""
+    if descuentos:
+        for fila in filas:
+            unidades = descuentos.get(int(fila['id_producto']), 0)
+            if unidades:
+                fila['stock'] = str(int(fila['stock']) - unidades)
+    return filas
+
+
+def crear_almacen(tipo=None, ruta=None):
+    """Crea el almacenamiento según la configuración.
+
+    ``tipo`` es 'archivos' (por defecto) o 'sqlite'; si no se indica se toma de la variable de
+    entorno TIENDA_ALMACEN. ``ruta`` es el directorio de datos o el archivo .db (TIENDA_RUTA).
+    """
+    tipo = tipo or os.environ.get('TIENDA_ALMACEN', 'archivos')
+    ruta = ruta or os.environ.get('TIENDA_RUTA')
+    # Varias terminales sobre los mismos datos (ver PersistenciaArchivos)
+    compartido = os.environ.get('TIENDA_MULTITERMINAL', '0') == '1'
+    if tipo == 'archivos':
+        return PersistenciaArchivos(ruta or '.', compartido)
+    if tipo == 'sqlite':
+        from persistencia_sqlite import PersistenciaSQLite
+        return PersistenciaSQLite(ruta or 'tienda.db', compartido)
+    raise ValueError(f"Tipo de almacenamiento desconocido: {tipo}")
+
+
+def _volcar_pedidos(file, pedidos):
+    # Un pedido por línea: sigue siendo un arreglo JSON válido y es mucho más compacto que indent=4
+    file.write('[\n')
+    for i, pedido in enumerate(pedidos):
+        file.write(('' if i == 0 else ',\n') + json.dumps(dict(pedido)))
+    file.write('\n]\n')
@@ -0,0 +1,103 @@
+# persistencia_binaria.py
+import json
+import mmap
+import struct
+import sys
+from array import array
+
+from lista_pedidos import COLUMNAS_ITEM, COLUMNAS_PEDIDO, ListaPedidos, ListaPedidosMapeada
+from persistencia import escribir_atomico
+
+# =======================
+# Snapshot binario de pedidos
+# =======================
+#
+# Formato (enteros little-endian de 8 bytes, secciones alineadas a 8 bytes):
+#   cabecera   MAGICO, pedidos (n), items (m), textos (t), bytes de textos, bytes de irregulares
+#   pedidos    una columna por campo de COLUMNAS_PEDIDO: n enteros cada una (inicio_items: n + 1)
+#   items      una columna por campo de COLUMNAS_ITEM: m enteros cada una
+#   textos     t + 1 desplazamientos y los nombres en UTF-8 uno tras otro
+#   irregulares  JSON {posición: pedido} de los pedidos que no encajan en columnas (puede faltar)
+# Los IDs, fechas (segundos desde 1970) y montos (centavos) ocupan un tamaño fijo por registro, así
+# el pedido i se lee directo de su posición sin recorrer los anteriores.
+
+MAGICO = b'TIENDAP1'
+CABECERA = struct.Struct('<8sQQQQQ')
+
+
+def _relleno(largo):
+    return -largo % 8
+
+
+def _little_endian(columna):
+    if sys.byteorder == 'little':
+        return columna
+    copia = array('q', columna)
+    copia.byteswap()
+    return copia
+
+
+class PersistenciaBinaria:
+    """Lee y escribe el snapshot de pedidos en formato binario por columnas (``pedidos.bin``)."""
+
+    @staticmethod
+    def escribir_pedidos(nombre_archivo, pedidos):
+        lista = pedidos if isinstance(pedidos, ListaPedidos) else ListaPedidos(pedidos)
+        escribir_atomico(nombre_archivo, lambda file: PersistenciaBinaria._volcar(file, lista), binario=True)
+        return len(lista)
+
+    @staticmethod
+    def _volcar(file, lista):
+        columnas = lista.columnas()
+        textos = [texto.encode('utf-8') for texto in lista.textos]
+        desplazamientos = array('q', [0])
+        for texto in textos:
+            desplazamientos.append(desplazamientos[-1] + len(texto))
+        nombres = b''.join(textos)
+        irregulares = lista.irregulares
+        extra = json.dumps({str(k): v for k, v in irregulares.items()}).encode('utf-8') if irregulares else b''
+
+        file.write(CABECERA.pack(MAGICO, len(lista), len(columnas['item_producto']), len(textos),
+                                 len(nombres), len(extra)))
+        for nombre in COLUMNAS_PEDIDO + COLUMNAS_ITEM:
+            file.write(_little_endian(columnas[nombre]))
+        file.write(_little_endian(desplazamientos))
+        file.write(nombres + b'\0' * _relleno(len(nombres)))
+        file.write(extra)
+
+    @staticmethod
+    def leer_pedidos(nombre_archivo):
+        """Abre el snapshot con mmap y devuelve una ``ListaPedidosMapeada`` (no lee las columnas)."""
+        with open(nombre_archivo, 'rb') as file:
+            mapa = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(mapa) < CABECERA.size:
+            raise ValueError(f"Snapshot binario incompleto: {nombre_archivo}")
+        magico, n, m, t, largo_nombres, largo_extra = CABECERA.unpack_from(mapa, 0)
+        esperado = CABECERA.size + 8 * (6 * n + 1 + 5 * m + t + 1) + largo_nombres + _relleno(largo_nombres) + largo_extra
+        if magico != MAGICO or len(mapa) != esperado:
+            raise ValueError(f"Snapshot binario inválido: {nombre_archivo}")
+
+        vista = memoryview(mapa)
+        posicion = CABECERA.size
+
+        def columna(cantidad):
+            nonlocal posicion
+            datos = vista[posicion:posicion + 8 * cantidad]
+            posicion += 8 * cantidad
+            if sys.byteorder == 'little':
+                return datos.cast('q')
+            copia = array('q', bytes(datos))
+            copia.byteswap()
+            return copia
+
+        columnas = {nombre: columna(n + 1 if nombre == 'inicio_items' else n) for nombre in COLUMNAS_PEDIDO}
+        columnas.update((nombre, columna(m)) for nombre in COLUMNAS_ITEM)
+        desplazamientos = columna(t + 1)
+        nombres = bytes(vista[posicion:posicion + largo_nombres])
+        posicion += largo_nombres + _relleno(largo_nombres)
+        # Los nombres distintos son pocos (clientes y productos): se decodifican todos al abrir
+        textos = [nombres[desplazamientos[i]:desplazamientos[i + 1]].decode('utf-8') for i in range(t)]
+        irregulares = {}
+        if largo_extra:
+            irregulares = {int(k): v for k, v in json.loads(bytes(vista[posicion:posicion + largo_extra])).items()}
+        return ListaPedidosMapeada(columnas, textos, irregulares, recurso=mapa)
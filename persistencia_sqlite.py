@@ -0,0 +1,352 @@
+# persistencia_sqlite.py
+import json
+import sqlite3
+from contextlib import contextmanager
+
+from busqueda import normalizar_codigo
+from persistencia import ConflictoVersion
+
+# =======================
+# Lógica de Persistencia SQLite
+# =======================
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS productos (
+    id_producto INTEGER PRIMARY KEY,
+    nombre      TEXT    NOT NULL,
+    precio      REAL    NOT NULL,
+    stock       INTEGER NOT NULL,
+    version     INTEGER NOT NULL DEFAULT 0,
+    codigo      TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_productos_nombre ON productos (nombre COLLATE NOCASE);
+
+CREATE TABLE IF NOT EXISTS clientes (
+    id_cliente INTEGER PRIMARY KEY,
+    nombre     TEXT NOT NULL,
+    email      TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS pedidos (
+    id_pedido      INTEGER PRIMARY KEY,
+    id_cliente     INTEGER NOT NULL,
+    nombre_cliente TEXT,
+    fecha_pedido   TEXT    NOT NULL,
+    total_pedido   REAL    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_pedidos_cliente ON pedidos (id_cliente);
+CREATE INDEX IF NOT EXISTS idx_pedidos_fecha ON pedidos (fecha_pedido);
+
+CREATE TABLE IF NOT EXISTS items_pedido (
+    id_pedido       INTEGER NOT NULL REFERENCES pedidos (id_pedido),
+    linea           INTEGER NOT NULL,
+    id_producto     INTEGER NOT NULL,
+    nombre          TEXT,
+    cantidad        INTEGER NOT NULL,
+    precio_unitario REAL    NOT NULL,
+    subtotal        REAL    NOT NULL,
+    PRIMARY KEY (id_pedido, linea)
+);
+
+CREATE TABLE IF NOT EXISTS secuencias (
+    entidad TEXT PRIMARY KEY,
+    ultimo  INTEGER NOT NULL
+);
+
+-- Acumulados de ventas (agregados.AgregadosVentas) serializados como JSON
+CREATE TABLE IF NOT EXISTS agregados (
+    clave TEXT PRIMARY KEY,
+    datos TEXT NOT NULL
+);
+"""
+
+
+class PersistenciaSQLite:
+    """Guarda productos, clientes, pedidos e items en un archivo SQLite.
+
+    Expone la misma interfaz que ``PersistenciaArchivos`` pero actualiza fila por fila:
+    descontar stock es un UPDATE y registrar un pedido son unos pocos INSERT en una transacción.
+
+    Con ``compartido=True`` (varias terminales sobre la misma base) el stock se descuenta con un
+    UPDATE condicionado a la versión leída del producto y los IDs se numeran dentro de la transacción.
+    """
+
+    # SQLite no tiene diario que compactar
+    pedidos_en_diario = 0
+
+    def __init__(self, ruta='tienda.db', compartido=False):
+        self.ruta = ruta
+        self.compartido = compartido
+        # Tienda serializa los accesos; el volcado por temporizador llega desde otro hilo.
+        # timeout: si otra terminal está escribiendo se espera en lugar de fallar con "database is locked"
+        self.conexion = sqlite3.connect(ruta, check_same_thread=False, timeout=30)
+        self.conexion.row_factory = sqlite3.Row
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self.conexion.execute("PRAGMA foreign_keys=ON")
+        self.conexion.executescript(ESQUEMA)
+        # Bases creadas antes de las columnas version y codigo
+        columnas = {f['name'] for f in self.conexion.execute("PRAGMA table_info(productos)")}
+        with self.conexion:
+            if 'version' not in columnas:
+                self.conexion.execute("ALTER TABLE productos ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+            if 'codigo' not in columnas:
+                self.conexion.execute("ALTER TABLE productos ADD COLUMN codigo TEXT")
+            # Código de barras/SKU único (varios productos pueden no tenerlo: NULL no choca)
+            self.conexion.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_productos_codigo ON productos (codigo)")
+
+    def cerrar(self):
+        self.conexion.close()
+
+    @contextmanager
+    def _transaccion_inmediata(self):
+        # Toma el permiso de escritura al empezar: entre leer y escribir no se cuela otra terminal
+        with self.conexion:
+            self.conexion.execute("BEGIN IMMEDIATE")
+            yield self.conexion
+
+    # --------------------------
+    # Lectura
+    # --------------------------
+
+    def cargar_productos(self):
+        filas = self.conexion.execute(
+            "SELECT id_producto, nombre, precio, stock, version, codigo FROM productos ORDER BY id_producto")
+        return [dict(f) for f in filas]
+
+    def cargar_clientes(self):
+        filas = self.conexion.execute("SELECT id_cliente, nombre, email FROM clientes ORDER BY id_cliente")
+        return [dict(f) for f in filas]
+
+    def cargar_pedidos(self, desde_id=0):
+        """Pedidos con ID mayor a ``desde_id`` (todos por defecto), con sus items, ordenados por ID."""
+        pedidos = []
+        por_id = {}
+        for fila in self.conexion.execute(
+                "SELECT id_pedido, id_cliente, nombre_cliente, fecha_pedido, total_pedido FROM pedidos "
+                "WHERE id_pedido > ? ORDER BY id_pedido", (desde_id,)):
+            pedido = dict(fila)
+            pedido['items'] = []
+            # Mantener el orden de claves del formato JSON
+            pedido['total_pedido'] = pedido.pop('total_pedido')
+            por_id[pedido['id_pedido']] = pedido
+            pedidos.append(pedido)
+        for fila in self.conexion.execute(
+                "SELECT id_pedido, id_producto, nombre, cantidad, precio_unitario, subtotal "
+                "FROM items_pedido WHERE id_pedido > ? ORDER BY id_pedido, linea", (desde_id,)):
+            item = dict(fila)
+            pedido = por_id.get(item.pop('id_pedido'))
+            if pedido is not None:
+                pedido['items'].append(item)
+        return pedidos
+
+    def pedidos_nuevos(self, ultimo_id):
+        """Pedidos con ID mayor a ``ultimo_id`` (los registrados por otras terminales)."""
+        return self.cargar_pedidos(ultimo_id)
+
+    def leer_registros(self, coleccion, ids):
+        """{id: fila} actual de los productos o clientes ``ids`` (los que existan)."""
+        ids = list(ids)
+        if coleccion == 'productos':
+            tabla, clave, columnas = 'productos', 'id_producto', 'nombre, precio, stock, version, codigo'
+        else:
+            tabla, clave, columnas = 'clientes', 'id_cliente', 'nombre, email'
+        marcadores = ", ".join("?" for _ in ids)
+        filas = self.conexion.execute(f"SELECT {clave}, {columnas} FROM {tabla} WHERE {clave} IN ({marcadores})", ids)
+        return {f[0]: dict(f) for f in filas}
+
+    def cargar_secuencias(self):
+        return {f['entidad']: f['ultimo'] for f in self.conexion.execute("SELECT entidad, ultimo FROM secuencias")}
+
+    def cargar_agregados(self):
+        fila = self.conexion.execute("SELECT datos FROM agregados WHERE clave = 'ventas'").fetchone()
+        return json.loads(fila['datos']) if fila else None
+
+    # --------------------------
+    # Escritura
+    # --------------------------
+
+    def guardar_agregados(self, agregados):
+        with self.conexion:
+            self.conexion.execute("INSERT OR REPLACE INTO agregados (clave, datos) VALUES ('ventas', ?)",
+                                  (json.dumps(agregados),))
+
+    @staticmethod
+    def _escribir_secuencias(conexion, secuencias):
+        # Nunca retrocede: otra terminal pudo avanzar la secuencia desde que esta la leyó
+        conexion.executemany("INSERT INTO secuencias (entidad, ultimo) VALUES (?, ?) "
+                             "ON CONFLICT (entidad) DO UPDATE SET ultimo = max(ultimo, excluded.ultimo)",
+                             list(secuencias.items()))
+
+    def reservar_id(self, entidad, minimo=1):
+        """Próximo ID de ``entidad`` tomado de la secuencia compartida (nunca menor que ``minimo``)."""
+        with self._transaccion_inmediata() as conexion:
+            return self._siguiente(conexion, entidad, minimo)
+
+    @staticmethod
+    def _siguiente(conexion, entidad, minimo):
+        fila = conexion.execute("SELECT ultimo FROM secuencias WHERE entidad = ?", (entidad,)).fetchone()
+        nuevo = max((fila['ultimo'] if fila else 0) + 1, minimo or 0)
+        PersistenciaSQLite._escribir_secuencias(conexion, {entidad: nuevo})
+        return nuevo
+
+    def guardar_secuencias(self, secuencias):
+        with self.conexion:
+            self._escribir_secuencias(self.conexion, secuencias)
+
+    @staticmethod
+    def _sincronizar(conexion, tabla, clave, columnas, coleccion, ids):
+        """Inserta/actualiza las filas indicadas y borra las que ya no están en la colección."""
+        if ids is None:
+            ids = set(coleccion.keys())
+            existentes = {f[0] for f in conexion.execute(f"SELECT {clave} FROM {tabla}")}
+            borrar = existentes - ids
+        else:
+            borrar = {i for i in ids if i not in coleccion}
+        filas = [tuple(coleccion[i].to_dict()[c] for c in columnas) for i in ids if i in coleccion]
+        marcadores = ", ".join("?" for _ in columnas)
+        if 'codigo' in columnas:
+            PersistenciaSQLite._liberar_codigos(conexion, ids)
+        # UPSERT y no INSERT OR REPLACE: un código repetido debe fallar, no borrar la fila que lo tenía
+        actualizar = ", ".join(f"{c} = excluded.{c}" for c in columnas if c != clave)
+        conexion.executemany(f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES ({marcadores}) "
+                             f"ON CONFLICT ({clave}) DO UPDATE SET {actualizar}", filas)
+        conexion.executemany(f"DELETE FROM {tabla} WHERE {clave} = ?", [(i,) for i in borrar])
+
+    def guardar_productos(self, productos, ids=None):
+        if self.compartido and ids is not None:
+            with self._transaccion_inmediata() as conexion:
+                self._actualizar_versionado(conexion, productos, ids)
+            self._avanzar_versiones(productos, ids)
+            return
+        with self.conexion:
+            self._sincronizar(self.conexion, 'productos', 'id_producto',
+                              ['id_producto', 'nombre', 'precio', 'stock', 'version', 'codigo'], productos, ids)
+
+    @staticmethod
+    def _actualizar_versionado(conexion, productos, ids):
+        """UPDATE condicionado a la versión leída; ``ConflictoVersion`` si otra terminal la cambió."""
+        conflictos = []
+        PersistenciaSQLite._liberar_codigos(conexion, ids)
+        for i in ids:
+            if i not in productos:
+                conexion.execute("DELETE FROM productos WHERE id_producto = ?", (i,))
+                continue
+            p = productos[i]
+            cursor = conexion.execute(
+                "UPDATE productos SET nombre = ?, precio = ?, stock = ?, codigo = ?, version = version + 1 "
+                "WHERE id_producto = ? AND version = ?", (p.nombre, p.precio, p.stock, p.codigo, i, p.version))
+            if cursor.rowcount:
+                continue
+            if conexion.execute("SELECT 1 FROM productos WHERE id_producto = ?", (i,)).fetchone():
+                conflictos.append(i)
+            else:
+                conexion.execute("INSERT INTO productos (id_producto, nombre, precio, stock, version, codigo) "
+                                 "VALUES (?, ?, ?, ?, ?, ?)", (i, p.nombre, p.precio, p.stock, p.version + 1, p.codigo))
+        if conflictos:
+            raise ConflictoVersion(conflictos)
+
+    @staticmethod
+    def _liberar_codigos(conexion, ids):
+        # Si dos productos intercambian códigos en la misma escritura, el índice único no debe
+        # ver el código repetido a mitad de camino: primero se sueltan y luego se escriben
+        conexion.executemany("UPDATE productos SET codigo = NULL WHERE id_producto = ? AND codigo IS NOT NULL",
+                             [(i,) for i in ids])
+
+    @staticmethod
+    def _avanzar_versiones(productos, ids):
+        # Recién confirmada la escritura: los objetos en memoria pasan a la versión guardada
+        for i in ids:
+            if i in productos:
+                productos[i].version += 1
+
+    def guardar_clientes(self, clientes, ids=None):
+        with self.conexion:
+            self._sincronizar(self.conexion, 'clientes', 'id_cliente',
+                              ['id_cliente', 'nombre', 'email'], clientes, ids)
+
+    @staticmethod
+    def _insertar_pedidos(conexion, pedidos):
+        conexion.executemany(
+            "INSERT OR IGNORE INTO pedidos (id_pedido, id_cliente, nombre_cliente, fecha_pedido, total_pedido) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(p['id_pedido'], p['id_cliente'], p.get('nombre_cliente'), p.get('fecha_pedido', ''),
+              p.get('total_pedido', 0)) for p in pedidos])
+        conexion.executemany(
+            "INSERT OR IGNORE INTO items_pedido "
+            "(id_pedido, linea, id_producto, nombre, cantidad, precio_unitario, subtotal) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(p['id_pedido'], linea, it.get('id_producto'), it.get('nombre'), it.get('cantidad', 0),
+              it.get('precio_unitario', 0), it.get('subtotal', 0))
+             for p in pedidos for linea, it in enumerate(p.get('items', []))])
+
+    def guardar_pedidos(self, pedidos):
+        with self.conexion:
+            self._insertar_pedidos(self.conexion, pedidos)
+
+    def registrar_pedido(self, pedido, productos, ids_modificados):
+        self.registrar_pedidos([pedido], productos, ids_modificados)
+
+    def registrar_pedidos(self, pedidos, productos, ids_modificados):
+        """Descuento de stock y alta de uno o varios pedidos en la misma transacción."""
+        if self.compartido:
+            with self._transaccion_inmediata() as conexion:
+                self._actualizar_versionado(conexion, productos, ids_modificados)
+                fila = conexion.execute("SELECT max(id_pedido) AS ultimo FROM pedidos").fetchone()
+                ultimo = fila['ultimo'] or 0
+                for pedido in pedidos:
+                    minimo = max(ultimo + 1, pedido.get('id_pedido') or 0)
+                    pedido['id_pedido'] = ultimo = self._siguiente(conexion, 'pedidos', minimo)
+                self._insertar_pedidos(conexion, pedidos)
+            self._avanzar_versiones(productos, ids_modificados)
+            return
+        with self.conexion:
+            self.conexion.executemany("UPDATE productos SET stock = ? WHERE id_producto = ?",
+                                      [(productos[i].stock, i) for i in ids_modificados])
+            self._insertar_pedidos(self.conexion, pedidos)
+
+    # --------------------------
+    # Migración
+    # --------------------------
+
+    def importar(self, origen):
+        """Copia en bloque todos los datos de otro almacenamiento (p. ej. ``PersistenciaArchivos``).
+
+        Devuelve la cantidad de productos, clientes y pedidos importados. Si dos productos tienen el
+        mismo código (comparado como en el índice de códigos) lanza ValueError sin importar nada.
+        """
+        productos = origen.cargar_productos()
+        clientes = origen.cargar_clientes()
+        pedidos = origen.cargar_pedidos()
+        secuencias = origen.cargar_secuencias()
+        filas = [(int(p['id_producto']), p['nombre'], float(p['precio']), int(p['stock']), int(p.get('version') or 0),
+                  (p.get('codigo') or '').strip() or None) for p in productos]
+        PersistenciaSQLite._validar_codigos(filas)
+        try:
+            with self.conexion:
+                self._escribir_secuencias(self.conexion, secuencias)
+                self.conexion.executemany(
+                    "INSERT INTO productos (id_producto, nombre, precio, stock, version, codigo) VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (id_producto) DO UPDATE SET nombre = excluded.nombre, precio = excluded.precio, "
+                    "stock = excluded.stock, version = excluded.version, codigo = excluded.codigo", filas)
+                self.conexion.executemany(
+                    "INSERT OR REPLACE INTO clientes (id_cliente, nombre, email) VALUES (?, ?, ?)",
+                    [(int(c['id_cliente']), c['nombre'], c['email']) for c in clientes])
+                self._insertar_pedidos(self.conexion, pedidos)
+        except sqlite3.IntegrityError as error:
+            # El código ya lo tiene otro producto de la base de destino
+            raise ValueError(f"No se pudo migrar: {error}") from error
+        return {'productos': len(productos), 'clientes': len(clientes), 'pedidos': len(pedidos)}
+
+    @staticmethod
+    def _validar_codigos(filas):
+        duenos, repetidos = {}, []
+        for fila in filas:
+            id_producto, codigo = fila[0], fila[5]
+            if codigo is None:
+                continue
+            clave = normalizar_codigo(codigo)
+            if clave in duenos and duenos[clave] != id_producto:
+                repetidos.append(f"{codigo} (productos {duenos[clave]} y {id_producto})")
+            else:
+                duenos[clave] = id_producto
+        if repetidos:
+            raise ValueError("Códigos repetidos: " + ", ".join(repetidos))
@@ -0,0 +1,385 @@
+# servicio.py
+"""Servicio HTTP/JSON sin menú para usar la tienda desde otros programas (tienda web, terminales de mano).
+
+Uso: python servicio.py [--host 127.0.0.1] [--puerto 8080] [--lectores 4]
+
+Rutas (cuerpos y respuestas en JSON):
+  GET    /productos[?q=texto]     POST /productos           {"nombre", "precio", "stock"}
+  GET    /productos/{id}          PUT  /productos/{id}      {"nombre"?, "precio"?, "stock"?}
+  DELETE /productos/{id}
+  GET    /clientes                POST /clientes            {"nombre", "email"}
+  GET    /clientes/{id}           GET  /clientes/{id}/pedidos
+  GET    /pedidos[?desde=&hasta=&id_cliente=&limite=]
+  POST   /pedidos                 {"id_cliente": 1, "items": {"<id_producto>": cantidad}}
+  GET    /reportes/ventas[?limite=10]
+
+Las modificaciones entran a una cola con un único escritor (se aplican de a una, en orden de
+llegada); las lecturas corren en paralelo en un grupo de hilos mientras no haya una escritura.
+"""
+import argparse
+import asyncio
+import json
+import re
+import signal
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from http import HTTPStatus
+from itertools import islice
+from urllib.parse import parse_qs, urlsplit
+
+import gestion
+from dinero import a_centavos
+
+# Límite del cuerpo de una solicitud (un pedido con cientos de items ocupa unos pocos KB)
+MAXIMO_CUERPO = 1024 * 1024
+# Modificaciones esperando en la cola; con la cola llena las conexiones esperan (contrapresión)
+MAXIMO_COLA = 1000
+
+
+class _CerrojoLectura:
+    """Varias lecturas a la vez o una sola escritura; una escritura en espera frena lecturas nuevas."""
+
+    def __init__(self):
+        self._condicion = threading.Condition()
+        self._lectores = 0
+        self._escribiendo = False
+        self._escrituras_en_espera = 0
+
+    @contextmanager
+    def lectura(self):
+        with self._condicion:
+            while self._escribiendo or self._escrituras_en_espera:
+                self._condicion.wait()
+            self._lectores += 1
+        try:
+            yield
+        finally:
+            with self._condicion:
+                self._lectores -= 1
+                if not self._lectores:
+                    self._condicion.notify_all()
+
+    @contextmanager
+    def escritura(self):
+        with self._condicion:
+            self._escrituras_en_espera += 1
+            while self._escribiendo or self._lectores:
+                self._condicion.wait()
+            self._escrituras_en_espera -= 1
+            self._escribiendo = True
+        try:
+            yield
+        finally:
+            with self._condicion:
+                self._escribiendo = False
+                self._condicion.notify_all()
+
+
+def _entero(valor, campo):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{campo}' debe ser un número entero") from None
+
+
+def _requerido(datos, campo):
+    if datos.get(campo) in (None, ''):
+        raise ValueError(f"Falta el campo '{campo}'")
+    return datos[campo]
+
+
+class ServicioTienda:
+    """Expone una ``Tienda`` como API HTTP/JSON sobre asyncio (sin dependencias externas)."""
+
+    def __init__(self, tienda, lectores=4):
+        self.tienda = tienda
+        self._cerrojo = _CerrojoLectura()
+        self._hilos_lectura = ThreadPoolExecutor(lectores, thread_name_prefix='lector')
+        # Las escrituras hacen E/S con fsync: corren fuera del loop, siempre en el mismo hilo
+        self._hilo_escritura = ThreadPoolExecutor(1, thread_name_prefix='escritor')
+        self._cola = None
+        self._tarea_escritor = None
+        self._servidor = None
+        self._rutas = [
+            ('GET', r'/productos', self._listar_productos, False),
+            ('POST', r'/productos', self._crear_producto, True),
+            ('GET', r'/productos/(?P<id_producto>\d+)', self._ver_producto, False),
+            ('PUT', r'/productos/(?P<id_producto>\d+)', self._actualizar_producto, True),
+            ('DELETE', r'/productos/(?P<id_producto>\d+)', self._eliminar_producto, True),
+            ('GET', r'/clientes', self._listar_clientes, False),
+            ('POST', r'/clientes', self._crear_cliente, True),
+            ('GET', r'/clientes/(?P<id_cliente>\d+)', self._ver_cliente, False),
+            ('GET', r'/clientes/(?P<id_cliente>\d+)/pedidos', self._pedidos_cliente, False),
+            ('GET', r'/pedidos', self._listar_pedidos, False),
+            ('POST', r'/pedidos', self._crear_pedido, True),
+            ('GET', r'/reportes/ventas', self._reporte_ventas, False),
+        ]
+        self._rutas = [(metodo, re.compile(patron), manejador, modifica)
+                       for metodo, patron, manejador, modifica in self._rutas]
+
+    # --------------------------
+    # Ciclo de vida
+    # --------------------------
+
+    async def iniciar(self, host='127.0.0.1', puerto=8080):
+        """Empieza a escuchar; devuelve el ``asyncio.Server`` (con puerto 0 el sistema elige uno)."""
+        self._cola = asyncio.Queue(MAXIMO_COLA)
+        self._tarea_escritor = asyncio.create_task(self._escritor())
+        self._servidor = await asyncio.start_server(self._atender, host, puerto)
+        return self._servidor
+
+    async def detener(self):
+        """Deja de aceptar conexiones, aplica las modificaciones encoladas y vuelca lo pendiente."""
+        self._servidor.close()
+        if hasattr(self._servidor, 'close_clients'):
+            self._servidor.close_clients()  # Python 3.13+: wait_closed esperaría a las conexiones persistentes
+        await self._servidor.wait_closed()
+        await self._cola.join()
+        self._tarea_escritor.cancel()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._hilo_escritura, self.tienda.cerrar)
+        self._hilos_lectura.shutdown()
+        self._hilo_escritura.shutdown()
+
+    async def _escritor(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            llamada, futuro = await self._cola.get()
+            try:
+                resultado = await loop.run_in_executor(self._hilo_escritura, self._escribir, llamada)
+            except Exception as error:
+                if not futuro.cancelled():
+                    futuro.set_exception(error)
+            else:
+                if not futuro.cancelled():
+                    futuro.set_result(resultado)
+            finally:
+                self._cola.task_done()
+
+    def _escribir(self, llamada):
+        with self._cerrojo.escritura():
+            return llamada()
+
+    def _leer(self, llamada):
+        with self._cerrojo.lectura():
+            return llamada()
+
+    # --------------------------
+    # HTTP
+    # --------------------------
+
+    async def _atender(self, lector, escritor):
+        try:
+            while True:
+                linea = await lector.readline()
+                if not linea:
+                    break
+                try:
+                    metodo, destino, version = linea.decode('latin-1').split()
+                except ValueError:
+                    await self._responder(escritor, 400, {'error': 'Solicitud mal formada'}, mantener=False)
+                    break
+                cabeceras = {}
+                while True:
+                    linea = await lector.readline()
+                    if linea in (b'\r\n', b'\n', b''):
+                        break
+                    nombre, _, valor = linea.decode('latin-1').partition(':')
+                    cabeceras[nombre.strip().lower()] = valor.strip()
+                largo = cabeceras.get('content-length') or '0'
+                # Solo dígitos ASCII: int() aceptaría '-5', '+5' o '1_000'
+                if not (largo.isascii() and largo.isdigit()):
+                    await self._responder(escritor, 400, {'error': 'Content-Length inválido'}, mantener=False)
+                    break
+                largo = int(largo)
+                if largo > MAXIMO_CUERPO:
+                    await self._responder(escritor, 413, {'error': 'Cuerpo demasiado grande'}, mantener=False)
+                    break
+                cuerpo = await lector.readexactly(largo) if largo else b''
+                estado, respuesta = await self._despachar(metodo, destino, cuerpo)
+                mantener = version == 'HTTP/1.1' and cabeceras.get('connection', '').lower() != 'close'
+                await self._responder(escritor, estado, respuesta, mantener)
+                if not mantener:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            escritor.close()
+
+    @staticmethod
+    async def _responder(escritor, estado, respuesta, mantener=True):
+        cuerpo = json.dumps(respuesta, ensure_ascii=False).encode('utf-8')
+        cabecera = (f"HTTP/1.1 {estado} {HTTPStatus(estado).phrase}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(cuerpo)}\r\n"
+                    f"Connection: {'keep-alive' if mantener else 'close'}\r\n\r\n")
+        escritor.write(cabecera.encode('latin-1') + cuerpo)
+        await escritor.drain()
+
+    async def _despachar(self, metodo, destino, cuerpo):
+        url = urlsplit(destino)
+        ruta = url.path.rstrip('/') or '/'
+        consulta = {clave: valores[-1] for clave, valores in parse_qs(url.query).items()}
+        permitidos = []
+        for metodo_ruta, patron, manejador, modifica in self._rutas:
+            coincidencia = patron.fullmatch(ruta)
+            if coincidencia is None:
+                continue
+            if metodo_ruta != metodo:
+                permitidos.append(metodo_ruta)
+                continue
+            try:
+                datos = json.loads(cuerpo) if cuerpo else {}
+            except (UnicodeDecodeError, json.JSONDecodeError):
+                return 400, {'error': 'El cuerpo no es JSON válido'}
+            if not isinstance(datos, dict):
+                return 400, {'error': 'El cuerpo debe ser un objeto JSON'}
+            ids = {clave: int(valor) for clave, valor in coincidencia.groupdict().items()}
+            llamada = partial(manejador, consulta, datos, **ids)
+            try:
+                if modifica:
+                    futuro = asyncio.get_running_loop().create_future()
+                    await self._cola.put((llamada, futuro))
+                    return await futuro
+                return await asyncio.get_running_loop().run_in_executor(self._hilos_lectura, self._leer, llamada)
+            except ValueError as error:
+                return 400, {'error': str(error)}
+            except Exception as error:
+                gestion.console.print(f"[bold red]✗ Error en {metodo} {ruta}:[/bold red] {error!r}")
+                return 500, {'error': 'Error interno'}
+        if permitidos:
+            return 405, {'error': f"Método no permitido; use {', '.join(permitidos)}"}
+        return 404, {'error': 'Ruta no encontrada'}
+
+    # --------------------------
+    # Manejadores (corren en los hilos de lectura o en el de escritura)
+    # --------------------------
+
+    def _listar_productos(self, consulta, datos):
+        termino = consulta.get('q')
+        if consulta.get('codigo'):
+            producto = self.tienda.buscar_por_codigo(consulta['codigo'])
+            productos = [producto] if producto else []
+        else:
+            productos = (self.tienda.buscar_productos_por_nombre(termino) if termino
+                         else list(self.tienda.productos.values()))
+        return 200, [p.to_dict() for p in productos]
+
+    def _ver_producto(self, consulta, datos, id_producto):
+        producto = self.tienda.productos.get(id_producto)
+        if producto is None:
+            return 404, {'error': f"Producto ID {id_producto} no encontrado"}
+        return 200, producto.to_dict()
+
+    def _crear_producto(self, consulta, datos):
+        nombre = str(_requerido(datos, 'nombre'))
+        precio, stock = _requerido(datos, 'precio'), _entero(_requerido(datos, 'stock'), 'stock')
+        codigo = str(datos['codigo']) if datos.get('codigo') else None
+        producto, mensaje = gestion.capturar_mensaje(self.tienda.crear_producto, nombre, precio, stock, codigo)
+        if producto is None:
+            return 409, {'error': mensaje}
+        return 201, producto.to_dict()
+
+    def _actualizar_producto(self, consulta, datos, id_producto):
+        # Todo se valida antes de tocar el producto: un campo inválido no deja cambios a medias
+        nombre = datos.get('nombre')
+        if nombre is not None and (not isinstance(nombre, str) or not nombre.strip()):
+            raise ValueError("'nombre' debe ser un texto no vacío")
+        if datos.get('precio') is not None:
+            a_centavos(datos['precio'])
+        stock = _entero(datos['stock'], 'stock') if datos.get('stock') is not None else None
+        codigo = str(datos['codigo']) if datos.get('codigo') is not None else None
+        actualizado, mensaje = gestion.capturar_mensaje(self.tienda.actualizar_producto, id_producto,
+                                              nombre=nombre, precio=datos.get('precio'), stock=stock,
+                                              codigo=codigo)
+        if not actualizado:
+            return (404 if id_producto not in self.tienda.productos else 409), {'error': mensaje}
+        return 200, self.tienda.productos[id_producto].to_dict()
+
+    def _eliminar_producto(self, consulta, datos, id_producto):
+        eliminado, mensaje = gestion.capturar_mensaje(self.tienda.eliminar_producto, id_producto)
+        if not eliminado:
+            return 404, {'error': mensaje}
+        return 200, {'id_producto': id_producto, 'eliminado': True}
+
+    def _listar_clientes(self, consulta, datos):
+        return 200, [c.to_dict() for c in list(self.tienda.clientes.values())]
+
+    def _ver_cliente(self, consulta, datos, id_cliente):
+        cliente = self.tienda.clientes.get(id_cliente)
+        if cliente is None:
+            return 404, {'error': f"Cliente ID {id_cliente} no encontrado"}
+        return 200, cliente.to_dict()
+
+    def _crear_cliente(self, consulta, datos):
+        cliente = self.tienda.crear_cliente(str(_requerido(datos, 'nombre')), str(_requerido(datos, 'email')))
+        return 201, cliente.to_dict()
+
+    def _pedidos_cliente(self, consulta, datos, id_cliente):
+        pedidos = self.tienda.historial_pedidos_cliente(id_cliente)
+        if pedidos is None:
+            return 404, {'error': f"Cliente ID {id_cliente} no encontrado"}
+        return 200, [dict(p) for p in pedidos]
+
+    def _listar_pedidos(self, consulta, datos):
+        id_cliente = _entero(consulta['id_cliente'], 'id_cliente') if 'id_cliente' in consulta else None
+        limite = _entero(consulta.get('limite', 100), 'limite')
+        pedidos = self.tienda.iterar_pedidos(consulta.get('desde'), consulta.get('hasta'), id_cliente)
+        return 200, [dict(p) for p in islice(pedidos, limite)]
+
+    def _crear_pedido(self, consulta, datos):
+        id_cliente = _entero(_requerido(datos, 'id_cliente'), 'id_cliente')
+        items = _requerido(datos, 'items')
+        if not isinstance(items, dict):
+            raise ValueError("'items' debe ser un objeto {id_producto: cantidad}")
+        gestion.leer_cantidades(items)  # cantidades enteras y positivas, o 400
+        pedido, mensaje = gestion.capturar_mensaje(self.tienda.crear_pedido, id_cliente, items)
+        if pedido is None:
+            return 409, {'error': mensaje or 'No se pudo crear el pedido'}
+        return 201, pedido
+
+    def _reporte_ventas(self, consulta, datos):
+        limite = _entero(consulta.get('limite', 10), 'limite')
+        return 200, self.tienda.agregados.resumen(limite)
+
+
+async def servir(tienda, host='127.0.0.1', puerto=8080, lectores=4):
+    """Atiende solicitudes hasta Ctrl+C o SIGTERM; al salir aplica lo encolado y vuelca lo pendiente."""
+    servicio = ServicioTienda(tienda, lectores)
+    servidor = await servicio.iniciar(host, puerto)
+    direccion = servidor.sockets[0].getsockname()
+    gestion.console.print(f"[bold green]✔ Servicio escuchando en http://{direccion[0]}:{direccion[1]}[/bold green]")
+    terminar = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for senal in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(senal, terminar.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows: Ctrl+C llega como KeyboardInterrupt
+    try:
+        await terminar.wait()
+    finally:
+        await servicio.detener()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servicio HTTP/JSON de la tienda")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=8080)
+    parser.add_argument('--lectores', type=int, default=4, help='Hilos para las consultas')
+    args = parser.parse_args(argv)
+
+    tienda = gestion.Tienda()
+    tienda.precargar()
+    try:
+        asyncio.run(servir(tienda, args.host, args.puerto, args.lectores))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,77 @@
+from agregados import AgregadosVentas
+from cli import main as cli_main
+from gestion import Tienda, Producto, Cliente
+from persistencia import PersistenciaArchivos
+from persistencia_sqlite import PersistenciaSQLite
+
+
+def _pedido(id_pedido, id_cliente, fecha, items):
+    items = [{'id_producto': i, 'nombre': f"P{i}", 'cantidad': c, 'precio_unitario': 10.0, 'subtotal': 10.0 * c}
+             for i, c in items]
+    return {'id_pedido': id_pedido, 'id_cliente': id_cliente, 'nombre_cliente': f"C{id_cliente}",
+            'fecha_pedido': fecha, 'items': items, 'total_pedido': sum(it['subtotal'] for it in items)}
+
+
+def _tienda(almacen):
+    tienda = Tienda(almacen)
+    tienda.productos = {1: Producto(1, "Arroz", 100, 50), 2: Producto(2, "Pan", 10, 50)}
+    tienda.clientes = {1: Cliente(1, "Cristian Rodriguez", "Cristiank18@gmail.com")}
+    tienda._guardar_productos()
+    tienda._guardar_clientes()
+    return tienda
+
+
+def test_acumulados_por_mes_producto_y_cliente():
+    agregados = AgregadosVentas.desde_pedidos([
+        _pedido(1, 1, "2025-10-20 08:15:49", [(1, 2), (2, 1)]),
+        _pedido(2, 2, "2025-10-21 20:27:24", [(1, 1)]),
+        _pedido(3, 1, "2025-11-02 09:00:00", [(2, 5)]),
+    ])
+    assert (agregados.pedidos, agregados.total, agregados.hasta_id_pedido) == (3, 90.0, 3)
+    assert agregados.clientes_distintos == 2
+    assert agregados.ventas_por_mes() == [("2025-10", 2, 40.0), ("2025-11", 1, 50.0)]
+    assert agregados.por_dia["2025-10-21"] == [1, 1000]
+    assert agregados.top_productos(1) == [("P2", 6, 60.0)]
+    assert agregados.top_clientes() == [("C1", 2, 80.0), ("C2", 1, 10.0)]
+    assert agregados.tamano_canasta() == {'pedidos': 3, 'items_promedio': 4 / 3, 'unidades_promedio': 9 / 3,
+                                          'pedidos_por_items': {1: 2, 2: 1}}
+
+    copia = AgregadosVentas.from_dict(agregados.to_dict())
+    assert copia.to_dict() == agregados.to_dict()
+
+
+def test_acumulados_se_guardan_y_completan_con_pedidos_nuevos(tmp_path):
+    tienda = _tienda(PersistenciaArchivos(str(tmp_path)))
+    tienda.crear_pedido(1, {1: 1})
+    assert tienda.generar_reporte_ventas() == 100.0
+    tienda.crear_pedido(1, {2: 3})
+    tienda.cerrar()
+    assert PersistenciaArchivos(str(tmp_path)).cargar_agregados()['hasta_id_pedido'] == 2
+
+    # Pedido registrado sin guardar los acumulados (p. ej. un corte antes de cerrar)
+    otra = Tienda(PersistenciaArchivos(str(tmp_path)))
+    otra.crear_pedido(1, {1: 2})
+
+    recargada = Tienda(PersistenciaArchivos(str(tmp_path)))
+    agregados = recargada.agregados
+    assert (agregados.pedidos, agregados.total) == (3, 330.0)
+    assert agregados.top_productos(1) == [("Arroz", 3, 300.0)]
+
+
+def test_acumulados_en_sqlite_y_reconstruccion(tmp_path):
+    ruta = str(tmp_path / "tienda.db")
+    almacen = PersistenciaSQLite(ruta)
+    tienda = _tienda(almacen)
+    tienda.crear_pedido(1, {1: 1, 2: 2})
+    assert tienda.generar_reporte_ventas() == 120.0
+    tienda.cerrar()
+    assert almacen.cargar_agregados()['total_centavos'] == 12000
+    # Acumulados dañados: el comando los recalcula desde los pedidos
+    almacen.guardar_agregados(AgregadosVentas().to_dict())
+    almacen.cerrar()
+
+    assert cli_main(["reconstruir-agregados", "--almacen", "sqlite", "--ruta", ruta]) == 0
+    almacen = PersistenciaSQLite(ruta)
+    assert almacen.cargar_agregados()['pedidos'] == 1
+    assert Tienda(almacen).generar_reporte_ventas() == 120.0
+    almacen.cerrar()
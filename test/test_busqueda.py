@@ -0,0 +1,67 @@
+from busqueda import IndiceBusqueda, IndiceCodigos, normalizar, normalizar_codigo
+from gestion import Producto
+
+
+def _indice():
+    return IndiceBusqueda({
+        1: Producto(1, "Azúcar Morena", 3000, 5),
+        2: Producto(2, "Pan Integral", 500, 5),
+        3: Producto(3, "Panela", 2000, 5),
+        4: Producto(4, "Arroz", 12000, 5),
+    })
+
+
+def test_normalizar_quita_acentos():
+    assert normalizar("Azúcar ÑANDÚ") == "azucar nandu"
+
+
+def test_buscar_subcadena_sin_acentos():
+    indice = _indice()
+    assert indice.buscar("azucar") == [1]
+    assert indice.buscar("PAN") == [2, 3]
+    assert indice.buscar("an") == [2, 3]
+    assert indice.buscar("xyz") == []
+
+
+def test_indice_incremental():
+    indice = _indice()
+    indice.quitar(3)
+    indice.agregar(2, "Pan Tajado")
+    indice.agregar(5, "Pandebono")
+    assert indice.buscar("pan") == [2, 5]
+    assert indice.buscar("integral") == []
+
+
+def test_sugerir_nombres_parecidos():
+    indice = _indice()
+    assert indice.sugerir("arros")[0] == 4
+    assert indice.sugerir("azucr morena")[0] == 1
+    assert indice.sugerir("qwerty") == []
+
+
+def test_codigos_ean_upc_y_sku():
+    assert normalizar_codigo(" 036000291452 ") == normalizar_codigo("0036000291452") == "00036000291452"
+    assert normalizar_codigo(" ab-12 3 ") == "ab-12 3"
+    indice = IndiceCodigos({1: Producto(1, "Pan", 500, 5, codigo="7702001"), 2: Producto(2, "Arroz", 12000, 5)})
+    assert indice.buscar("007702001") == 1 and indice.buscar("7702001") == 1
+    assert indice.buscar("999") is None
+    indice.agregar(2, "7702001-X")
+    indice.quitar(1)
+    assert indice.buscar("7702001") is None and indice.buscar(" 7702001-X") == 2
+    assert len(indice) == 1
+
+
+def test_skus_parecidos_no_chocan():
+    assert len({normalizar_codigo(c) for c in ("AB-12", "AB12", "ab12", "AB 12", "12", "0012")}) == 5
+    indice = IndiceCodigos({1: Producto(1, "Pan", 500, 5, codigo="AB-12"), 2: Producto(2, "Arroz", 12000, 5, codigo="AB12")})
+    assert indice.buscar("AB-12") == 1 and indice.buscar("AB12") == 2
+    assert indice.buscar("ab12") is None
+
+
+def test_escaneos_recientes_acotados():
+    indice = IndiceCodigos({i: Producto(i, f"P{i}", 100, 1, codigo=f"SKU{i}") for i in range(1, 6)}, recientes=2)
+    for lectura in ("SKU1", "SKU2", "SKU1", "SKU3"):
+        assert indice.buscar(lectura) == int(lectura[3:])
+    assert list(indice._recientes) == ["SKU1", "SKU3"]
+    indice.agregar(1, "OTRO")  # cualquier cambio vacía las lecturas recordadas
+    assert not indice._recientes and indice.buscar("SKU1") is None
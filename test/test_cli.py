@@ -0,0 +1,99 @@
+import json
+
+import pytest
+from openpyxl import load_workbook
+
+from cli import main as cli_main
+from gestion import Cliente, Producto
+from persistencia import PersistenciaArchivos
+
+
+def _datos(directorio):
+    almacen = PersistenciaArchivos(str(directorio))
+    almacen.guardar_productos({1: Producto(1, "Arroz", 2500, 10), 2: Producto(2, "Pan", 500, 3)})
+    almacen.guardar_clientes({1: Cliente(1, "Ana", "ana@correo.com")})
+    return ["--almacen", "archivos", "--ruta", str(directorio), "--json"]
+
+
+def _salida_json(capsys):
+    return json.loads(capsys.readouterr().out)
+
+
+def test_productos_y_busqueda_en_json(tmp_path, capsys):
+    opciones = _datos(tmp_path)
+    assert cli_main(["productos", *opciones]) == 0
+    assert [p["nombre"] for p in _salida_json(capsys)] == ["Arroz", "Pan"]
+    assert cli_main(["productos", "--buscar", "pan", *opciones]) == 0
+    assert _salida_json(capsys)[0]["id_producto"] == 2
+
+
+def test_crear_pedido_reporte_y_exportar(tmp_path, capsys):
+    opciones = _datos(tmp_path)
+    pedido = tmp_path / "pedido.json"
+    pedido.write_text(json.dumps({"id_cliente": 1, "productos": {"1": 2, "2": 1}}), encoding="utf-8")
+    assert cli_main(["crear-pedido", str(pedido), *opciones]) == 0
+    assert _salida_json(capsys)["total_pedido"] == 5500
+
+    assert cli_main(["crear-pedido", str(pedido), *opciones]) == 0
+    capsys.readouterr()
+    # Sin stock: se rechaza con código 1 y el motivo en la salida; JSON inválido, código 2
+    pedido.write_text(json.dumps({"id_cliente": 1, "productos": {"2": 5}}), encoding="utf-8")
+    assert cli_main(["crear-pedido", str(pedido), *opciones]) == 1
+    assert "Stock insuficiente" in _salida_json(capsys)["error"]
+    pedido.write_text("{", encoding="utf-8")
+    assert cli_main(["crear-pedido", str(pedido), *opciones]) == 2
+    capsys.readouterr()
+
+    assert cli_main(["reporte", *opciones]) == 0
+    reporte = _salida_json(capsys)
+    assert reporte["pedidos"] == 2 and reporte["total"] == 11000
+    assert reporte["top_productos"][0] == {"nombre": "Arroz", "unidades": 4, "total": 10000}
+
+    archivo = str(tmp_path / "pedidos.xlsx")
+    assert cli_main(["exportar", "xlsx", archivo, *opciones]) == 0
+    assert _salida_json(capsys) == {"archivo": archivo, "pedidos": 2}
+    assert load_workbook(archivo)["Pedidos"].max_row == 3
+
+
+def test_crear_pedido_con_cantidad_no_positiva(tmp_path, capsys):
+    opciones = _datos(tmp_path)
+    pedido = tmp_path / "pedido.json"
+    pedido.write_text(json.dumps({"id_cliente": 1, "productos": {"1": 1, "2": -3}}), encoding="utf-8")
+    assert cli_main(["crear-pedido", str(pedido), *opciones]) == 2
+    assert "no positivas" in _salida_json(capsys)["error"]
+    assert cli_main(["productos", *opciones]) == 0
+    assert [p["stock"] for p in _salida_json(capsys)] == [10, 3]
+    assert not (tmp_path / "pedidos.jsonl").exists()
+
+
+@pytest.mark.parametrize("comando", [["reporte"], ["exportar", "xlsx"]])
+@pytest.mark.parametrize("fecha", [["--desde", "2024/01/01"], ["--hasta", "2024-13-01"]])
+def test_fechas_invalidas(tmp_path, capsys, comando, fecha):
+    opciones = _datos(tmp_path)
+    salida = tmp_path / "salida.xlsx"
+    argumentos = [*comando, str(salida)] if comando[0] == "exportar" else comando
+    assert cli_main([*argumentos, *fecha, *opciones]) == 2
+    assert "YYYY-MM-DD" in _salida_json(capsys)["error"]
+    assert not salida.exists()
+
+
+def test_migrar_sqlite_con_codigos_repetidos(tmp_path, capsys):
+    (tmp_path / "productos.csv").write_text(
+        "id_producto,nombre,precio,stock,version,codigo\n1,Pan,500.0,5,0,7702001\n2,Arroz,900.0,5,0,07702001\n",
+        encoding="utf-8")
+    destino = tmp_path / "tienda.db"
+    assert cli_main(["migrar-sqlite", "--origen", str(tmp_path), "--destino", str(destino)]) == 2
+    assert "Códigos repetidos" in capsys.readouterr().out
+
+
+def test_importar_productos_actualiza_y_crea(tmp_path, capsys):
+    opciones = _datos(tmp_path)
+    origen = tmp_path / "stock.csv"
+    origen.write_text("id_producto,nombre,precio,stock\n1,,,50\n,Leche,4000,12\n9,,,1\n", encoding="utf-8")
+    assert cli_main(["importar-productos", str(origen), *opciones]) == 0
+    assert _salida_json(capsys) == {"actualizados": 1, "creados": 1, "omitidos": 1}
+    assert cli_main(["productos", *opciones]) == 0
+    productos = {p["nombre"]: p for p in _salida_json(capsys)}
+    assert productos["Arroz"]["stock"] == 50 and productos["Arroz"]["precio"] == 2500
+    assert productos["Leche"] == {"id_producto": 3, "nombre": "Leche", "precio": 4000.0, "stock": 12, "version": 0,
+                                    "codigo": None}
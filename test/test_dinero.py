@@ -0,0 +1,42 @@
+import pytest
+
+from dinero import a_centavos, a_pesos, formatear
+from gestion import Tienda, Producto, Cliente
+from persistencia import PersistenciaArchivos
+
+
+def test_conversion_a_centavos():
+    assert a_centavos(12000) == 1200000
+    assert a_centavos("12000.0") == 1200000
+    assert a_centavos(0.285) == 29
+    assert a_centavos(19.99) == 1999
+    assert a_centavos(-1.005) == -101
+    assert a_pesos(1999) == 19.99
+    with pytest.raises(ValueError):
+        a_centavos("abc")
+
+
+def test_formatear_sin_float():
+    assert formatear(123456) == "1234.56"
+    assert formatear(5) == "0.05"
+    assert formatear(-250) == "-2.50"
+
+
+def test_producto_guarda_precio_en_centavos():
+    producto = Producto(1, "Pan", "0.35", 5)
+    assert producto.precio_centavos == 35 and producto.precio == 0.35
+    producto.precio = 19.99
+    assert producto.to_dict()['precio'] == 19.99
+    assert "$19.99" in str(producto)
+
+
+def test_total_del_pedido_es_la_suma_exacta_de_subtotales(tmp_path):
+    tienda = Tienda(PersistenciaArchivos(str(tmp_path)))
+    tienda.productos = {1: Producto(1, "Chicle", 0.1, 100), 2: Producto(2, "Caramelo", 0.2, 100),
+                        3: Producto(3, "Galleta", 19.99, 100)}
+    tienda.clientes = {1: Cliente(1, "Cristian Rodriguez", "Cristiank18@gmail.com")}
+    pedido = tienda.crear_pedido(1, {1: 1, 2: 1, 3: 3})
+
+    assert [it['subtotal'] for it in pedido['items']] == [0.1, 0.2, 59.97]
+    assert pedido['total_pedido'] == 60.27
+    assert tienda.agregados.total_centavos == sum(a_centavos(it['subtotal']) for it in pedido['items'])
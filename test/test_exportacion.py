@@ -0,0 +1,60 @@
+import time
+
+from exportacion import ColaExportacion, CANCELADO, TERMINADO
+
+
+def _pedidos(n):
+    return [{'id_pedido': i, 'id_cliente': 1, 'nombre_cliente': 'Ana', 'fecha_pedido': '2025-10-20 08:15:49',
+             'items': [{'id_producto': 1, 'nombre': 'Pan', 'cantidad': 1, 'precio_unitario': 5.0, 'subtotal': 5.0}],
+             'total_pedido': 5.0} for i in range(1, n + 1)]
+
+
+def _esperar(cola, id_trabajo, limite=30):
+    inicio = time.monotonic()
+    while cola.estado(id_trabajo).terminado is None and time.monotonic() - inicio < limite:
+        time.sleep(0.01)
+    return cola.estado(id_trabajo)
+
+
+def test_exportacion_en_segundo_plano_usa_instantanea(tmp_path):
+    cola = ColaExportacion()
+    pedidos = _pedidos(20)
+    id_trabajo = cola.encolar('excel', str(tmp_path / 'r.xlsx'), pedidos)
+    pedidos.extend(_pedidos(5))  # pedidos creados después de encolar no entran en el reporte
+
+    trabajo = _esperar(cola, id_trabajo)
+    assert trabajo.estado == TERMINADO
+    assert trabajo.resultado == 20
+    assert [t.id_trabajo for t in cola.notificaciones()] == [id_trabajo]
+    assert cola.notificaciones() == []
+    cola.cerrar()
+
+
+def test_cancelar_exportacion(tmp_path):
+    cola = ColaExportacion()
+    largo = cola.encolar('pdf', str(tmp_path / 'largo.pdf'), _pedidos(5000))
+    pendiente = cola.encolar('pdf', str(tmp_path / 'pendiente.pdf'), _pedidos(10))
+
+    assert cola.cancelar(pendiente)
+    assert cola.cancelar(largo)
+    assert _esperar(cola, largo).estado == CANCELADO
+    assert _esperar(cola, pendiente).estado == CANCELADO
+    assert not (tmp_path / 'pendiente.pdf').exists()
+    # Cancelar no deja un PDF a medias ni el temporal
+    assert not (tmp_path / 'largo.pdf').exists()
+    assert list(tmp_path.glob('.*.tmp*')) == []
+    cola.cerrar()
+
+
+def test_exportacion_de_generador_se_escribe_al_terminar(tmp_path):
+    cola = ColaExportacion()
+    id_trabajo = cola.encolar('excel', str(tmp_path / 'r.xlsx'), iter(_pedidos(7)))
+    assert cola.estado(id_trabajo).total_pedidos is None
+
+    trabajo = _esperar(cola, id_trabajo)
+    assert trabajo.estado == TERMINADO
+    assert trabajo.total_pedidos == trabajo.resultado == 7
+    assert trabajo.porcentaje == 100.0
+    assert (tmp_path / 'r.xlsx').exists()
+    assert list(tmp_path.glob('.*.tmp*')) == []
+    cola.cerrar()
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from gestion import Tienda, Producto, Cliente
+from lista_pedidos import ListaPedidos, VistaPedido
+from persistencia import PersistenciaArchivos, PersistenciaJSON
+
+
+def _pedido(id_pedido, id_cliente=1, fecha="2025-10-20 08:15:49"):
+    return {'id_pedido': id_pedido, 'id_cliente': id_cliente, 'nombre_cliente': 'Juan Perez',
+            'fecha_pedido': fecha,
+            'items': [{'id_producto': 1, 'nombre': 'Arroz', 'cantidad': 2, 'precio_unitario': 12000.0,
+                       'subtotal': 24000.0},
+                      {'id_producto': 2, 'nombre': 'Pan', 'cantidad': 3, 'precio_unitario': 0.35,
+                       'subtotal': 1.05}],
+            'total_pedido': 24001.05}
+
+
+def test_lista_pedidos_se_lee_como_lista_de_dicts():
+    originales = [_pedido(1), _pedido(2, 2, "2025-11-02 09:00:00")]
+    pedidos = ListaPedidos(originales)
+
+    assert len(pedidos) == 2 and pedidos == originales
+    assert isinstance(pedidos[0], VistaPedido)
+    assert pedidos[-1]['fecha_pedido'] == "2025-11-02 09:00:00"
+    assert pedidos[0].get('total_pedido') == 24001.05
+    assert pedidos[0].get('no_existe', 'x') == 'x'
+    assert [dict(p) for p in pedidos] == originales
+    assert json.loads(json.dumps(dict(pedidos[1]))) == originales[1]
+    with pytest.raises(IndexError):
+        pedidos[2]
+
+
+def test_pedidos_fuera_de_formato_se_conservan():
+    raro = {'id_pedido': 3, 'id_cliente': 1, 'fecha_pedido': '20/10/2025', 'items': [], 'total_pedido': 1.0}
+    sin_centavos_exactos = dict(_pedido(4), total_pedido=0.1 + 0.2)
+    no_finito = dict(_pedido(5), total_pedido=float('inf'))
+    pedidos = ListaPedidos([_pedido(1), raro, sin_centavos_exactos, no_finito])
+    assert pedidos[1] is raro
+    assert pedidos[2]['total_pedido'] == 0.1 + 0.2
+    assert list(pedidos) == [_pedido(1), raro, sin_centavos_exactos, no_finito]
+
+
+def test_entidades_sin_dict_por_instancia():
+    assert not hasattr(Producto(1, "Arroz", 12000, 15), '__dict__')
+    assert not hasattr(Cliente(1, "Mariana Zapata", "mariana@gmail.com"), '__dict__')
+
+
+def test_tienda_guarda_pedidos_por_columnas(tmp_path):
+    almacen = PersistenciaArchivos(str(tmp_path))
+    tienda = Tienda(almacen)
+    tienda.productos = {1: Producto(1, "Arroz", 12000, 15)}
+    tienda.clientes = {1: Cliente(1, "Cristian Rodriguez", "Cristiank18@gmail.com")}
+    tienda.pedidos = [_pedido(1)]
+    assert isinstance(tienda.pedidos, ListaPedidos)
+
+    nuevo = tienda.crear_pedido(1, {1: 1})
+    assert tienda.pedidos[-1] == nuevo
+    # La compactación serializa las vistas como JSON común
+    tienda._guardar_pedidos()
+    assert PersistenciaJSON.leer_pedidos(almacen.archivo_pedidos) == [_pedido(1), nuevo]
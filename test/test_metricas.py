@@ -0,0 +1,71 @@
+import json
+import os
+
+import pytest
+
+import metricas
+from metricas import RegistroMetricas
+from persistencia import CAMPOS_CLIENTE, PersistenciaCSV
+
+
+@pytest.fixture
+def registro_activo(monkeypatch):
+    registro = metricas.registro
+    monkeypatch.setattr(registro, 'activo', True)
+    registro.reiniciar()
+    yield registro
+    registro.reiniciar()
+
+
+def test_percentiles_y_contadores():
+    registro = RegistroMetricas(activo=True)
+    for ms in range(1, 101):
+        registro.registrar_tiempo('op', ms / 1000, formato='csv')
+    registro.contar('bytes', 10)
+    registro.contar('bytes', 5)
+    resumen = registro.resumen()
+    tiempo = resumen['tiempos'][0]
+    assert tiempo['cantidad'] == 100 and tiempo['etiquetas'] == {'formato': 'csv'}
+    assert tiempo['p50_ms'] == pytest.approx(51) and tiempo['p99_ms'] == pytest.approx(100)
+    assert resumen['contadores'] == [{'nombre': 'bytes', 'etiquetas': {}, 'valor': 15}]
+
+
+def test_inactivo_no_registra_nada():
+    registro = RegistroMetricas(activo=False)
+
+    @registro.cronometrar('op')
+    def doble(x):
+        return 2 * x
+
+    assert doble(4) == 8
+    with registro.medir('bloque'):
+        registro.contar('algo')
+    assert registro.resumen() == {'contadores': [], 'tiempos': []}
+
+
+def test_escritura_csv_cuenta_bytes_y_tiempos(tmp_path, registro_activo):
+    ruta = str(tmp_path / 'clientes.csv')
+    PersistenciaCSV.escribir_datos(ruta, [{'id_cliente': 1, 'nombre': 'Ana', 'email': 'ana@correo.com'}], CAMPOS_CLIENTE)
+    PersistenciaCSV.leer_datos(ruta, CAMPOS_CLIENTE)
+    resumen = registro_activo.resumen()
+    bytes_escritos = {c['etiquetas']['formato']: c['valor'] for c in resumen['contadores']
+                      if c['nombre'] == 'persistencia.bytes_escritos'}
+    assert bytes_escritos == {'csv': os.path.getsize(ruta)}
+    nombres = {t['nombre'] for t in resumen['tiempos']}
+    assert {'persistencia.csv.escribir', 'persistencia.csv.leer', 'persistencia.escritura'} <= nombres
+
+
+def test_volcado_prometheus_y_json(tmp_path):
+    registro = RegistroMetricas(activo=True)
+    registro.registrar_tiempo('tienda.crear_pedido', 0.002)
+    registro.contar('persistencia.bytes_escritos', 120, formato='jsonl')
+
+    texto = open(registro.volcar(str(tmp_path / 'metricas.prom')), encoding='utf-8').read()
+    assert '# TYPE tienda_persistencia_bytes_escritos_total counter' in texto
+    assert 'tienda_persistencia_bytes_escritos_total{formato="jsonl"} 120' in texto
+    assert 'tienda_tienda_crear_pedido_segundos{quantile="0.99"} 0.002000' in texto
+    assert 'tienda_tienda_crear_pedido_segundos_count 1' in texto
+
+    datos = json.load(open(registro.volcar(str(tmp_path / 'metricas.json')), encoding='utf-8'))
+    assert datos['tiempos'][0]['nombre'] == 'tienda.crear_pedido'
+    assert not os.path.exists(str(tmp_path / 'metricas.json.tmp'))
@@ -0,0 +1,119 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from gestion import Cliente, Producto, Tienda
+from persistencia import ConflictoVersion, PersistenciaArchivos, crear_almacen
+from persistencia_sqlite import PersistenciaSQLite
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Una terminal: intenta vender ``pedidos`` veces 1 unidad del producto 1 y 2 del producto 2
+TERMINAL = r"""
+import json, sys
+from gestion import Tienda
+from persistencia import crear_almacen
+tipo, ruta, pedidos = sys.argv[1], sys.argv[2], int(sys.argv[3])
+tienda = Tienda(crear_almacen(tipo, ruta))
+confirmados = [p['id_pedido'] for p in (tienda.crear_pedido(1, {1: 1, 2: 2}) for _ in range(pedidos)) if p]
+tienda.cerrar()
+print(json.dumps(confirmados))
+"""
+
+
+def _preparar(tipo, ruta):
+    almacen = crear_almacen(tipo, ruta)
+    almacen.guardar_productos({1: Producto(1, "Arroz", 2500, 30), 2: Producto(2, "Pan", 500, 1000)})
+    almacen.guardar_clientes({1: Cliente(1, "Ana", "ana@correo.com")})
+    return almacen
+
+
+@pytest.mark.parametrize("tipo", ["archivos", "sqlite"])
+def test_terminales_concurrentes_no_sobrevenden(tipo, tmp_path):
+    ruta = str(tmp_path / "tienda.db") if tipo == "sqlite" else str(tmp_path)
+    _preparar(tipo, ruta)
+    entorno = dict(os.environ, PYTHONPATH=RAIZ, TIENDA_MULTITERMINAL="1")
+    terminales = [subprocess.Popen([sys.executable, "-c", TERMINAL, tipo, ruta, "15"], cwd=tmp_path, env=entorno,
+                                   stdout=subprocess.PIPE, text=True) for _ in range(4)]
+    confirmados = []
+    for terminal in terminales:
+        salida, _ = terminal.communicate(timeout=120)
+        assert terminal.returncode == 0
+        confirmados += json.loads(salida.strip().splitlines()[-1])
+
+    # 60 intentos para 30 unidades: nunca se vende de más ni se pierde un descuento o un pedido
+    tienda = Tienda(crear_almacen(tipo, ruta))
+    assert 0 < len(confirmados) <= 30
+    assert tienda.productos[1].stock == 30 - len(confirmados)
+    assert tienda.productos[2].stock == 1000 - 2 * len(confirmados)
+    assert sorted(p['id_pedido'] for p in tienda.pedidos) == sorted(confirmados)
+    assert len(set(confirmados)) == len(confirmados)
+
+
+def test_version_desactualizada_es_conflicto(tmp_path):
+    _preparar("archivos", str(tmp_path))
+    terminal_a = Tienda(PersistenciaArchivos(str(tmp_path), compartido=True))
+    terminal_b = Tienda(PersistenciaArchivos(str(tmp_path), compartido=True))
+    terminal_a._asegurar_cargado('productos')  # ambas leen la versión 0
+    terminal_b._asegurar_cargado('productos')
+
+    assert terminal_a.actualizar_producto(1, precio=2600)
+    terminal_b.productos[1].stock = 5
+    with pytest.raises(ConflictoVersion) as conflicto:
+        terminal_b.almacen.guardar_productos(terminal_b.productos, {1})
+    assert conflicto.value.ids == [1]
+
+    # Al vender, la terminal B se pone al día antes de validar el stock y el precio
+    pedido = terminal_b.crear_pedido(1, {1: 2})
+    assert pedido['total_pedido'] == 5200
+    assert Tienda(PersistenciaArchivos(str(tmp_path))).productos[1].version == 2
+
+
+def test_pedidos_de_otra_terminal_se_sincronizan(tmp_path):
+    ruta = str(tmp_path / "tienda.db")
+    _preparar("sqlite", ruta)
+    terminal_a = Tienda(PersistenciaSQLite(ruta, compartido=True))
+    terminal_b = Tienda(PersistenciaSQLite(ruta, compartido=True))
+    assert terminal_b.generar_reporte_ventas() == 0
+
+    primero = terminal_a.crear_pedido(1, {1: 1})
+    segundo = terminal_b.crear_pedido(1, {2: 1})
+    assert segundo['id_pedido'] == primero['id_pedido'] + 1
+    assert terminal_b.generar_reporte_ventas() == 3000
+    assert [p['id_pedido'] for p in terminal_a.historial_pedidos_cliente(1)] == [1, 2]
+    assert terminal_a.siguiente_id('productos') == terminal_b.siguiente_id('productos') - 1
+
+
+def test_compactacion_de_otra_terminal_no_pierde_pedidos(tmp_path, monkeypatch):
+    monkeypatch.setattr("gestion.COMPACTAR_CADA", 3)
+    _preparar("archivos", str(tmp_path))
+    terminal_a = Tienda(PersistenciaArchivos(str(tmp_path), compartido=True))
+    terminal_b = Tienda(PersistenciaArchivos(str(tmp_path), compartido=True))
+    for i in range(4):
+        (terminal_a if i % 2 else terminal_b).crear_pedido(1, {2: 1})
+
+    assert len(json.loads((tmp_path / 'pedidos.json').read_text(encoding='utf-8'))) == 3
+    for tienda in (terminal_a, terminal_b, Tienda(PersistenciaArchivos(str(tmp_path)))):
+        assert [p['id_pedido'] for p in tienda.iterar_pedidos(id_cliente=1)] == [1, 2, 3, 4]
+        assert tienda.generar_reporte_ventas() == 2000
+
+
+@pytest.mark.parametrize("tipo", ["archivos", "sqlite"])
+def test_lote_con_otra_terminal_vendiendo(tipo, tmp_path):
+    ruta = str(tmp_path / "tienda.db") if tipo == "sqlite" else str(tmp_path)
+    _preparar(tipo, ruta)
+    entorno = {"archivos": PersistenciaArchivos, "sqlite": PersistenciaSQLite}[tipo]
+    terminal_a = Tienda(entorno(ruta, compartido=True))
+    terminal_b = Tienda(entorno(ruta, compartido=True))
+    terminal_a._asegurar_cargado('productos')
+    assert terminal_b.crear_pedido(1, {1: 24})['id_pedido'] == 1
+
+    # La terminal A tenía 30 unidades en memoria: el lote se valida con el stock real
+    resultado = terminal_a.crear_pedidos_bulk([{'id_cliente': 1, 'productos': {1: 3}} for _ in range(3)])
+    assert [p['id_pedido'] for p in resultado.creados] == [2, 3]
+    assert [r['posicion'] for r in resultado.rechazados] == [2]
+    assert Tienda(crear_almacen(tipo, ruta)).productos[1].stock == 0
+    assert [p['id_pedido'] for p in terminal_b.iterar_pedidos(id_cliente=1)] == [1, 2, 3]
@@ -0,0 +1,75 @@
+import pytest
+
+import main
+from gestion import Producto
+from lista_pedidos import ListaPedidos
+from paginador import Paginador
+from persistencia_binaria import PersistenciaBinaria
+
+
+class _Contador(list):
+    """Lista que cuenta las filas leídas por posición."""
+
+    leidas = 0
+
+    def __getitem__(self, posicion):
+        self.leidas += 1
+        return super().__getitem__(posicion)
+
+
+def _pedido(id_pedido, total, fecha="2025-10-20 08:15:49"):
+    return {'id_pedido': id_pedido, 'id_cliente': id_pedido % 3, 'nombre_cliente': 'Ana', 'fecha_pedido': fecha,
+            'items': [], 'total_pedido': total}
+
+
+def test_paginas_leen_solo_sus_filas():
+    filas = _Contador(range(1, 48))
+    paginador = Paginador(filas, tamano=10)
+    assert paginador.total_paginas == 5
+    assert paginador.filas_pagina() == list(range(1, 11))
+    assert paginador.ir_a(3) == list(range(21, 31)) and paginador.rango() == (21, 30)
+    assert paginador.ultima() == list(range(41, 48))
+    assert paginador.siguiente() == list(range(41, 48))  # no pasa de la última
+    assert paginador.ir_a(0) == list(range(1, 11))
+    assert filas.leidas == 10 + 10 + 7 + 7 + 10
+    assert Paginador([], tamano=10).filas_pagina() == [] and Paginador([]).rango() == (0, 0)
+    with pytest.raises(ValueError):
+        Paginador(filas, tamano=0)
+
+
+def test_ordenar_por_clave_y_descendente():
+    productos = [Producto(i, nombre, 100 * i, stock) for i, nombre, stock in
+                 [(1, "Pan", 5), (2, "arroz", 9), (3, "Leche", 5), (4, "Café", 1)]]
+    paginador = Paginador(productos, tamano=2)
+    paginador.ordenar(p.nombre.lower() for p in productos)
+    assert [p.nombre for p in paginador.filas_pagina()] == ["arroz", "Café"]
+    paginador.ordenar((p.stock for p in productos), descendente=True)
+    assert [p.id_producto for p in paginador.ir_a(2)] == [3, 4]  # empate: orden original
+    paginador.ordenar(descendente=True)
+    assert [p.id_producto for p in paginador.filas_pagina()] == [4, 3]
+
+
+def test_valores_columna_de_pedidos_con_irregulares(tmp_path):
+    raro = {'id_pedido': 2, 'fecha_pedido': '20/10/2025', 'total_pedido': 7.5}
+    pedidos = ListaPedidos([_pedido(1, 30.0), raro, _pedido(3, 10.0, "2025-01-01 00:00:00")])
+    assert list(pedidos.valores_columna('total')) == [3000, 750, 1000]
+    assert list(pedidos.valores_columna('fecha'))[1:] == [0, 1735689600]
+
+    archivo = str(tmp_path / 'pedidos.bin')
+    PersistenciaBinaria.escribir_pedidos(archivo, pedidos)
+    mapeada = PersistenciaBinaria.leer_pedidos(archivo)
+    mapeada.append(_pedido(4, 20.0))
+    paginador = Paginador(mapeada, tamano=3)
+    paginador.ordenar(mapeada.valores_columna('total'), descendente=True)
+    assert [p['id_pedido'] for p in paginador.filas_pagina()] == [1, 4, 3]
+
+
+def test_mostrar_lista_navega_por_paginas(monkeypatch):
+    productos = [Producto(i, f"Producto {i:05d}", 100, i) for i in range(1, 50001)]
+    respuestas = iter(["u", "o4", "o4", "2", ""])
+    monkeypatch.setattr(main.console, "input", lambda *_: next(respuestas))
+    with main.console.capture() as captura:
+        main.mostrar_lista("Productos", productos)
+    salida = captura.get()
+    assert "Página 2500 de 2500" in salida and "Producto 50000" in salida
+    assert "Stock ▼" in salida and "Página 2 de 2500" in salida and "Producto 49980" in salida
@@ -0,0 +1,49 @@
+import os
+import pstats
+import time
+
+import main
+from gestion import Tienda
+from perfilado import Perfilador
+from persistencia import PersistenciaArchivos
+
+
+def _trabajo_pesado():
+    return sum(i * i for i in range(20000))
+
+
+def test_un_perfil_por_accion_y_resumen(tmp_path):
+    perfilador = Perfilador(str(tmp_path), contexto=lambda: {'Pedidos': 1234})
+    assert perfilador.ejecutar('reporte', _trabajo_pesado) == _trabajo_pesado()
+    perfilador.ejecutar('reporte', _trabajo_pesado)
+    perfilador.ejecutar('historial', lambda: None)
+
+    archivos = sorted(os.listdir(tmp_path))
+    assert archivos == ['001-reporte.prof', '002-reporte.prof', '003-historial.prof']
+    assert pstats.Stats(str(tmp_path / '001-reporte.prof')).total_calls > 0
+
+    resumen = open(perfilador.cerrar(), encoding='utf-8').read()
+    assert 'Pedidos: 1234' in resumen
+    assert resumen.index('=== reporte (2 llamadas') < resumen.index('=== historial (1 llamadas')
+    assert '_trabajo_pesado' in resumen
+
+
+def test_la_espera_del_usuario_no_se_mide(tmp_path):
+    perfilador = Perfilador(str(tmp_path))
+    leer = perfilador.sin_medir(lambda: time.sleep(0.2) or 's')
+
+    assert perfilador.ejecutar('pedido', leer) == 's'
+    llamadas, segundos, estadisticas = perfilador._acciones['pedido']
+    assert llamadas == 1 and segundos < 0.1
+    assert not any(nombre == 'sleep' for _, _, nombre in estadisticas.stats)
+    assert leer() == 's'  # fuera de una acción se llama sin más
+
+
+def test_volumen_datos_no_carga_colecciones(tmp_path, monkeypatch):
+    tienda = Tienda(PersistenciaArchivos(str(tmp_path)))
+    monkeypatch.setattr(main, "tienda_app", tienda)
+    tienda.crear_cliente("Ana", "ana@correo.com")
+
+    assert main.volumen_datos() == {"Almacenamiento": "PersistenciaArchivos", "Productos": "sin cargar",
+                                    "Clientes": 1, "Pedidos": "sin cargar"}
+    assert tienda._pedidos is None
@@ -0,0 +1,204 @@
+import json
+
+import pytest
+from openpyxl import load_workbook
+
+from gestion import Producto
+from persistencia import CAMPOS_PRODUCTO, PersistenciaArchivos, PersistenciaCSV, PersistenciaJSON, TransaccionArchivos
+
+
+def _pedido(id_pedido, total=10.0):
+    return {'id_pedido': id_pedido, 'id_cliente': 1, 'nombre_cliente': 'Ana',
+            'fecha_pedido': '2025-10-20 08:15:49', 'items': [], 'total_pedido': total}
+
+
+def test_anexar_pedido_y_reconstruir(tmp_path):
+    archivo = str(tmp_path / 'pedidos.json')
+    PersistenciaJSON.escribir_pedidos(archivo, [_pedido(1)])
+    PersistenciaJSON.anexar_pedido(archivo, _pedido(2))
+    PersistenciaJSON.anexar_pedido(archivo, _pedido(3))
+
+    pedidos = PersistenciaJSON.leer_pedidos(archivo)
+    assert [p['id_pedido'] for p in pedidos] == [1, 2, 3]
+    assert PersistenciaJSON.lineas_diario(archivo) == 2
+
+
+def test_compactar_pedidos_vacia_diario(tmp_path):
+    archivo = str(tmp_path / 'pedidos.json')
+    PersistenciaJSON.anexar_pedido(archivo, _pedido(1))
+    PersistenciaJSON.compactar_pedidos(archivo, PersistenciaJSON.leer_pedidos(archivo))
+
+    assert PersistenciaJSON.lineas_diario(archivo) == 0
+    with open(archivo, encoding='utf-8') as f:
+        assert [p['id_pedido'] for p in json.load(f)] == [1]
+
+
+def test_diario_ignora_linea_incompleta_y_duplicados(tmp_path):
+    archivo = str(tmp_path / 'pedidos.json')
+    PersistenciaJSON.escribir_pedidos(archivo, [_pedido(1)])
+    with open(PersistenciaJSON.ruta_diario(archivo), 'w', encoding='utf-8') as f:
+        f.write(json.dumps(_pedido(1)) + '\n')
+        f.write(json.dumps(_pedido(2)) + '\n')
+        f.write('{"id_pedido": 3, "items"')
+
+    pedidos = PersistenciaJSON.leer_pedidos(archivo)
+    assert [p['id_pedido'] for p in pedidos] == [1, 2]
+
+
+def test_transaccion_confirma_csv_y_diario(tmp_path):
+    productos = str(tmp_path / 'productos.csv')
+    pedidos = str(tmp_path / 'pedidos.json')
+    diario = str(tmp_path / 'transaccion.journal')
+
+    with TransaccionArchivos(diario) as tx:
+        tx.escribir_csv(productos, [Producto(1, "Pan", 500, 4)], CAMPOS_PRODUCTO)
+        tx.anexar_pedido(pedidos, _pedido(1))
+
+    assert not (tmp_path / 'transaccion.journal').exists()
+    assert list(tmp_path.glob('.*.tmp')) == []
+    assert PersistenciaCSV.leer_datos(productos, CAMPOS_PRODUCTO)[0]['stock'] == '4'
+    assert [p['id_pedido'] for p in PersistenciaJSON.leer_pedidos(pedidos)] == [1]
+
+
+def test_recuperar_transaccion_interrumpida(tmp_path):
+    productos = str(tmp_path / 'productos.csv')
+    pedidos = str(tmp_path / 'pedidos.json')
+    diario = str(tmp_path / 'transaccion.journal')
+    PersistenciaCSV.escribir_datos(productos, [Producto(1, "Pan", 500, 5)], CAMPOS_PRODUCTO)
+
+    tx = TransaccionArchivos(diario)
+    tx.escribir_csv(productos, [Producto(1, "Pan", 500, 3)], CAMPOS_PRODUCTO)
+    tx.anexar_pedido(pedidos, _pedido(1))
+    # Simular un corte justo después de escribir el diario de intención
+    with open(diario, 'w', encoding='utf-8') as f:
+        json.dump(tx.operaciones(), f)
+
+    assert TransaccionArchivos.recuperar(diario)
+    assert TransaccionArchivos.recuperar(diario) is False
+    assert PersistenciaCSV.leer_datos(productos, CAMPOS_PRODUCTO)[0]['stock'] == '3'
+    assert PersistenciaJSON.lineas_diario(pedidos) == 1
+
+
+def test_recuperar_solo_borra_temporales_propios(tmp_path):
+    propios = [tmp_path / '.productos.csv.x1y2.tmp', tmp_path / '.pedidos.json.ab12.tmp',
+               tmp_path / '.transaccion.journal.zz.tmp']
+    ajenos = [tmp_path / '.editor.tmp', tmp_path / '.productos.csv.tmp', tmp_path / '.otro.csv.ab12.tmp']
+    for archivo in propios + ajenos:
+        archivo.write_text('x', encoding='utf-8')
+
+    PersistenciaArchivos(str(tmp_path))
+    assert [archivo for archivo in propios if archivo.exists()] == []
+    assert all(archivo.exists() for archivo in ajenos)
+
+
+def test_transaccion_descartada_no_modifica(tmp_path):
+    productos = str(tmp_path / 'productos.csv')
+    PersistenciaCSV.escribir_datos(productos, [Producto(1, "Pan", 500, 5)], CAMPOS_PRODUCTO)
+
+    try:
+        with TransaccionArchivos(str(tmp_path / 'transaccion.journal')) as tx:
+            tx.escribir_csv(productos, [Producto(1, "Pan", 500, 0)], CAMPOS_PRODUCTO)
+            raise RuntimeError("corte")
+    except RuntimeError:
+        pass
+
+    assert PersistenciaCSV.leer_datos(productos, CAMPOS_PRODUCTO)[0]['stock'] == '5'
+    assert list(tmp_path.glob('.*.tmp')) == []
+
+
+def test_iterar_pedidos_snapshot_y_diario(tmp_path):
+    archivo = str(tmp_path / 'pedidos.json')
+    PersistenciaJSON.escribir_pedidos(archivo, [_pedido(1), _pedido(2)])
+    PersistenciaJSON.anexar_pedido(archivo, _pedido(2))
+    PersistenciaJSON.anexar_pedido(archivo, _pedido(3))
+    assert [p['id_pedido'] for p in PersistenciaJSON.iterar_pedidos(archivo)] == [1, 2, 3]
+
+
+def test_iterar_pedidos_snapshot_con_indentacion(tmp_path):
+    archivo = tmp_path / 'pedidos.json'
+    archivo.write_text(json.dumps([_pedido(1), _pedido(2)], indent=4), encoding='utf-8')
+    assert [p['id_pedido'] for p in PersistenciaJSON.iterar_pedidos(str(archivo))] == [1, 2]
+
+
+@pytest.mark.parametrize('snapshot', [[], [1, 2]])
+def test_iterar_pedidos_snapshot_en_una_linea(tmp_path, snapshot):
+    # json.dump(..., indent=4) de una lista vacía escribe "[]" en una sola línea
+    archivo = tmp_path / 'pedidos.json'
+    archivo.write_text(json.dumps([_pedido(i) for i in snapshot], indent=4), encoding='utf-8')
+    PersistenciaJSON.anexar_pedido(str(archivo), _pedido(2))
+    PersistenciaJSON.anexar_pedido(str(archivo), _pedido(3))
+    esperado = [p['id_pedido'] for p in PersistenciaJSON.leer_pedidos(str(archivo))]
+    assert [p['id_pedido'] for p in PersistenciaJSON.iterar_pedidos(str(archivo))] == esperado == sorted({*snapshot, 2, 3})
+
+
+def test_exportar_excel_en_flujo_con_filtros(tmp_path):
+    pedidos = [_pedido(1), dict(_pedido(2), id_cliente=2, fecha_pedido='2025-11-01 10:00:00'),
+               dict(_pedido(3), fecha_pedido='2025-11-02 10:00:00',
+                    items=[{'id_producto': 1, 'nombre': 'Pan', 'cantidad': 2, 'precio_unitario': 5.0, 'subtotal': 10.0}])]
+    archivo = str(tmp_path / 'reporte.xlsx')
+
+    cantidad = PersistenciaJSON.exportar_pedidos_excel(archivo, iter(pedidos), desde='2025-11-01', id_cliente=1)
+
+    assert cantidad == 1
+    wb = load_workbook(archivo, read_only=True)
+    assert [fila[0] for fila in wb["Pedidos"].iter_rows(values_only=True)] == ["id_pedido", 3]
+    assert list(wb["Items"].iter_rows(values_only=True))[1] == (3, 1, 'Pan', 2, 5.0, 10.0)
+    wb.close()
+
+
+def _pedidos_con_items(n, items_por_pedido):
+    for i in range(1, n + 1):
+        items = [{'id_producto': j, 'nombre': f'Producto {j}', 'cantidad': 1, 'precio_unitario': 2.5, 'subtotal': 2.5}
+                 for j in range(items_por_pedido)]
+        yield dict(_pedido(i, total=2.5 * items_por_pedido), items=items,
+                   fecha_pedido=f'2025-{1 + i % 12:02d}-10 10:00:00')
+
+
+def test_exportar_pdf_por_bloques_con_progreso(tmp_path):
+    archivo = tmp_path / 'reporte.pdf'
+    avances = []
+    cantidad = PersistenciaJSON.exportar_pedidos_pdf(str(archivo), _pedidos_con_items(100, 5),
+                                                     progreso=lambda hechos, total: avances.append((hechos, total)))
+    assert cantidad == 100
+    assert archivo.read_bytes().startswith(b'%PDF')
+    assert avances and avances[-1][0] == avances[-1][1]
+
+
+def test_exportar_pdf_solo_resumen(tmp_path):
+    archivo = tmp_path / 'resumen.pdf'
+    cantidad = PersistenciaJSON.exportar_pedidos_pdf(str(archivo), _pedidos_con_items(50, 3), solo_resumen=True,
+                                                     desde='2025-06-01')
+    assert 0 < cantidad < 50
+    assert archivo.read_bytes().startswith(b'%PDF')
+
+
+def test_recuperar_lote_anexado_a_medias(tmp_path):
+    pedidos = str(tmp_path / 'pedidos.json')
+    diario = str(tmp_path / 'transaccion.journal')
+    tx = TransaccionArchivos(diario)
+    tx.anexar_pedidos(pedidos, [_pedido(i) for i in (1, 2, 3)])
+    # Corte después de anexar las dos primeras líneas del lote (diario sin tamaños, formato anterior)
+    for anexo in tx.anexos[:2]:
+        with open(anexo[0], 'a', encoding='utf-8') as f:
+            f.write(anexo[1] + '\n')
+    with open(diario, 'w', encoding='utf-8') as f:
+        json.dump({'renombrar': tx.renombres, 'anexar': tx.anexos}, f)
+
+    assert TransaccionArchivos.recuperar(diario)
+    assert [p['id_pedido'] for p in PersistenciaJSON._leer_diario(pedidos)] == [1, 2, 3]
+
+
+def test_recuperar_lote_con_linea_cortada(tmp_path):
+    pedidos = str(tmp_path / 'pedidos.json')
+    diario = str(tmp_path / 'transaccion.journal')
+    PersistenciaJSON.anexar_pedido(pedidos, _pedido(1))
+    tx = TransaccionArchivos(diario)
+    tx.anexar_pedidos(pedidos, [_pedido(i) for i in (2, 3, 4)])
+    with open(diario, 'w', encoding='utf-8') as f:
+        json.dump(tx.operaciones(), f)
+    # Corte con las líneas 2 y 3 completas y la 4 escrita a medias
+    with open(tx.anexos[0][0], 'a', encoding='utf-8') as f:
+        f.write(tx.anexos[0][1] + '\n' + tx.anexos[1][1] + '\n' + tx.anexos[2][1][:10])
+
+    assert TransaccionArchivos.recuperar(diario)
+    assert [p['id_pedido'] for p in PersistenciaJSON._leer_diario(pedidos)] == [1, 2, 3, 4]
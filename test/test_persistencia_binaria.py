@@ -0,0 +1,76 @@
+import pytest
+
+import cli
+from gestion import Tienda
+from lista_pedidos import ListaPedidos, ListaPedidosMapeada
+from persistencia import PersistenciaArchivos, PersistenciaJSON
+from persistencia_binaria import PersistenciaBinaria
+
+
+def _pedido(id_pedido, id_cliente=1, fecha="2025-10-20 08:15:49"):
+    return {'id_pedido': id_pedido, 'id_cliente': id_cliente, 'nombre_cliente': f'Cliente {id_cliente}',
+            'fecha_pedido': fecha,
+            'items': [{'id_producto': 1, 'nombre': 'Ñoquis', 'cantidad': 2, 'precio_unitario': 12.5,
+                       'subtotal': 25.0}],
+            'total_pedido': 25.0}
+
+
+def test_ida_y_vuelta_con_pedidos_irregulares(tmp_path):
+    archivo = str(tmp_path / 'pedidos.bin')
+    raro = {'id_pedido': 2, 'id_cliente': 1, 'fecha_pedido': '20/10/2025', 'items': [], 'total_pedido': 1.0}
+    originales = [_pedido(1), raro, _pedido(3, 2, "2025-11-02 09:00:00")]
+
+    assert PersistenciaBinaria.escribir_pedidos(archivo, originales) == 3
+    pedidos = PersistenciaBinaria.leer_pedidos(archivo)
+
+    assert isinstance(pedidos, ListaPedidosMapeada)
+    assert pedidos == originales
+    assert pedidos.max_id() == 3 and pedidos[-1]['items'][0]['nombre'] == 'Ñoquis'
+
+
+def test_lista_mapeada_acepta_pedidos_nuevos(tmp_path):
+    archivo = str(tmp_path / 'pedidos.bin')
+    PersistenciaBinaria.escribir_pedidos(archivo, [_pedido(1), _pedido(2)])
+    pedidos = PersistenciaBinaria.leer_pedidos(archivo)
+    pedidos.append(_pedido(3, 3))
+
+    assert len(pedidos) == 3 and pedidos.max_id() == 3
+    assert [p['id_cliente'] for p in pedidos] == [1, 1, 3]
+    assert ListaPedidos(pedidos).columnas() == ListaPedidos([_pedido(1), _pedido(2), _pedido(3, 3)]).columnas()
+
+
+def test_snapshot_invalido(tmp_path):
+    archivo = tmp_path / 'pedidos.bin'
+    PersistenciaBinaria.escribir_pedidos(str(archivo), [_pedido(1)])
+    archivo.write_bytes(archivo.read_bytes()[:-8])
+    with pytest.raises(ValueError):
+        PersistenciaBinaria.leer_pedidos(str(archivo))
+
+
+def test_tienda_con_snapshot_binario_y_diario(tmp_path):
+    PersistenciaJSON.escribir_pedidos(str(tmp_path / 'pedidos.json'), [_pedido(1), _pedido(2, 2)])
+    almacen = PersistenciaArchivos(str(tmp_path))
+    assert almacen.convertir_pedidos('binario') == 2
+    assert (tmp_path / 'pedidos.json.bak').exists()
+
+    PersistenciaJSON.anexar_pedido(almacen.archivo_pedidos, _pedido(3, 2, "2025-11-02 09:00:00"))
+    tienda = Tienda(PersistenciaArchivos(str(tmp_path)))
+    assert [p['id_pedido'] for p in tienda.iterar_pedidos(id_cliente=2)] == [2, 3]
+    assert tienda.generar_reporte_ventas() == 75.0
+
+    # La compactación reescribe el snapshot binario y vacía el diario
+    almacen = PersistenciaArchivos(str(tmp_path))
+    almacen.guardar_pedidos(almacen.cargar_pedidos())
+    assert PersistenciaJSON.lineas_diario(almacen.archivo_pedidos) == 0
+    assert [p['id_pedido'] for p in PersistenciaBinaria.leer_pedidos(almacen.archivo_binario)] == [1, 2, 3]
+
+
+def test_cli_convertir_pedidos_ida_y_vuelta(tmp_path):
+    PersistenciaJSON.escribir_pedidos(str(tmp_path / 'pedidos.json'), [_pedido(1), _pedido(2)])
+
+    assert cli.main(['convertir-pedidos', '--formato', 'binario', '--directorio', str(tmp_path)]) == 0
+    assert (tmp_path / 'pedidos.bin').exists() and not (tmp_path / 'pedidos.json').exists()
+
+    assert cli.main(['convertir-pedidos', '--formato', 'json', '--directorio', str(tmp_path)]) == 0
+    assert not (tmp_path / 'pedidos.bin').exists()
+    assert [p['id_pedido'] for p in PersistenciaJSON.leer_pedidos(str(tmp_path / 'pedidos.json'))] == [1, 2]
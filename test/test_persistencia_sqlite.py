@@ -0,0 +1,110 @@
+import sqlite3
+
+import pytest
+
+from gestion import Tienda, Producto, Cliente
+from persistencia import PersistenciaArchivos
+from persistencia_sqlite import PersistenciaSQLite
+
+
+@pytest.fixture
+def tienda_sqlite(tmp_path):
+    almacen = PersistenciaSQLite(str(tmp_path / "tienda.db"))
+    tienda = Tienda(almacen)
+    tienda.productos = {1: Producto(1, "Arroz", 12000, 15), 2: Producto(2, "Pan", 500, 15)}
+    tienda.clientes = {1: Cliente(1, "Cristian Rodriguez", "Cristiank18@gmail.com")}
+    tienda._guardar_productos()
+    tienda._guardar_clientes()
+    yield tienda
+    almacen.cerrar()
+
+
+def test_crear_pedido_actualiza_filas(tienda_sqlite, tmp_path):
+    tienda_sqlite.crear_pedido(1, {1: 2, 2: 3})
+
+    recargada = Tienda(PersistenciaSQLite(str(tmp_path / "tienda.db")))
+    assert recargada.productos[1].stock == 13
+    assert recargada.productos[2].stock == 12
+    assert len(recargada.pedidos) == 1
+    assert recargada.pedidos[0]["total_pedido"] == pytest.approx(25500)
+    assert [it["id_producto"] for it in recargada.pedidos[0]["items"]] == [1, 2]
+
+
+def test_guardar_productos_por_id(tienda_sqlite):
+    tienda_sqlite.productos[1].precio = 13000
+    del tienda_sqlite.productos[2]
+    tienda_sqlite.almacen.guardar_productos(tienda_sqlite.productos, ids={1, 2})
+
+    filas = tienda_sqlite.almacen.cargar_productos()
+    assert filas == [{'id_producto': 1, 'nombre': 'Arroz', 'precio': 13000.0, 'stock': 15, 'version': 0, 'codigo': None}]
+
+
+def test_migrar_desde_archivos(tmp_path):
+    origen = tmp_path / "datos"
+    origen.mkdir()
+    tienda = Tienda(PersistenciaArchivos(str(origen)))
+    tienda.productos = {1: Producto(1, "Pan", 500, 5)}
+    tienda.clientes = {1: Cliente(1, "Ana", "ana@gmail.com")}
+    tienda._guardar_productos()
+    tienda._guardar_clientes()
+    tienda.crear_pedido(1, {1: 2})
+
+    destino = PersistenciaSQLite(str(tmp_path / "tienda.db"))
+    totales = destino.importar(PersistenciaArchivos(str(origen)))
+    assert totales == {'productos': 1, 'clientes': 1, 'pedidos': 1}
+    assert destino.cargar_pedidos() == PersistenciaArchivos(str(origen)).cargar_pedidos()
+    destino.cerrar()
+
+
+def test_migrar_con_codigos_repetidos(tmp_path):
+    origen = tmp_path / "datos"
+    origen.mkdir()
+    (origen / "productos.csv").write_text(
+        "id_producto,nombre,precio,stock,version,codigo\n"
+        "1,Pan,500.0,5,0,036000291452\n2,Arroz,900.0,5,0, 0036000291452\n3,Leche,700.0,5,0,AB-12\n"
+        "4,Sal,300.0,5,0,AB12\n", encoding="utf-8")
+
+    destino = PersistenciaSQLite(str(tmp_path / "tienda.db"))
+    with pytest.raises(ValueError, match=r"036000291452 \(productos 1 y 2\)"):
+        destino.importar(PersistenciaArchivos(str(origen)))
+    assert destino.cargar_productos() == []
+
+    (origen / "productos.csv").write_text(
+        "id_producto,nombre,precio,stock,version,codigo\n1,Pan,500.0,5,0, 7702001 \n", encoding="utf-8")
+    destino.conexion.execute("INSERT INTO productos VALUES (9, 'Otro', 1, 1, 0, '7702001')")
+    with pytest.raises(ValueError, match="No se pudo migrar"):
+        destino.importar(PersistenciaArchivos(str(origen)))
+    destino.conexion.execute("DELETE FROM productos WHERE id_producto = 9")
+    destino.importar(PersistenciaArchivos(str(origen)))
+    assert destino.cargar_productos()[0]['codigo'] == '7702001'
+    destino.cerrar()
+
+
+def test_codigo_unico_e_intercambio(tienda_sqlite, tmp_path):
+    tienda_sqlite.actualizar_producto(1, codigo="A1")
+    tienda_sqlite.actualizar_producto(2, codigo="B2")
+    tienda_sqlite._guardar_productos()
+    # Intercambiar los códigos en una sola escritura no choca con el índice único
+    tienda_sqlite.actualizar_producto(1, codigo="")
+    tienda_sqlite.actualizar_producto(2, codigo="A1")
+    tienda_sqlite.actualizar_producto(1, codigo="B2")
+    tienda_sqlite.almacen.guardar_productos(tienda_sqlite.productos, ids=[2, 1])
+
+    recargada = Tienda(PersistenciaSQLite(str(tmp_path / "tienda.db")))
+    assert recargada.buscar_por_codigo("A1").id_producto == 2 and recargada.buscar_por_codigo("B2").id_producto == 1
+    with pytest.raises(sqlite3.IntegrityError), tienda_sqlite.almacen.conexion:
+        tienda_sqlite.almacen.conexion.execute("UPDATE productos SET codigo = 'A1' WHERE id_producto = 1")
+
+
+def test_migra_base_sin_codigo(tmp_path):
+    ruta = str(tmp_path / "vieja.db")
+    conexion = sqlite3.connect(ruta)
+    conexion.execute("CREATE TABLE productos (id_producto INTEGER PRIMARY KEY, nombre TEXT NOT NULL, "
+                     "precio REAL NOT NULL, stock INTEGER NOT NULL, version INTEGER NOT NULL DEFAULT 0)")
+    conexion.execute("INSERT INTO productos VALUES (1, 'Pan', 500, 5, 0)")
+    conexion.commit()
+    conexion.close()
+
+    almacen = PersistenciaSQLite(ruta)
+    assert almacen.cargar_productos()[0]['codigo'] is None
+    almacen.cerrar()
@@ -0,0 +1,110 @@
+import asyncio
+import json
+
+import pytest
+
+from gestion import Cliente, Producto, Tienda
+from persistencia import PersistenciaArchivos
+from servicio import ServicioTienda
+
+
+async def _solicitar(puerto, metodo, ruta, datos=None):
+    lector, escritor = await asyncio.open_connection('127.0.0.1', puerto)
+    cuerpo = json.dumps(datos).encode() if datos is not None else b''
+    escritor.write(f"{metodo} {ruta} HTTP/1.1\r\nHost: prueba\r\nContent-Length: {len(cuerpo)}\r\n"
+                   f"Connection: close\r\n\r\n".encode() + cuerpo)
+    respuesta = await lector.read()
+    escritor.close()
+    cabecera, _, cuerpo = respuesta.partition(b'\r\n\r\n')
+    return int(cabecera.split()[1]), json.loads(cuerpo)
+
+
+@pytest.fixture
+def tienda(tmp_path):
+    tienda = Tienda(PersistenciaArchivos(str(tmp_path)))
+    tienda.productos = {1: Producto(1, "Arroz", 2500, 10), 2: Producto(2, "Pan Integral", 500, 100)}
+    tienda.clientes = {1: Cliente(1, "Ana", "ana@correo.com")}
+    tienda.pedidos = []
+    return tienda
+
+
+def _con_servicio(tienda, prueba):
+    async def ejecutar():
+        servicio = ServicioTienda(tienda)
+        servidor = await servicio.iniciar('127.0.0.1', 0)
+        try:
+            return await prueba(servidor.sockets[0].getsockname()[1])
+        finally:
+            await servicio.detener()
+    return asyncio.run(ejecutar())
+
+
+def test_consultas_y_altas(tienda):
+    async def prueba(puerto):
+        assert await _solicitar(puerto, 'GET', '/productos?q=integral') == \
+            (200, [{'id_producto': 2, 'nombre': 'Pan Integral', 'precio': 500.0, 'stock': 100, 'version': 0,
+                   'codigo': None}])
+        assert (await _solicitar(puerto, 'GET', '/productos/9'))[0] == 404
+        estado, creado = await _solicitar(puerto, 'POST', '/clientes', {'nombre': 'Luis', 'email': 'luis@correo.com'})
+        assert estado == 201 and creado['id_cliente'] == 2
+        assert (await _solicitar(puerto, 'PUT', '/productos/1', {'stock': 3}))[1]['stock'] == 3
+        assert (await _solicitar(puerto, 'POST', '/productos', {'nombre': 'Sal'}))[0] == 400
+        assert (await _solicitar(puerto, 'DELETE', '/clientes'))[0] == 405
+        assert (await _solicitar(puerto, 'GET', '/no-existe'))[0] == 404
+
+    _con_servicio(tienda, prueba)
+
+
+def test_pedidos_concurrentes_se_serializan(tienda):
+    async def prueba(puerto):
+        respuestas = await asyncio.gather(*(_solicitar(puerto, 'POST', '/pedidos', {'id_cliente': 1, 'items': {'1': 1}})
+                                            for _ in range(15)))
+        estados = sorted(estado for estado, _ in respuestas)
+        assert estados == [201] * 10 + [409] * 5
+        assert 'Stock insuficiente' in next(r['error'] for e, r in respuestas if e == 409)
+        ids = sorted(r['id_pedido'] for e, r in respuestas if e == 201)
+        assert ids == list(range(1, 11))
+
+        estado, reporte = await _solicitar(puerto, 'GET', '/reportes/ventas')
+        assert estado == 200 and reporte['pedidos'] == 10 and reporte['total'] == 25000.0
+        assert len((await _solicitar(puerto, 'GET', '/clientes/1/pedidos'))[1]) == 10
+        assert len((await _solicitar(puerto, 'GET', '/pedidos?limite=3'))[1]) == 3
+
+    _con_servicio(tienda, prueba)
+    assert tienda.productos[1].stock == 0
+
+
+@pytest.mark.parametrize('items', [{'1': -3}, {'1': 0}, {'1': 'dos'}, {}])
+def test_pedido_con_cantidades_invalidas(tienda, items):
+    async def prueba(puerto):
+        estado, respuesta = await _solicitar(puerto, 'POST', '/pedidos', {'id_cliente': 1, 'items': items})
+        assert estado == 400 and 'error' in respuesta
+
+    _con_servicio(tienda, prueba)
+    assert tienda.productos[1].stock == 10 and len(tienda.pedidos) == 0
+
+
+@pytest.mark.parametrize('datos', [{'nombre': 5, 'stock': 1}, {'nombre': ['Sal']}, {'nombre': 'Sal', 'precio': 'caro'},
+                                   {'nombre': ' '}, {'stock': 'x'}])
+def test_actualizar_producto_con_tipos_invalidos(tienda, datos):
+    async def prueba(puerto):
+        estado, respuesta = await _solicitar(puerto, 'PUT', '/productos/1', datos)
+        assert estado == 400 and 'error' in respuesta
+
+    _con_servicio(tienda, prueba)
+    assert tienda.productos[1].to_dict() == Producto(1, "Arroz", 2500, 10).to_dict()
+    assert tienda.buscar_productos_por_nombre('arroz') == [tienda.productos[1]]
+
+
+@pytest.mark.parametrize('largo', ['abc', '-5', '+3'])
+def test_content_length_invalido(tienda, largo):
+    async def prueba(puerto):
+        lector, escritor = await asyncio.open_connection('127.0.0.1', puerto)
+        escritor.write(f"POST /clientes HTTP/1.1\r\nContent-Length: {largo}\r\n\r\n".encode())
+        respuesta = await lector.read()
+        escritor.close()
+        assert respuesta.split()[1] == b'400' and b'Connection: close' in respuesta
+        # El servicio sigue atendiendo
+        assert (await _solicitar(puerto, 'GET', '/productos/1'))[0] == 200
+
+    _con_servicio(tienda, prueba)
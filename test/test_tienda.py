@@ -1,8 +1,14 @@
+import subprocess
+import sys
+
 import pytest
-from gestion import Tienda, Producto, Cliente
+from gestion import Tienda, Producto, Cliente, PoliticaDurabilidad
+from persistencia import CAMPOS_PRODUCTO, PersistenciaArchivos, PersistenciaCSV, PersistenciaJSON
 
 @pytest.fixture
-def tienda_vacia(monkeypatch):
+def tienda_vacia(monkeypatch, tmp_path):
+    # Trabajar en un directorio temporal para no tocar los archivos de datos reales
+    monkeypatch.chdir(tmp_path)
     tienda = Tienda()
     tienda.productos = {}
     tienda.clientes = {1: Cliente(1, "Cristian Rodriguez", "Cristiank18@gmail.com")}
@@ -64,6 +70,16 @@ def test_eliminar_producto_inexistente(tienda_vacia):
     assert not exito
 
 
+def test_actualizar_y_eliminar_cliente(tienda_vacia):
+    assert tienda_vacia.actualizar_cliente(1, email="cristian@correo.com")
+    assert tienda_vacia.clientes[1].email == "cristian@correo.com"
+    assert tienda_vacia.clientes[1].nombre == "Cristian Rodriguez"
+    assert not tienda_vacia.actualizar_cliente(99, nombre="Ficticio")
+    assert tienda_vacia.eliminar_cliente(1)
+    assert not tienda_vacia.eliminar_cliente(1)
+    assert tienda_vacia.clientes == {}
+
+
 def test_crear_pedido_y_reporte(tienda_vacia):
     tienda_vacia.productos = {
         1: Producto(1, "Arroz", 12000, 15),
@@ -101,4 +117,272 @@ def test_buscar_producto_por_nombre(tienda_vacia):
     }
     resultados = tienda_vacia.buscar_productos_por_nombre("pan")
     assert len(resultados) == 1
-    assert resultados[0].nombre == "Pan"
\ No newline at end of file
+    assert resultados[0].nombre == "Pan"
+
+def test_crear_pedido_anexa_al_diario(tienda_vacia):
+    tienda_vacia.productos = {1: Producto(1, "Pan", 500, 5)}
+    pedido = tienda_vacia.crear_pedido(1, {1: 2})
+    assert pedido["id_pedido"] == 1
+    assert PersistenciaJSON.lineas_diario('pedidos.json') == 1
+    assert PersistenciaJSON.leer_pedidos('pedidos.json')[0]["total_pedido"] == 1000
+
+
+def test_crear_pedido_fallido_no_descuenta_stock(tienda_vacia):
+    tienda_vacia.productos = {1: Producto(1, "Pan", 500, 5), 2: Producto(2, "Leche", 4000, 1)}
+    exito = tienda_vacia.crear_pedido(1, {1: 2, 2: 3})
+    assert not exito
+    assert tienda_vacia.productos[1].stock == 5
+
+
+@pytest.mark.parametrize("cantidades", [{1: -3}, {1: 0}, {1: 2, 2: -1}, {}])
+def test_crear_pedido_rechaza_cantidades_no_positivas(tienda_vacia, cantidades):
+    tienda_vacia.productos = {1: Producto(1, "Pan", 500, 5), 2: Producto(2, "Leche", 4000, 1)}
+    assert tienda_vacia.crear_pedido(1, cantidades) is None
+    assert [p.stock for p in tienda_vacia.productos.values()] == [5, 1]
+    assert len(tienda_vacia.pedidos) == 0
+
+
+def _contar_guardados(monkeypatch, tienda):
+    llamadas = []
+    monkeypatch.setattr(tienda.almacen, "guardar_productos", lambda productos, ids=None: llamadas.append(set(ids)))
+    return llamadas
+
+
+def test_batch_guarda_una_sola_vez(tienda_vacia, monkeypatch):
+    tienda_vacia.productos = {i: Producto(i, f"P{i}", 100, 1) for i in range(1, 51)}
+    llamadas = _contar_guardados(monkeypatch, tienda_vacia)
+    with tienda_vacia.batch():
+        for i in range(1, 51):
+            tienda_vacia.actualizar_producto(i, precio=200)
+        assert llamadas == []
+    assert llamadas == [set(range(1, 51))]
+    assert not tienda_vacia.hay_cambios_pendientes()
+
+
+def test_politica_volcar_cada_n(tienda_vacia, monkeypatch):
+    tienda_vacia.politica = PoliticaDurabilidad(cada_n=3)
+    llamadas = _contar_guardados(monkeypatch, tienda_vacia)
+    for _ in range(4):
+        tienda_vacia.agregar_producto("Pan", 500, 1)
+    assert llamadas == [{1, 2, 3}]
+    tienda_vacia.volcar()
+    assert llamadas == [{1, 2, 3}, {4}]
+
+
+def _pedido(id_pedido, id_cliente, fecha):
+    return {'id_pedido': id_pedido, 'id_cliente': id_cliente, 'nombre_cliente': 'X',
+            'fecha_pedido': fecha, 'items': [], 'total_pedido': 1.0}
+
+
+def test_historial_y_rango_de_fechas_indexados(tienda_vacia):
+    tienda_vacia.clientes[2] = Cliente(2, "Mariana Zapata", "mariana@gmail.com")
+    tienda_vacia.pedidos = [
+        _pedido(1, 1, "2025-10-20 08:15:49"),
+        _pedido(2, 2, "2025-10-21 20:27:24"),
+        _pedido(3, 1, "2025-10-19 10:00:00"),
+        _pedido(4, 2, "2025-11-02 09:00:00"),
+    ]
+    assert [p['id_pedido'] for p in tienda_vacia.historial_pedidos_cliente(1)] == [1, 3]
+
+    filtrados = tienda_vacia.filtrar_pedidos_por_fecha("2025-10-20", "2025-10-21")
+    assert [p['id_pedido'] for p in filtrados] == [1, 2]
+    assert sorted(p['id_pedido'] for p in filtrados) == sorted(
+        p['id_pedido'] for p in PersistenciaJSON.filtrar_pedidos_por_fecha(tienda_vacia.pedidos, "2025-10-20", "2025-10-21"))
+    assert [p['id_pedido'] for p in tienda_vacia.filtrar_pedidos_por_fecha(desde="2025-11-01")] == [4]
+    assert len(tienda_vacia.filtrar_pedidos_por_fecha()) == 4
+
+
+def test_crear_pedido_actualiza_indices(tienda_vacia):
+    tienda_vacia.productos = {1: Producto(1, "Pan", 500, 5)}
+    pedido = tienda_vacia.crear_pedido(1, {1: 1})
+    hoy = pedido['fecha_pedido'][:10]
+    assert tienda_vacia.historial_pedidos_cliente(1) == [pedido]
+    assert tienda_vacia.filtrar_pedidos_por_fecha(hoy, hoy) == [pedido]
+
+
+def test_buscar_producto_actualiza_indice(tienda_vacia):
+    tienda_vacia.agregar_producto("Azúcar", 3000, 5)
+    tienda_vacia.agregar_producto("Pan", 500, 5)
+    assert [p.nombre for p in tienda_vacia.buscar_productos_por_nombre("azucar")] == ["Azúcar"]
+    tienda_vacia.actualizar_producto(2, nombre="Panela")
+    assert [p.nombre for p in tienda_vacia.buscar_productos_por_nombre("panel")] == ["Panela"]
+    tienda_vacia.eliminar_producto(1)
+    assert tienda_vacia.buscar_productos_por_nombre("azu") == []
+    assert [p.nombre for p in tienda_vacia.sugerir_productos("panella")] == ["Panela"]
+
+
+def test_ids_no_se_reutilizan_tras_eliminar(tienda_vacia):
+    tienda_vacia.agregar_producto("Pan", 500, 5)
+    tienda_vacia.agregar_producto("Leche", 4000, 5)
+    tienda_vacia.eliminar_producto(2)
+
+    recargada = Tienda()
+    assert list(recargada.productos) == [1]
+    recargada.agregar_producto("Queso", 9000, 5)
+    assert list(recargada.productos) == [1, 3]
+
+
+def test_siguiente_id_respeta_datos_asignados(tienda_vacia):
+    tienda_vacia.productos = {7: Producto(7, "Pan", 500, 5)}
+    assert tienda_vacia.siguiente_id('productos') == 8
+    tienda_vacia.pedidos = [_pedido(40, 1, "2025-10-20 08:15:49")]
+    assert tienda_vacia.siguiente_id('pedidos') == 41
+
+
+def test_iterar_pedidos_por_cliente_y_fecha(tienda_vacia):
+    tienda_vacia.pedidos = [
+        _pedido(1, 1, "2025-10-20 08:15:49"),
+        _pedido(2, 2, "2025-10-21 20:27:24"),
+        _pedido(3, 1, "2025-11-02 09:00:00"),
+    ]
+    assert [p['id_pedido'] for p in tienda_vacia.iterar_pedidos(id_cliente=1, desde="2025-11-01")] == [3]
+    assert [p['id_pedido'] for p in tienda_vacia.iterar_pedidos(hasta="2025-10-21")] == [1, 2]
+    assert [p['id_pedido'] for p in tienda_vacia.iterar_pedidos()] == [1, 2, 3]
+
+
+def test_instantanea_pedidos_ignora_pedidos_nuevos(tienda_vacia):
+    tienda_vacia.pedidos = [_pedido(1, 1, "2025-10-20 08:15:49"), _pedido(2, 2, "2025-10-21 20:27:24")]
+    todos = tienda_vacia.instantanea_pedidos()
+    del_cliente = tienda_vacia.instantanea_pedidos(id_cliente=1)
+    por_fecha = tienda_vacia.instantanea_pedidos(desde="2025-10-01")
+    tienda_vacia._incorporar_pedido(_pedido(3, 1, "2025-11-02 09:00:00"))
+
+    assert [p['id_pedido'] for p in todos] == [1, 2]
+    assert [p['id_pedido'] for p in del_cliente] == [1]
+    assert [p['id_pedido'] for p in por_fecha] == [1, 2]
+    assert len(tienda_vacia.pedidos) == 3
+
+
+def test_colecciones_se_cargan_en_el_primer_acceso(tmp_path):
+    almacen = PersistenciaArchivos(str(tmp_path))
+    cargados = []
+    original = almacen.cargar_pedidos
+    almacen.cargar_pedidos = lambda: cargados.append('pedidos') or original()
+
+    tienda = Tienda(almacen)
+    assert cargados == []
+    assert tienda.pedidos == []
+    assert tienda.historial_pedidos_cliente(1) is None
+    assert cargados == ['pedidos']
+
+
+def test_precargar_en_segundo_plano(tienda_vacia):
+    tienda = Tienda()
+    tienda.precargar().join()
+    assert tienda.productos == {} and tienda.clientes == {} and tienda.pedidos == []
+
+
+def test_importar_persistencia_no_carga_exportadores():
+    codigo = "import sys, persistencia; print(any(m in sys.modules for m in ('openpyxl', 'reportlab')))"
+    salida = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True, check=True)
+    assert salida.stdout.strip() == "False"
+
+
+def test_crear_pedidos_bulk_rechaza_y_guarda_una_vez(tienda_vacia, monkeypatch):
+    tienda_vacia.productos = {1: Producto(1, "Pan", 500, 5), 2: Producto(2, "Leche", 4000, 10)}
+    escrituras = []
+    registrar = tienda_vacia.almacen.registrar_pedidos
+    monkeypatch.setattr(tienda_vacia.almacen, "registrar_pedidos",
+                        lambda *args: escrituras.append(len(args[0])) or registrar(*args))
+    resultado = tienda_vacia.crear_pedidos_bulk([
+        {'id_cliente': 1, 'productos': {1: 3}, 'fecha_pedido': '2025-03-01 09:30:00'},
+        {'id_cliente': 1, 'productos': {1: 3}},                     # el stock ya lo tomó el anterior
+        {'id_cliente': 9, 'productos': {2: 1}},                     # cliente inexistente
+        {'id_cliente': 1, 'items': [{'id_producto': 2, 'cantidad': 2}, {'id_producto': 1, 'cantidad': 2}]},
+        {'id_cliente': 1, 'productos': {2: 0}},
+    ])
+    assert [p['id_pedido'] for p in resultado.creados] == [1, 2]
+    assert [r['posicion'] for r in resultado.rechazados] == [1, 2, 4]
+    assert "Stock insuficiente" in resultado.rechazados[0]['motivo']
+    assert escrituras == [2]
+    assert tienda_vacia.productos[1].stock == 0 and tienda_vacia.productos[2].stock == 8
+    guardados = PersistenciaJSON.leer_pedidos('pedidos.json')
+    assert [p['fecha_pedido'] for p in guardados][0] == '2025-03-01 09:30:00'
+    assert guardados[1]['total_pedido'] == 9000
+    assert len(tienda_vacia.historial_pedidos_cliente(1)) == 2
+
+
+def test_crear_pedidos_bulk_atomico(tienda_vacia):
+    tienda_vacia.productos = {1: Producto(1, "Pan", 500, 5)}
+    resultado = tienda_vacia.crear_pedidos_bulk([{'id_cliente': 1, 'productos': {1: 2}},
+                                                 {'id_cliente': 1, 'productos': {1: 9}}], atomico=True)
+    assert resultado.creados == []
+    assert [r['posicion'] for r in resultado.rechazados] == [0, 1]
+    assert tienda_vacia.productos[1].stock == 5
+    assert PersistenciaJSON.lineas_diario('pedidos.json') == 0
+
+
+def test_codigo_de_barras_unico_y_persistido(tienda_vacia):
+    pan = tienda_vacia.crear_producto("Pan", 500, 10, codigo="7702001000017")
+    assert tienda_vacia.crear_producto("Pan copia", 500, 10, codigo=" 7702001000017") is None
+    arroz = tienda_vacia.crear_producto("Arroz", 12000, 5)
+    assert tienda_vacia.buscar_por_codigo("7702001000017") is pan
+
+    assert not tienda_vacia.actualizar_producto(arroz.id_producto, codigo="7702001000017")
+    assert tienda_vacia.actualizar_producto(pan.id_producto, codigo="")
+    assert tienda_vacia.actualizar_producto(arroz.id_producto, codigo="7702001000017")
+    assert tienda_vacia.buscar_por_codigo("7702001000017") is arroz and pan.codigo is None
+    tienda_vacia.eliminar_producto(arroz.id_producto)
+    assert tienda_vacia.buscar_por_codigo("7702001000017") is None
+
+    tienda_vacia.actualizar_producto(pan.id_producto, codigo="SKU-PAN")
+    tienda_vacia.almacen.guardar_productos(tienda_vacia.productos)
+    recargada = Tienda(tienda_vacia.almacen)
+    assert recargada.buscar_por_codigo(" SKU-PAN ").nombre == "Pan"
+    assert recargada.buscar_por_codigo("SKUPAN") is None
+
+
+def test_csv_sin_columna_codigo(tmp_path):
+    (tmp_path / "productos.csv").write_text("id_producto,nombre,precio,stock,version\n1,Pan,500.0,5,0\n",
+                                            encoding="utf-8")
+    tienda = Tienda(PersistenciaArchivos(str(tmp_path)))
+    # Primer uso de la tienda: el índice de códigos se arma al cargar los productos
+    assert tienda.crear_producto("Leche", 4000, 3, codigo="7701").id_producto == 2
+    assert tienda.productos[1].codigo is None and tienda.buscar_por_codigo("1") is None
+
+
+def _stock(directorio):
+    return {i: p.stock for i, p in Tienda(PersistenciaArchivos(str(directorio))).productos.items()}
+
+
+def test_pedido_no_reescribe_productos_y_se_pliega_al_compactar(tmp_path):
+    almacen = PersistenciaArchivos(str(tmp_path))
+    almacen.guardar_productos({1: Producto(1, "Pan", 500, 10), 2: Producto(2, "Leche", 4000, 5)})
+    almacen.guardar_clientes({1: Cliente(1, "Ana", "ana@correo.com")})
+    archivo = tmp_path / "productos.csv"
+    antes = archivo.read_bytes()
+
+    tienda = Tienda(almacen)
+    tienda.crear_pedido(1, {1: 2})
+    tienda.crear_pedido(1, {1: 1, 2: 1})
+    tienda.cerrar()
+    # Solo se anexó al diario; el stock sale del CSV menos los pedidos posteriores a stock.json
+    assert archivo.read_bytes() == antes
+    assert _stock(tmp_path) == {1: 7, 2: 4}
+
+    # Un producto editado después de los pedidos se guarda con su stock descontado: no se descuenta dos veces
+    tienda.actualizar_producto(1, precio=600)
+    tienda.cerrar()
+    assert _stock(tmp_path) == {1: 7, 2: 4}
+
+    tienda.crear_pedido(1, {2: 3})
+    tienda.almacen.guardar_pedidos(tienda.pedidos)
+    assert PersistenciaJSON.lineas_diario(str(tmp_path / "pedidos.json")) == 0
+    assert [fila["stock"] for fila in PersistenciaCSV.leer_datos(str(archivo), CAMPOS_PRODUCTO)] == ["7", "1"]
+    assert _stock(tmp_path) == {1: 7, 2: 1}
+
+
+def test_datos_sin_stock_json_no_descuentan_dos_veces(tmp_path):
+    # Versiones anteriores reescribían productos.csv en cada pedido: el CSV ya incluye el diario
+    PersistenciaCSV.escribir_datos(str(tmp_path / "productos.csv"), [Producto(1, "Pan", 500, 8)], CAMPOS_PRODUCTO)
+    PersistenciaJSON.anexar_pedido(str(tmp_path / "pedidos.json"), {
+        'id_pedido': 1, 'id_cliente': 1, 'nombre_cliente': 'Ana', 'fecha_pedido': '2025-10-20 08:15:49',
+        'items': [{'id_producto': 1, 'nombre': 'Pan', 'cantidad': 2, 'precio_unitario': 5.0, 'subtotal': 10.0}],
+        'total_pedido': 10.0})
+    assert _stock(tmp_path) == {1: 8}
+
+    tienda = Tienda(PersistenciaArchivos(str(tmp_path)))
+    tienda.clientes = {1: Cliente(1, "Ana", "ana@correo.com")}
+    tienda.crear_pedido(1, {1: 3})
+    assert (tmp_path / "stock.json").exists()
+    assert _stock(tmp_path) == {1: 5}